@@ -0,0 +1,134 @@
+"""Compare the dashboard statistics query strategies
+
+legacy      five separate statements, each its own transaction
+aggregate   get_dashboard_stats(use_counters=False)
+counters    get_dashboard_stats(use_counters=True)
+
+Usage: python -m benchmarks.dashboard_stats --medicines 20000 --purchases 200000
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database.init_db import init_database
+from models.database import Database
+from models.medicine_model import MedicineModel
+
+
+def legacy_dashboard_stats(db):
+    """get_dashboard_stats as it was before the single-transaction version"""
+    total_medicines = db.fetch_one("""
+        SELECT COUNT(DISTINCT medicine_name) as count FROM medicines
+    """)['count']
+    total_stockists = db.fetch_one("""
+        SELECT COUNT(*) as count FROM stockists
+    """)['count']
+    purchase_stats = db.fetch_one("""
+        SELECT
+            COUNT(*) as total_purchases,
+            COALESCE(SUM(savings), 0) as total_savings,
+            COALESCE(AVG(savings), 0) as avg_savings
+        FROM purchases
+    """)
+    best_deals = db.fetch_all("""
+        SELECT
+            m.medicine_name,
+            m.company_name,
+            s.name as stockist_name,
+            MIN(mp.final_price) as price,
+            mp.mrp,
+            (mp.mrp - mp.final_price) as savings,
+            mp.discount_percent
+        FROM medicine_prices mp
+        JOIN medicines m ON mp.medicine_id = m.id
+        JOIN stockists s ON mp.stockist_id = s.id
+        WHERE date(mp.purchase_date) = date('now')
+        GROUP BY m.id
+        ORDER BY mp.final_price ASC
+        LIMIT 5
+    """)
+    recent_medicines = db.fetch_all("""
+        SELECT medicine_name, company_name, created_at
+        FROM medicines
+        ORDER BY created_at DESC
+        LIMIT 5
+    """)
+    return {
+        'total_medicines': total_medicines,
+        'total_stockists': total_stockists,
+        'total_purchases': purchase_stats['total_purchases'],
+        'total_savings': round(purchase_stats['total_savings'], 2),
+        'avg_savings': round(purchase_stats['avg_savings'], 2),
+        'best_deals': best_deals,
+        'recent_medicines': recent_medicines
+    }
+
+
+def populate(db, medicines, purchases):
+    """Add extra medicines and purchases on top of the sample data"""
+    with db.transaction() as conn:
+        conn.executemany(
+            "INSERT INTO medicines (medicine_name, company_name, generic_name) VALUES (?, ?, ?)",
+            ((f"Medicine {i % (medicines // 2 or 1)}", f"Company {i % 300}", f"Generic {i % 900}")
+             for i in range(medicines))
+        )
+        conn.executemany(
+            """INSERT INTO purchases
+               (medicine_name, selected_stockist, selected_price, lowest_price, savings)
+               VALUES (?, ?, ?, ?, ?)""",
+            ((f"Medicine {i % 1000}", "Prime Pharma", 100.0, 90.0, random.uniform(-20, 5))
+             for i in range(purchases))
+        )
+
+
+def timed(fn, repeat):
+    """Mean milliseconds per call"""
+    fn()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) * 1000 / repeat
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--medicines', type=int, default=20000)
+    parser.add_argument('--purchases', type=int, default=200000)
+    parser.add_argument('--repeat', type=int, default=50)
+    args = parser.parse_args(argv)
+    
+    random.seed(42)
+    with tempfile.TemporaryDirectory() as workdir:
+        db_path = os.path.join(workdir, 'dashboard.db')
+        init_database(db_path, verbose=False, seed=True)
+        db = Database()
+        db.configure(db_path=db_path, cache_size=0)
+        populate(db, args.medicines, args.purchases)
+        model = MedicineModel()
+        
+        strategies = [
+            ('legacy', lambda: legacy_dashboard_stats(db)),
+            ('aggregate', lambda: model.get_dashboard_stats(use_counters=False)),
+            ('counters', lambda: model.get_dashboard_stats(use_counters=True))
+        ]
+        
+        expected = legacy_dashboard_stats(db)
+        for name, fn in strategies:
+            result = fn()
+            for key in ('total_medicines', 'total_stockists', 'total_purchases', 'total_savings'):
+                if result[key] != expected[key]:
+                    print(f"WARNING: {name} {key} = {result[key]}, legacy = {expected[key]}")
+        
+        print(f"{'strategy':<12}{'ms/refresh':>12}")
+        for name, fn in strategies:
+            print(f"{name:<12}{timed(fn, args.repeat):>12.3f}")
+        db.close()
+
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
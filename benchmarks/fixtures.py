@@ -0,0 +1,153 @@
+"""Synthetic catalogue databases shared by the benchmarks
+
+Usage: python -m benchmarks.fixtures [--scale 1m] [--dir PATH]
+
+A fixture is generated once per scale and seed by database.synthetic
+and kept in a cache directory; later runs reuse it. Quotes end on the
+fixed FIXTURE_END date, so fixtures and their numbers do not change from
+day to day. Benchmarks run on a copy (see copy_fixture), which also gets
+the quotes of FIXTURE_END again dated today for the "today" queries.
+"""
+import argparse
+import glob
+import hashlib
+import json
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+from datetime import date
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database.synthetic import CatalogueGenerator, print_progress
+
+# Named sizes by medicine_prices rows
+SCALES = {
+    '10k': {'prices': 10000, 'medicines': 1000, 'stockists': 50, 'purchases': 1000},
+    '100k': {'prices': 100000, 'medicines': 10000, 'stockists': 200, 'purchases': 10000},
+    '1m': {'prices': 1000000, 'medicines': 100000, 'stockists': 2000, 'purchases': 100000}
+}
+
+# Last day of generated quotes; copy_fixture repeats its quotes for today
+FIXTURE_END = date(2026, 1, 31)
+
+DEFAULT_FIXTURE_DIR = os.environ.get(
+    'MEDICINE_FIXTURE_DIR',
+    os.path.join(tempfile.gettempdir(), 'medicine_comparator_fixtures')
+)
+
+
+def catalogue_fixture(scale='100k', seed=42, directory=None, progress=None, **overrides):
+    """Path of a generated catalogue database for scale, building it if missing
+
+    The file is named after scale and seed; overrides, which replace
+    single generator arguments (e.g. days=30), add a hash of themselves.
+    The generator spec is saved next to the file, and a fixture whose
+    spec differs (e.g. a new GENERATOR_VERSION) is rebuilt in place.
+    """
+    arguments = dict(SCALES[scale], end=FIXTURE_END)
+    arguments.update(overrides)
+    generator = CatalogueGenerator(seed=seed, **arguments)
+    spec = generator.spec()
+    name = f"catalogue-{scale}-seed{seed}"
+    if overrides:
+        digest = hashlib.sha1(json.dumps(overrides, sort_keys=True, default=str).encode())
+        name += f"-{digest.hexdigest()[:12]}"
+    directory = directory or DEFAULT_FIXTURE_DIR
+    path = os.path.join(directory, name + '.db')
+    if os.path.exists(path) and _saved_spec(path) == spec:
+        return path
+
+    os.makedirs(directory, exist_ok=True)
+    remove_stale_fixtures(directory, scale, seed)
+    # Build under a temporary name so an interrupted run never leaves a half fixture
+    partial = path + '.partial'
+    for stale in (partial, partial + '-wal', partial + '-shm'):
+        if os.path.exists(stale):
+            os.remove(stale)
+    generator.generate(partial, progress)
+    os.replace(partial, path)
+    with open(path + '.json', 'w') as f:
+        json.dump(spec, f, indent=2)
+    return path
+
+
+def _saved_spec(path):
+    """Generator spec stored next to a fixture, or None"""
+    try:
+        with open(path + '.json') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def remove_stale_fixtures(directory, scale, seed):
+    """Delete fixtures of scale and seed named after their spec hash
+
+    That older naming included the generation date, so a new fixture was
+    left behind every day.
+    """
+    for path in glob.glob(os.path.join(directory, f"catalogue-{scale}-*.db")):
+        if os.path.basename(path).startswith(f"catalogue-{scale}-seed"):
+            continue
+        spec = _saved_spec(path)
+        if spec is None or spec.get('seed') == seed:
+            for stale in (path, path + '.json', path + '-wal', path + '-shm'):
+                if os.path.exists(stale):
+                    os.remove(stale)
+
+
+def copy_fixture(path, workdir, today=True):
+    """Copy a fixture into workdir for a benchmark that writes to it
+
+    With today, the copy gets a today slice (see add_today_slice).
+    """
+    target = os.path.join(workdir, os.path.basename(path))
+    shutil.copyfile(path, target)
+    if today:
+        add_today_slice(target)
+    return target
+
+
+def add_today_slice(path):
+    """Repeat the quotes of FIXTURE_END dated today; returns the number of rows
+
+    Today's best deals read date('now'), which a fixture ending on
+    FIXTURE_END never has. The rows go through the triggers like any
+    new quote, so the derived tables include them.
+    """
+    conn = sqlite3.connect(path)
+    try:
+        with conn:
+            cursor = conn.execute("""
+                INSERT INTO medicine_prices
+                (medicine_id, stockist_id, net_rate, mrp, discount_percent,
+                 final_price, paid_status, paid_amount, purchase_date)
+                SELECT medicine_id, stockist_id, net_rate, mrp, discount_percent,
+                       final_price, paid_status, paid_amount,
+                       date('now') || substr(purchase_date, 11)
+                FROM medicine_prices
+                WHERE purchase_date >= ? AND purchase_date < date(?, '+1 day')
+                ORDER BY id
+            """, (FIXTURE_END.isoformat(), FIXTURE_END.isoformat()))
+            return cursor.rowcount
+    finally:
+        conn.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--scale', choices=sorted(SCALES), nargs='+', default=['100k'])
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--dir', default=DEFAULT_FIXTURE_DIR, help="fixture cache directory")
+    args = parser.parse_args(argv)
+
+    for scale in args.scale:
+        print(f"{scale}:")
+        print(f"  {catalogue_fixture(scale, args.seed, args.dir, print_progress)}")
+
+
+if __name__ == '__main__':
+    main()
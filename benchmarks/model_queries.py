@@ -0,0 +1,234 @@
+"""Time every MedicineModel/StockistModel query on generated catalogues
+
+Each query runs repeatedly against a copy of a benchmarks.fixtures
+catalogue per scale with the read cache off. p50/p95/p99 latency and
+throughput are printed, optionally written as JSON, and compared with
+a saved baseline; a query slower than the baseline by more than
+--threshold is reported as a regression and the exit status is 1.
+
+Usage: python -m benchmarks.model_queries --scale 10k 100k --output results.json
+       python -m benchmarks.model_queries --scale 10k --baseline results.json
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fixtures import SCALES, catalogue_fixture, copy_fixture, print_progress
+from models.database import Database
+from models.medicine_model import MedicineModel
+from models.stockist_model import StockistModel
+
+# Differences below this many milliseconds are timer noise, not regressions
+NOISE_FLOOR_MS = 0.05
+
+
+def percentile(ordered, p):
+    """Linearly interpolated percentile of an ascending list"""
+    if not ordered:
+        return 0.0
+    k = (len(ordered) - 1) * p / 100
+    low = int(k)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (k - low)
+
+
+def result_rows(result):
+    """Rows returned by a model call, for the selectivity column"""
+    if isinstance(result, dict):
+        return len(result.get('best_deals', ())) + len(result.get('recent_medicines', ()))
+    if isinstance(result, (list, tuple)):
+        return len(result)
+    return 0
+
+
+def measure(call, repeat, max_seconds, warmup=3):
+    """Latency statistics of call() over up to repeat runs (at least 5)"""
+    for _ in range(warmup):
+        call()
+    latencies = []
+    rows = 0
+    started = time.perf_counter()
+    while len(latencies) < repeat:
+        start = time.perf_counter()
+        result = call()
+        latencies.append(time.perf_counter() - start)
+        rows += result_rows(result)
+        if len(latencies) >= 5 and time.perf_counter() - started > max_seconds:
+            break
+    total = sum(latencies)
+    latencies.sort()
+    return {
+        'runs': len(latencies),
+        'p50_ms': round(percentile(latencies, 50) * 1000, 4),
+        'p95_ms': round(percentile(latencies, 95) * 1000, 4),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 4),
+        'mean_ms': round(total / len(latencies) * 1000, 4),
+        'ops_per_sec': round(len(latencies) / total, 1) if total else 0.0,
+        'rows': round(rows / len(latencies), 1)
+    }
+
+
+def search_terms(db, rng):
+    """Search terms of decreasing selectivity, taken from the catalogue itself"""
+    names = [row['medicine_name'] for row in db.fetch_all(
+        "SELECT medicine_name FROM medicines ORDER BY id LIMIT 1000"
+    )]
+    name = rng.choice(names)
+    return [
+        ('broad', 'tab'),
+        ('prefix', name[:2]),
+        ('generic', name.split()[0]),
+        ('exact', name),
+        ('no match', 'zzqx')
+    ]
+
+
+def model_benchmarks(db, rng):
+    """(name, call) pairs; ids are drawn from price rows so popular medicines come up more"""
+    medicines = MedicineModel()
+    stockists = StockistModel()
+    max_id = db.fetch_one("SELECT MAX(id) as id FROM medicine_prices")['id']
+    sample = sorted({rng.randint(1, max_id) for _ in range(500)})
+    quotes = db.fetch_all(
+        "SELECT medicine_id, stockist_id, mrp FROM medicine_prices WHERE id IN (%s)"
+        % ','.join(map(str, sample))
+    )
+    names = {row['id']: row['medicine_name'] for row in db.fetch_all(
+        "SELECT id, medicine_name FROM medicines WHERE id IN (%s)"
+        % ','.join(str(q['medicine_id']) for q in quotes)
+    )}
+    stockist_names = [row['name'] for row in stockists.get_all_stockists()]
+
+    def pick():
+        return rng.choice(quotes)
+
+    def add_price():
+        quote = pick()
+        mrp = quote['mrp']
+        discount = rng.choice([0, 5, 10, 15])
+        medicines.add_medicine_price(quote['medicine_id'], {
+            'stockist_id': quote['stockist_id'],
+            'net_rate': round(mrp * 0.8, 2),
+            'mrp': mrp,
+            'discount_percent': discount
+        })
+
+    def purchase():
+        quote = pick()
+        paid = round(quote['mrp'] * rng.uniform(0.7, 1.0), 2)
+        medicines.record_purchase(names[quote['medicine_id']], rng.choice(stockist_names),
+                                  paid, round(quote['mrp'] * 0.7, 2))
+
+    benchmarks = [
+        ('get_dashboard_stats', medicines.get_dashboard_stats),
+        ('get_dashboard_stats (aggregate)', lambda: medicines.get_dashboard_stats(use_counters=False))
+    ]
+    for label, term in search_terms(db, rng):
+        benchmarks.append((f'search_lowest_price ({label})',
+                           lambda term=term: medicines.search_lowest_price(term)))
+    benchmarks += [
+        ('get_all_stockist_prices', lambda: medicines.get_all_stockist_prices(pick()['medicine_id'])),
+        ('get_all_medicines_with_prices', medicines.get_all_medicines_with_prices),
+        ('get_stockist_medicines', lambda: stockists.get_stockist_medicines(pick()['stockist_id'])),
+        ('add_medicine_price', add_price),
+        ('record_purchase', purchase)
+    ]
+    return benchmarks
+
+
+def run_scale(scale, args, progress=None):
+    """Benchmark one fixture scale on a scratch copy; returns {name: stats}"""
+    fixture = catalogue_fixture(scale, seed=args.seed, progress=progress)
+    results = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        db = Database()
+        db.configure(db_path=copy_fixture(fixture, workdir), cache_size=0)
+        try:
+            rng = random.Random(args.seed)
+            for name, call in model_benchmarks(db, rng):
+                if args.only and not any(part in name for part in args.only):
+                    continue
+                results[name] = measure(call, args.repeat, args.max_seconds)
+                print(f"  {name:<40}{results[name]['p50_ms']:>10.3f}{results[name]['p95_ms']:>10.3f}"
+                      f"{results[name]['p99_ms']:>10.3f}{results[name]['ops_per_sec']:>12.1f}"
+                      f"{results[name]['rows']:>10.1f}", flush=True)
+        finally:
+            db.close()
+    return results
+
+
+def compare(results, baseline, threshold):
+    """(scale, name, metric, old, new) for every metric slower than the baseline allows"""
+    regressions = []
+    for scale, queries in results.items():
+        for name, stats in queries.items():
+            old = baseline.get(scale, {}).get(name)
+            if old is None:
+                continue
+            for metric in ('p50_ms', 'p95_ms'):
+                if (stats[metric] > old[metric] * (1 + threshold)
+                        and stats[metric] - old[metric] > NOISE_FLOOR_MS):
+                    regressions.append((scale, name, metric, old[metric], stats[metric]))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--scale', choices=list(SCALES), nargs='+', default=['10k', '100k'])
+    parser.add_argument('--repeat', type=int, default=200, help="runs per query")
+    parser.add_argument('--max-seconds', type=float, default=5.0,
+                        help="stop a query after this long (at least 5 runs)")
+    parser.add_argument('--only', nargs='+', help="run queries whose name contains one of these")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help="write results as JSON")
+    parser.add_argument('--baseline', help="JSON results to compare against")
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help="allowed slowdown of p50/p95 over the baseline (0.25 = 25%%)")
+    args = parser.parse_args(argv)
+
+    results = {}
+    for scale in args.scale:
+        print(f"{scale} ({SCALES[scale]['prices']} price rows)")
+        print(f"  {'query':<40}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'ops/s':>12}{'rows':>10}")
+        results[scale] = run_scale(scale, args, print_progress)
+
+    report = {
+        'meta': {
+            'created': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'sqlite': sqlite3.sqlite_version,
+            'platform': platform.platform(),
+            'seed': args.seed,
+            'repeat': args.repeat,
+            'scales': {scale: SCALES[scale] for scale in args.scale}
+        },
+        'results': results
+    }
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Results written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)['results']
+        regressions = compare(results, baseline, args.threshold)
+        for scale, name, metric, old, new in regressions:
+            print(f"REGRESSION: {scale} {name} {metric} {old:.3f} -> {new:.3f} ms "
+                  f"(+{(new / old - 1) * 100 if old else float('inf'):.0f}%)")
+        if regressions:
+            sys.exit(1)
+        print(f"No regressions against {args.baseline} (threshold {args.threshold:.0%})")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,113 @@
+"""Compare database PRAGMA profiles on price inserts and lowest-price searches
+
+Usage: python -m benchmarks.pragma_profiles --inserts 2000 --searches 500
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database.init_db import init_database
+from models.database import Database, PRAGMA_PROFILES
+from models.medicine_model import MedicineModel
+
+SEARCH_TERMS = ['para', 'amox', 'vitamin', 'sun', 'mg', 'abbott', 'zz']
+
+
+def bench_inserts(model, medicine_ids, stockist_ids, count):
+    """Insert price rows one by one through add_medicine_price"""
+    start = time.perf_counter()
+    for _ in range(count):
+        mrp = round(random.uniform(10, 500), 2)
+        model.add_medicine_price(random.choice(medicine_ids), {
+            'stockist_id': random.choice(stockist_ids),
+            'net_rate': round(mrp * 0.8, 2),
+            'mrp': mrp,
+            'discount_percent': random.choice([0, 5, 10, 15])
+        })
+    return time.perf_counter() - start
+
+
+def bench_searches(model, count):
+    """Run search_lowest_price over a rotating set of terms"""
+    start = time.perf_counter()
+    for i in range(count):
+        model.search_lowest_price(SEARCH_TERMS[i % len(SEARCH_TERMS)])
+    return time.perf_counter() - start
+
+
+def bench_mixed(model, medicine_ids, stockist_ids, count):
+    """Search on one thread while another thread inserts prices"""
+    latencies = []
+    done = threading.Event()
+    
+    def reader():
+        while not done.is_set():
+            start = time.perf_counter()
+            model.search_lowest_price(random.choice(SEARCH_TERMS))
+            latencies.append(time.perf_counter() - start)
+    
+    thread = threading.Thread(target=reader)
+    thread.start()
+    try:
+        bench_inserts(model, medicine_ids, stockist_ids, count)
+    finally:
+        done.set()
+        thread.join()
+    
+    latencies.sort()
+    if not latencies:
+        return 0.0, 0.0
+    return latencies[len(latencies) // 2], latencies[int(len(latencies) * 0.95)]
+
+
+def run_profile(profile, workdir, inserts, searches):
+    """Build a fresh sample database with the profile and time it"""
+    db_path = os.path.join(workdir, f'{profile}.db')
+    init_database(db_path, profile=profile, verbose=False, seed=True)
+    
+    db = Database()
+    db.configure(db_path=db_path, profile=profile, cache_size=0)
+    model = MedicineModel()
+    medicine_ids = [row['id'] for row in db.fetch_all("SELECT id FROM medicines")]
+    stockist_ids = [row['id'] for row in db.fetch_all("SELECT id FROM stockists")]
+    
+    insert_time = bench_inserts(model, medicine_ids, stockist_ids, inserts)
+    search_time = bench_searches(model, searches)
+    p50, p95 = bench_mixed(model, medicine_ids, stockist_ids, inserts // 4)
+    db.close()
+    
+    return {
+        'profile': profile,
+        'inserts_per_sec': inserts / insert_time,
+        'searches_per_sec': searches / search_time,
+        'mixed_search_p50_ms': p50 * 1000,
+        'mixed_search_p95_ms': p95 * 1000
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--inserts', type=int, default=2000)
+    parser.add_argument('--searches', type=int, default=500)
+    parser.add_argument('--profiles', nargs='+', default=list(PRAGMA_PROFILES))
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args(argv)
+    
+    random.seed(args.seed)
+    with tempfile.TemporaryDirectory() as workdir:
+        results = [run_profile(p, workdir, args.inserts, args.searches) for p in args.profiles]
+    
+    print(f"{'profile':<14}{'inserts/s':>12}{'searches/s':>12}{'mixed p50 ms':>14}{'mixed p95 ms':>14}")
+    for r in results:
+        print(f"{r['profile']:<14}{r['inserts_per_sec']:>12.0f}{r['searches_per_sec']:>12.0f}"
+              f"{r['mixed_search_p50_ms']:>14.2f}{r['mixed_search_p95_ms']:>14.2f}")
+
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
@@ -0,0 +1,141 @@
+"""Fail if a model query falls back to a full table scan
+
+Every MedicineModel/StockistModel read is run against a fresh sample
+database with SQL tracing on; each traced SELECT is then passed through
+EXPLAIN QUERY PLAN and any SCAN of a table not allowed for that query is
+reported. Exits with status 1 on regressions.
+
+Usage: python -m benchmarks.query_plans [--verbose]
+"""
+import argparse
+import os
+import re
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database.init_db import init_database
+from models.database import Database
+from models.medicine_model import MedicineModel
+from models.stockist_model import StockistModel
+from models.price_history_model import PriceHistoryModel
+
+SCAN_PATTERN = re.compile(r'^SCAN (\w+)')
+
+TABLE_ALIASES = {
+    'm': 'medicines',
+    'mp': 'medicine_prices',
+    's': 'stockists',
+    'bp': 'medicine_best_price',
+    'h': 'price_history_daily'
+}
+
+
+def model_queries():
+    """(name, call, tables that may be scanned in full)"""
+    medicines = MedicineModel()
+    stockists = StockistModel()
+    history = PriceHistoryModel()
+    return [
+        ('get_dashboard_stats', medicines.get_dashboard_stats,
+         {'medicines', 'stats_counters'}),
+        ('get_dashboard_stats (aggregate)',
+         lambda: medicines.get_dashboard_stats(use_counters=False),
+         {'medicines', 'stockists', 'purchases'}),
+        ('search_lowest_price', lambda: medicines.search_lowest_price('para'),
+         set()),
+        ('search_lowest_price (prefix)', lambda: medicines.search_lowest_price('pa'),
+         set()),
+        ('get_all_stockist_prices', lambda: medicines.get_all_stockist_prices(1),
+         set()),
+        ('get_all_medicines_with_prices', medicines.get_all_medicines_with_prices,
+         {'medicines'}),
+        ('get_all_stockists', stockists.get_all_stockists,
+         {'stockists'}),
+        ('get_stockist_medicines', lambda: stockists.get_stockist_medicines(1),
+         set()),
+        ('get_price_trend', lambda: history.get_price_trend(1),
+         set()),
+        ('get_price_trend (weekly, stockist)',
+         lambda: history.get_price_trend(1, 'weekly', stockist_id=1),
+         set()),
+        ('get_stockist_trends', lambda: history.get_stockist_trends(1),
+         set())
+    ]
+
+
+def trace_statements(db, call):
+    """Run a model call and return the SELECT statements it executed"""
+    statements = []
+    with db.get_connection() as conn:
+        conn.set_trace_callback(statements.append)
+        try:
+            call()
+        finally:
+            conn.set_trace_callback(None)
+    return [s for s in statements if s.lstrip().upper().startswith(('SELECT', 'WITH'))]
+
+
+def scanned_tables(conn, statement):
+    """Tables read in full according to EXPLAIN QUERY PLAN
+    
+    Scans of CTEs and subquery co-routines are ignored; they only walk
+    rows that an earlier step already produced. Full-text tables report
+    MATCH lookups as a VIRTUAL TABLE INDEX scan, which is not a full scan.
+    """
+    known = {row['name'] for row in conn.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'table'"
+    )}
+    plan = conn.execute(f"EXPLAIN QUERY PLAN {statement}").fetchall()
+    details = [row['detail'] for row in plan]
+    tables = set()
+    for detail in details:
+        match = SCAN_PATTERN.match(detail)
+        if match and 'VIRTUAL TABLE INDEX' not in detail:
+            name = TABLE_ALIASES.get(match.group(1), match.group(1))
+            if name in known:
+                tables.add(name)
+    return tables, details
+
+
+def check(verbose=False):
+    """Return a list of (query name, table, plan) regressions"""
+    failures = []
+    with tempfile.TemporaryDirectory() as workdir:
+        db_path = os.path.join(workdir, 'plans.db')
+        init_database(db_path, verbose=False, seed=True)
+        db = Database()
+        db.configure(db_path=db_path, cache_size=0)
+        
+        for name, call, allowed in model_queries():
+            for statement in trace_statements(db, call):
+                with db.get_connection() as conn:
+                    tables, details = scanned_tables(conn, statement)
+                if verbose:
+                    print(f"-- {name}")
+                    for detail in details:
+                        print(f"   {detail}")
+                for table in sorted(tables - allowed):
+                    failures.append((name, table, details))
+        db.close()
+    return failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--verbose', action='store_true', help="print every query plan")
+    args = parser.parse_args(argv)
+    
+    failures = check(args.verbose)
+    for name, table, details in failures:
+        print(f"FULL SCAN: {name} scans {table}")
+        for detail in details:
+            print(f"    {detail}")
+    if failures:
+        sys.exit(1)
+    print("All model queries use indexes")
+
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
@@ -1,5 +1,8 @@
 from models.medicine_model import MedicineModel
 from models.stockist_model import StockistModel
+from models.change_feed import ChangeFeed
+from controllers.task_runner import TaskRunner
+from controllers.search_service import TypeAheadSearch
 
 
 class DashboardController:
@@ -7,31 +10,143 @@ class DashboardController:
         self.main_window = main_window
         self.medicine_model = MedicineModel()
         self.stockist_model = StockistModel()
+        self.tasks = TaskRunner()
+        self.change_feed = ChangeFeed()
+        # Views read rows by key, which CompactRow tuples support without a dict per row
+        self.compact_rows = True
+        self.type_ahead = TypeAheadSearch(
+            self.medicine_model, self.tasks, compact=self.compact_rows
+        )
+    
+    def prepare_database(self):
+        """Create or migrate the database and note the change feed's starting point"""
+        from database.init_db import init_database
+        init_database(verbose=False)
+        self.medicine_model.db.schema_changed()
+        self.poll_changes()
     
     def get_dashboard_stats(self):
         """Get all statistics for dashboard"""
-        return self.medicine_model.get_dashboard_stats()
+        return self.medicine_model.get_dashboard_stats(compact=self.compact_rows)
     
     def search_medicines(self, search_term):
         """Search medicines with lowest prices"""
         if not search_term or len(search_term.strip()) < 2:
             return []
-        return self.medicine_model.search_lowest_price(search_term.strip())
+        return self.medicine_model.search_lowest_price(
+            search_term.strip(), compact=self.compact_rows
+        )
+    
+    def get_medicine(self, medicine_id):
+        """Get one medicine with its lowest price"""
+        return self.medicine_model.get_medicine_with_prices(medicine_id)
     
     def get_all_stockists(self):
         """Get all stockists for dropdown"""
         return self.stockist_model.get_all_stockists()
     
-    def add_new_medicine(self, medicine_data, price_data):
-        """Add new medicine with price"""
-        # Add medicine
-        medicine_id = self.medicine_model.add_medicine(medicine_data)
+    def get_all_medicines(self):
+        """Get all medicines with their lowest prices"""
+        return self.medicine_model.get_all_medicines_with_prices(compact=self.compact_rows)
+    
+    def get_medicines(self, medicine_ids):
+        """Get list rows for a few medicines, e.g. ones another seat changed"""
+        return self.medicine_model.get_medicines_with_prices(
+            medicine_ids, compact=self.compact_rows
+        )
+    
+    def poll_changes(self):
+        """Writes committed by any process since the last poll, or None"""
+        return self.change_feed.poll()
+    
+    def load_medicine_index(self, on_chunk=None):
+        """Get all medicines plus a search index built over them
         
-        # Add price
-        self.medicine_model.add_medicine_price(medicine_id, price_data)
+        Rows are read in chunks. With on_chunk each chunk is handed over
+        as soon as it is indexed and not kept, so callers can show the
+        first rows before the last ones are read; medicines is then empty.
+        """
+        # Only the medicine list needs the index; keep it out of startup imports
+        from utils.search_index import SearchIndex
+        
+        medicines = []
+        search_index = SearchIndex()
+        chunks = self.medicine_model.iter_all_medicines_with_prices(compact=self.compact_rows)
+        for chunk in chunks:
+            for medicine in chunk:
+                search_index.add(medicine)
+            if on_chunk is not None:
+                on_chunk(chunk)
+            else:
+                medicines.extend(chunk)
+        return medicines, search_index
+    
+    # ========== BACKGROUND CALLS ==========
+    # Each returns a Future; a newer call of the same kind supersedes
+    # the older one (see TaskRunner).
+    
+    def prepare_database_async(self):
+        return self.tasks.submit('database', self.prepare_database)
+    
+    def get_dashboard_stats_async(self):
+        return self.tasks.submit('dashboard_stats', self.get_dashboard_stats)
+    
+    def search_medicines_async(self, search_term):
+        return self.type_ahead.submit(search_term, debounce=0)
+    
+    def search_as_you_type(self, search_term):
+        """Debounced search for live results; resolves to None when superseded"""
+        return self.type_ahead.submit(search_term)
+    
+    def cancel_search_as_you_type(self):
+        """Drop the pending type-ahead search, so its results never arrive"""
+        self.type_ahead.cancel()
+    
+    def load_medicine_index_async(self, on_chunk=None):
+        return self.tasks.submit('all_medicines', self.load_medicine_index, on_chunk)
+    
+    def get_medicine_async(self, medicine_id):
+        # Keyed by id so adding two medicines quickly keeps both
+        return self.tasks.submit(('medicine', medicine_id), self.get_medicine, medicine_id)
+    
+    def get_all_stockists_async(self):
+        return self.tasks.submit('stockists', self.get_all_stockists)
+    
+    def get_medicines_async(self, medicine_ids):
+        return self.tasks.submit('changed_medicines', self.get_medicines, medicine_ids)
+    
+    def poll_changes_async(self):
+        return self.tasks.submit('changes', self.poll_changes)
+    
+    def is_stale(self, future):
+        """True if a newer request replaced the one behind future"""
+        return self.tasks.is_stale(future)
+    
+    def search_cache_stats(self):
+        """Hit ratio and memory of the per-term search cache"""
+        return self.medicine_model.search_cache.get_stats()
+    
+    def shutdown(self):
+        """Stop background workers"""
+        self.tasks.shutdown()
+        self.change_feed.close()
+    
+    def add_new_medicine(self, medicine_data, price_data):
+        """Add new medicine with price in one transaction"""
+        with self.medicine_model.db.transaction():
+            # Add medicine
+            medicine_id = self.medicine_model.add_medicine(medicine_data)
+            
+            # Add price
+            self.medicine_model.add_medicine_price(medicine_id, price_data)
         
         return medicine_id
     
+    def import_price_list(self, path, stockist_id=None, progress=None):
+        """Bulk-import a stockist price list file"""
+        from models.price_import import PriceImporter
+        return PriceImporter().import_file(path, stockist_id, progress)
+    
     def record_purchase(self, medicine_name, stockist_name, paid_price, lowest_price):
         """Record a purchase and calculate savings"""
         return self.medicine_model.record_purchase(
@@ -0,0 +1,97 @@
+import sqlite3
+import threading
+
+
+class TypeAheadSearch:
+    """Debounced, cancellable search-as-you-type over MedicineModel
+
+    Each keystroke supersedes the previous one: a search still waiting
+    out its debounce delay wakes up and gives up, and one already inside
+    SQLite is stopped with Connection.interrupt(). Terms that extend an
+    earlier one are refined in memory by MedicineModel.search_cache.
+    """
+
+    def __init__(self, medicine_model, tasks, debounce=0.15, min_length=2, compact=True):
+        self.medicine_model = medicine_model
+        self.tasks = tasks
+        self.debounce = debounce
+        self.min_length = min_length
+        self.compact = compact
+        self._lock = threading.Lock()
+        self._generation = 0
+        self._wake = threading.Event()
+        self._in_flight = None
+        self.stats = {
+            'submitted': 0,
+            'superseded': 0,
+            'interrupted': 0,
+            'completed': 0
+        }
+
+    def submit(self, search_term, debounce=None):
+        """Schedule a search and return its Future
+
+        The Future resolves to the result list, or to None when a newer
+        submit superseded it.
+        """
+        with self._lock:
+            generation, wake = self._supersede()
+            self.stats['submitted'] += 1
+
+        delay = self.debounce if debounce is None else debounce
+        return self.tasks.submit('search', self._run, generation, search_term.strip(), delay, wake)
+
+    def cancel(self):
+        """Supersede the pending search without starting another, e.g. when the box is cleared"""
+        with self._lock:
+            self._supersede()
+
+    def _supersede(self):
+        """Start a new generation, waking and interrupting the old one (lock must be held)"""
+        self._generation += 1
+        self._wake.set()
+        self._wake = threading.Event()
+        if self._in_flight is not None:
+            self._in_flight.interrupt()
+        return self._generation, self._wake
+
+    def _is_current(self, generation):
+        with self._lock:
+            return generation == self._generation
+
+    def _run(self, generation, term, delay, wake):
+        """Worker side of submit"""
+        if len(term) < self.min_length:
+            return []
+
+        # A newer keystroke sets wake and ends the wait early
+        if delay and wake.wait(delay) or not self._is_current(generation):
+            self.stats['superseded'] += 1
+            return None
+
+        db = self.medicine_model.db
+        try:
+            with db.get_connection() as conn:
+                with self._lock:
+                    if generation != self._generation:
+                        self.stats['superseded'] += 1
+                        return None
+                    self._in_flight = conn
+                try:
+                    results = self.medicine_model.search_lowest_price(term, compact=self.compact)
+                finally:
+                    with self._lock:
+                        if self._in_flight is conn:
+                            self._in_flight = None
+        except sqlite3.OperationalError as e:
+            if 'interrupted' not in str(e):
+                raise
+            self.stats['interrupted'] += 1
+            return None
+
+        # Superseded after SQLite finished, too late to interrupt
+        if not self._is_current(generation):
+            self.stats['superseded'] += 1
+            return None
+        self.stats['completed'] += 1
+        return results
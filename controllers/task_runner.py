@@ -0,0 +1,38 @@
+from concurrent.futures import ThreadPoolExecutor
+import threading
+
+
+class TaskRunner:
+    """Run controller calls on worker threads and return futures
+    
+    Each task has a key; submitting a new task with the same key cancels
+    the previous one if it has not started and marks it stale otherwise,
+    so callers can drop results that a newer request superseded.
+    """
+    
+    def __init__(self, max_workers=4):
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix='controller'
+        )
+        self._lock = threading.Lock()
+        self._latest = {}
+    
+    def submit(self, key, fn, *args, **kwargs):
+        """Schedule fn on a worker thread, superseding older tasks with the same key"""
+        future = self._executor.submit(fn, *args, **kwargs)
+        future.task_key = key
+        with self._lock:
+            previous = self._latest.get(key)
+            self._latest[key] = future
+        if previous is not None:
+            previous.cancel()
+        return future
+    
+    def is_stale(self, future):
+        """True if a newer task with the same key has been submitted"""
+        with self._lock:
+            return self._latest.get(future.task_key) is not future
+    
+    def shutdown(self):
+        """Stop accepting work and drop tasks that have not started"""
+        self._executor.shutdown(wait=False, cancel_futures=True)
\ No newline at end of file
@@ -0,0 +1,52 @@
+"""Bulk-import a stockist price list (CSV or Excel CSV export)
+
+Usage: python -m database.import_prices FILE [--stockist ID] [--db PATH]
+
+The database is created or migrated first, like the app does at start.
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database.init_db import DEFAULT_DB_PATH, init_database
+from models.database import Database
+from models.price_import import PriceImporter
+
+
+def print_progress(report):
+    print(f"  {report['rows']} rows, {report['rows_per_sec']} rows/sec", flush=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('file', help="price list to import")
+    parser.add_argument('--stockist', type=int, help="stockist id for rows without a stockist column")
+    parser.add_argument('--db', default=DEFAULT_DB_PATH, help="database file")
+    parser.add_argument('--chunk-size', type=int, default=5000, help="rows per transaction")
+    args = parser.parse_args(argv)
+    
+    init_database(args.db, verbose=False)
+    db = Database()
+    db.configure(db_path=args.db)
+    try:
+        importer = PriceImporter(chunk_size=args.chunk_size)
+        report = importer.import_file(args.file, args.stockist, print_progress)
+    finally:
+        db.close()
+    
+    print(f"Imported {report['prices']} prices from {report['rows']} rows "
+          f"in {report['seconds']}s ({report['rows_per_sec']} rows/sec)")
+    print(f"New medicines: {report['medicines_created']}, "
+          f"updated medicines: {report['medicines_updated']}, "
+          f"new stockists: {report['stockists_created']}")
+    if report['skipped']:
+        print(f"Skipped {report['skipped']} rows:")
+        for line, error in report['errors']:
+            print(f"  row {line}: {error}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,77 +1,72 @@
+"""Create or migrate the medicine database, optionally with sample data
+
+Usage: python -m database.init_db [--db PATH] [--seed] [--reset]
+
+Opening an existing database only applies migrations it has not seen
+(see database.migrations); nothing is deleted unless --reset is given.
+"""
+import argparse
 import sqlite3
 import os
+import sys
 from datetime import datetime, timedelta
 import random
 
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.database import apply_pragmas, DEFAULT_PROFILE, PRAGMA_PROFILES
+from database.migrations import apply_migrations
 
-def init_database():
-    """Initialize database with all tables and sample data"""
+DEFAULT_DB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'medicine_prices.db')
+
+
+def init_database(db_path=None, profile=DEFAULT_PROFILE, verbose=True, seed=False, reset=False):
+    """Create the database or bring its schema up to date
+    
+    An up-to-date database costs one PRAGMA read. With seed, sample
+    stockists, medicines, prices and purchases are added when the
+    database has no medicines yet; with reset the file is deleted first.
+    """
     
-    db_path = os.path.join(os.path.dirname(__file__), 'medicine_prices.db')
+    db_path = db_path or DEFAULT_DB_PATH
     
-    # Remove existing database if you want fresh start
-    if os.path.exists(db_path):
-        os.remove(db_path)
+    if reset:
+        for path in (db_path, db_path + '-wal', db_path + '-shm'):
+            if os.path.exists(path):
+                os.remove(path)
     
     conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
-    
-    # ========== CREATE TABLES ==========
-    
-    # Stockists table
-    cursor.execute('''
-        CREATE TABLE stockists (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            name TEXT NOT NULL,
-            contact TEXT,
-            address TEXT,
-            gst_no TEXT,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    ''')
-    
-    # Medicines table
-    cursor.execute('''
-        CREATE TABLE medicines (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            medicine_name TEXT NOT NULL,
-            company_name TEXT NOT NULL,
-            generic_name TEXT,
-            category TEXT,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    ''')
-    
-    # Medicine Prices table
-    cursor.execute('''
-        CREATE TABLE medicine_prices (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            medicine_id INTEGER NOT NULL,
-            stockist_id INTEGER NOT NULL,
-            net_rate REAL NOT NULL,
-            mrp REAL NOT NULL,
-            discount_percent REAL DEFAULT 0,
-            final_price REAL NOT NULL,
-            paid_status TEXT DEFAULT 'Unpaid',
-            paid_amount REAL DEFAULT 0,
-            purchase_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (medicine_id) REFERENCES medicines (id) ON DELETE CASCADE,
-            FOREIGN KEY (stockist_id) REFERENCES stockists (id) ON DELETE CASCADE
-        )
-    ''')
-    
-    # Purchases/Savings tracking table
-    cursor.execute('''
-        CREATE TABLE purchases (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            medicine_name TEXT NOT NULL,
-            selected_stockist TEXT NOT NULL,
-            selected_price REAL NOT NULL,
-            lowest_price REAL NOT NULL,
-            savings REAL NOT NULL,
-            purchase_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    ''')
+    try:
+        apply_pragmas(conn, profile)
+        old_version, version = apply_migrations(conn)
+        
+        seeded = None
+        if seed and conn.execute("SELECT COUNT(*) FROM medicines").fetchone()[0] == 0:
+            seeded = insert_sample_data(conn.cursor())
+            conn.commit()
+    finally:
+        conn.close()
+    
+    if verbose:
+        print("=" * 50)
+        print("✅ Database ready!")
+        print(f"📁 Location: {db_path}")
+        if version != old_version:
+            print(f"🔧 Schema migrated: version {old_version} -> {version}")
+        else:
+            print(f"🔧 Schema up to date: version {version}")
+        if seeded:
+            stockists, medicines_data = seeded
+            print(f"🏢 Stockists added: {len(stockists)}")
+            print(f"💊 Medicines added: {len(medicines_data)}")
+        print("=" * 50)
+    
+    return version
+
+
+def insert_sample_data(cursor):
+    """Insert sample stockists, medicines, prices and purchases"""
     
     # ========== INSERT SAMPLE DATA ==========
     
@@ -205,17 +200,22 @@ def init_database():
                 purchase_date.strftime('%Y-%m-%d %H:%M:%S')
             ))
     
-    conn.commit()
-    conn.close()
-    
-    print("=" * 50)
-    print("✅ Database initialized successfully!")
-    print(f"📁 Location: {db_path}")
-    print(f"📊 Tables created: stockists, medicines, medicine_prices, purchases")
-    print(f"🏢 Stockists added: {len(stockists)}")
-    print(f"💊 Medicines added: {len(medicines_data)}")
-    print("=" * 50)
+    return stockists, medicines_data
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--db', default=DEFAULT_DB_PATH, help="database file")
+    parser.add_argument('--profile', default=DEFAULT_PROFILE, choices=sorted(PRAGMA_PROFILES),
+                        help="PRAGMA profile")
+    parser.add_argument('--seed', action='store_true',
+                        help="add sample data if the database has no medicines")
+    parser.add_argument('--reset', action='store_true',
+                        help="delete the database first (all data is lost)")
+    args = parser.parse_args(argv)
+    
+    init_database(args.db, profile=args.profile, seed=args.seed, reset=args.reset)
 
 
 if __name__ == '__main__':
-    init_database()
\ No newline at end of file
+    main()
\ No newline at end of file
@@ -0,0 +1,654 @@
+"""Versioned schema migrations
+
+PRAGMA user_version holds the number of MIGRATIONS a database has
+applied. Opening an up-to-date database reads that one header field and
+runs nothing; an older one runs only the migrations after its version.
+"""
+import sqlite3
+from contextlib import contextmanager
+
+# The original tables; kept as IF NOT EXISTS so databases created before
+# versioning (user_version 0) migrate in place
+BASE_TABLES = [
+    '''
+    CREATE TABLE IF NOT EXISTS stockists (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT NOT NULL,
+        contact TEXT,
+        address TEXT,
+        gst_no TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS medicines (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        medicine_name TEXT NOT NULL,
+        company_name TEXT NOT NULL,
+        generic_name TEXT,
+        category TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS medicine_prices (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        medicine_id INTEGER NOT NULL,
+        stockist_id INTEGER NOT NULL,
+        net_rate REAL NOT NULL,
+        mrp REAL NOT NULL,
+        discount_percent REAL DEFAULT 0,
+        final_price REAL NOT NULL,
+        paid_status TEXT DEFAULT 'Unpaid',
+        paid_amount REAL DEFAULT 0,
+        purchase_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (medicine_id) REFERENCES medicines (id) ON DELETE CASCADE,
+        FOREIGN KEY (stockist_id) REFERENCES stockists (id) ON DELETE CASCADE
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS purchases (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        medicine_name TEXT NOT NULL,
+        selected_stockist TEXT NOT NULL,
+        selected_price REAL NOT NULL,
+        lowest_price REAL NOT NULL,
+        savings REAL NOT NULL,
+        purchase_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    '''
+]
+
+# Rebuild the dashboard summary rows from the base tables
+COUNTER_RECOMPUTE = [
+    "DELETE FROM medicine_name_counts",
+    '''
+    INSERT INTO medicine_name_counts (medicine_name, refs)
+    SELECT medicine_name, COUNT(*) FROM medicines GROUP BY medicine_name
+    ''',
+    '''
+    INSERT OR REPLACE INTO stats_counters (name, value) VALUES
+        ('medicine_names', (SELECT COUNT(*) FROM medicine_name_counts)),
+        ('stockists', (SELECT COUNT(*) FROM stockists)),
+        ('purchases', (SELECT COUNT(*) FROM purchases)),
+        ('total_savings', (SELECT COALESCE(SUM(savings), 0) FROM purchases))
+    '''
+]
+
+# Rebuild medicine_best_price from medicine_prices; ties go to the older quote
+BEST_PRICE_RECOMPUTE = [
+    "DELETE FROM medicine_best_price",
+    '''
+    INSERT INTO medicine_best_price
+        (medicine_id, price_id, stockist_id, final_price, mrp, discount_percent,
+         purchase_date, stockist_count)
+    SELECT c.medicine_id, mp.id, mp.stockist_id, mp.final_price, mp.mrp,
+           mp.discount_percent, mp.purchase_date, c.stockist_count
+    FROM (
+        SELECT medicine_id, COUNT(DISTINCT stockist_id) as stockist_count
+        FROM medicine_prices GROUP BY medicine_id
+    ) c
+    JOIN medicine_prices mp ON mp.id = (
+        SELECT id FROM medicine_prices
+        WHERE medicine_id = c.medicine_id
+        ORDER BY final_price ASC, id ASC
+        LIMIT 1
+    )
+    '''
+]
+
+
+def _best_price_refresh(medicine_id):
+    """Trigger body that recomputes the best-price row of one medicine"""
+    return f'''
+            INSERT OR REPLACE INTO medicine_best_price
+                (medicine_id, price_id, stockist_id, final_price, mrp, discount_percent,
+                 purchase_date, stockist_count)
+            SELECT medicine_id, id, stockist_id, final_price, mrp, discount_percent,
+                   purchase_date,
+                   (SELECT COUNT(DISTINCT stockist_id) FROM medicine_prices
+                    WHERE medicine_id = {medicine_id})
+            FROM medicine_prices
+            WHERE medicine_id = {medicine_id}
+            ORDER BY final_price ASC, id ASC
+            LIMIT 1;
+            DELETE FROM medicine_best_price
+            WHERE medicine_id = {medicine_id}
+              AND NOT EXISTS (SELECT 1 FROM medicine_prices WHERE medicine_id = {medicine_id});'''
+
+
+# Tables whose writes other processes need to hear about, and the
+# medicine each row belongs to (None when it has none)
+CHANGE_LOG_TABLES = {
+    'medicines': 'id',
+    'medicine_prices': 'medicine_id',
+    'stockists': None,
+    'purchases': None
+}
+
+
+def _change_log_triggers():
+    """One trigger per table and operation appending to change_log"""
+    statements = []
+    for table, medicine_column in CHANGE_LOG_TABLES.items():
+        for op, event, row in (('I', 'INSERT', 'new'), ('U', 'UPDATE', 'new'), ('D', 'DELETE', 'old')):
+            medicine_id = f"{row}.{medicine_column}" if medicine_column else "NULL"
+            moved = ''
+            if op == 'U' and medicine_column and medicine_column != 'id':
+                # A row moved to another medicine changes the old one too
+                moved = f'''
+            INSERT INTO change_log (table_name, row_id, medicine_id, op)
+            SELECT '{table}', old.id, old.{medicine_column}, 'U'
+            WHERE old.{medicine_column} IS NOT new.{medicine_column};'''
+            statements.append(f'''
+        CREATE TRIGGER IF NOT EXISTS change_log_{table}_{event.lower()} AFTER {event} ON {table} BEGIN
+            INSERT INTO change_log (table_name, row_id, medicine_id, op)
+            VALUES ('{table}', {row}.id, {medicine_id}, '{op}');{moved}
+        END
+        ''')
+    return statements
+
+
+# Price history rollups: table -> (bucket column, bucket of a purchase_date
+# expression, first timestamp after the bucket). Weeks run Monday to Sunday.
+PRICE_ROLLUPS = {
+    'price_history_daily': (
+        'day',
+        lambda ts: f"date({ts})",
+        lambda bucket: f"date({bucket}, '+1 day')"
+    ),
+    'price_history_weekly': (
+        'week_start',
+        lambda ts: f"date({ts}, 'weekday 0', '-6 days')",
+        lambda bucket: f"date({bucket}, '+7 days')"
+    )
+}
+
+ROLLUP_COLUMNS = '''medicine_id, stockist_id, {bucket}, min_price, max_price, sum_price, quotes,
+                 min_mrp, min_discount, last_price, last_at'''
+
+
+def _rollup_select(table, where='1'):
+    """SELECT producing rollup rows of table from the medicine_prices rows matching where
+
+    min_mrp/min_discount belong to the cheapest quote and last_price to
+    the latest one; ties go to the older row.
+    """
+    bucket, bucket_of, _ = PRICE_ROLLUPS[table]
+    return f'''
+            SELECT medicine_id, stockist_id, bucket,
+                   MIN(final_price), MAX(final_price), SUM(final_price), COUNT(*),
+                   MAX(CASE WHEN cheapest = 1 THEN mrp END),
+                   MAX(CASE WHEN cheapest = 1 THEN discount_percent END),
+                   MAX(CASE WHEN latest = 1 THEN final_price END),
+                   MAX(purchase_date)
+            FROM (
+                SELECT medicine_id, stockist_id, final_price, mrp, discount_percent,
+                       purchase_date, {bucket_of('purchase_date')} as bucket,
+                       ROW_NUMBER() OVER (
+                           PARTITION BY medicine_id, stockist_id, {bucket_of('purchase_date')}
+                           ORDER BY final_price ASC, id ASC
+                       ) as cheapest,
+                       ROW_NUMBER() OVER (
+                           PARTITION BY medicine_id, stockist_id, {bucket_of('purchase_date')}
+                           ORDER BY purchase_date DESC, id DESC
+                       ) as latest
+                FROM medicine_prices
+                WHERE ({where}) AND date(purchase_date) IS NOT NULL
+            )
+            GROUP BY medicine_id, stockist_id, bucket'''
+
+
+def _rollup_recompute():
+    """Rebuild every rollup table from medicine_prices"""
+    statements = []
+    for table, (bucket, _, _) in PRICE_ROLLUPS.items():
+        statements.append(f"DELETE FROM {table}")
+        statements.append(
+            f"INSERT INTO {table} ({ROLLUP_COLUMNS.format(bucket=bucket)})"
+            + _rollup_select(table)
+        )
+    return statements
+
+
+def _rollup_refresh(table, row):
+    """Trigger body that recomputes the bucket of one old/new price row"""
+    bucket, bucket_of, bucket_end = PRICE_ROLLUPS[table]
+    start = bucket_of(f"{row}.purchase_date")
+    # Range on purchase_date so idx_medicine_prices_stockist_date is used
+    where = (f"stockist_id = {row}.stockist_id AND medicine_id = {row}.medicine_id "
+             f"AND purchase_date >= {start} AND purchase_date < {bucket_end(start)}")
+    return f'''
+            DELETE FROM {table}
+            WHERE medicine_id = {row}.medicine_id AND stockist_id = {row}.stockist_id
+              AND {bucket} = {start};
+            INSERT INTO {table} ({ROLLUP_COLUMNS.format(bucket=bucket)}){_rollup_select(table, where)};'''
+
+
+def _rollup_insert_trigger(table):
+    """Trigger folding a new price row into its bucket of table
+
+    Rows whose purchase_date SQLite cannot parse have no bucket and are
+    left out of the rollups instead of failing the insert.
+    """
+    bucket, bucket_of, _ = PRICE_ROLLUPS[table]
+    return f'''
+        CREATE TRIGGER IF NOT EXISTS {table}_insert AFTER INSERT ON medicine_prices
+        WHEN date(new.purchase_date) IS NOT NULL BEGIN
+            INSERT INTO {table} ({ROLLUP_COLUMNS.format(bucket=bucket)})
+            VALUES (new.medicine_id, new.stockist_id, {bucket_of('new.purchase_date')},
+                    new.final_price, new.final_price, new.final_price, 1,
+                    new.mrp, new.discount_percent, new.final_price, new.purchase_date)
+            ON CONFLICT (medicine_id, stockist_id, {bucket}) DO UPDATE SET
+                min_mrp = CASE WHEN excluded.min_price < min_price
+                               THEN excluded.min_mrp ELSE min_mrp END,
+                min_discount = CASE WHEN excluded.min_price < min_price
+                                    THEN excluded.min_discount ELSE min_discount END,
+                min_price = MIN(min_price, excluded.min_price),
+                max_price = MAX(max_price, excluded.max_price),
+                sum_price = sum_price + excluded.sum_price,
+                quotes = quotes + 1,
+                last_price = CASE WHEN excluded.last_at >= last_at
+                                  THEN excluded.last_price ELSE last_price END,
+                last_at = MAX(last_at, excluded.last_at);
+        END
+        '''
+
+
+def _rollup_statements():
+    """Tables, indexes, backfill and triggers of the price history rollups"""
+    statements = []
+    for table, (bucket, bucket_of, _) in PRICE_ROLLUPS.items():
+        statements += [
+            f'''
+        CREATE TABLE IF NOT EXISTS {table} (
+            medicine_id INTEGER NOT NULL,
+            stockist_id INTEGER NOT NULL,
+            {bucket} TEXT NOT NULL,
+            min_price REAL NOT NULL,
+            max_price REAL NOT NULL,
+            sum_price REAL NOT NULL,
+            quotes INTEGER NOT NULL,
+            min_mrp REAL,
+            min_discount REAL,
+            last_price REAL NOT NULL,
+            last_at TIMESTAMP,
+            PRIMARY KEY (medicine_id, stockist_id, {bucket})
+        ) WITHOUT ROWID
+        ''',
+            f'''
+        CREATE INDEX IF NOT EXISTS idx_{table}_bucket
+        ON {table} ({bucket}, medicine_id, min_price)
+        '''
+        ]
+    statements += _rollup_recompute()
+    for table in PRICE_ROLLUPS:
+        statements += [
+            _rollup_insert_trigger(table),
+            f'''
+        CREATE TRIGGER IF NOT EXISTS {table}_delete AFTER DELETE ON medicine_prices BEGIN{_rollup_refresh(table, 'old')}
+        END
+        ''',
+            f'''
+        CREATE TRIGGER IF NOT EXISTS {table}_update
+        AFTER UPDATE OF medicine_id, stockist_id, final_price, mrp, discount_percent, purchase_date
+        ON medicine_prices BEGIN{_rollup_refresh(table, 'old')}{_rollup_refresh(table, 'new')}
+        END
+        '''
+        ]
+    return statements
+
+
+
+# Applied in order and never reordered or removed; append new ones at the end
+MIGRATIONS = [
+    ('base_tables', BASE_TABLES),
+    
+    # Covering indexes for the lowest-price, stockist and dashboard queries
+    ('price_lookup_indexes', [
+        '''
+        CREATE INDEX IF NOT EXISTS idx_medicine_prices_medicine_price
+        ON medicine_prices (medicine_id, final_price, stockist_id, mrp,
+                            discount_percent, net_rate, purchase_date)
+        ''',
+        '''
+        CREATE INDEX IF NOT EXISTS idx_medicine_prices_stockist_date
+        ON medicine_prices (stockist_id, purchase_date, medicine_id, net_rate,
+                            mrp, discount_percent, final_price)
+        ''',
+        '''
+        CREATE INDEX IF NOT EXISTS idx_medicine_prices_purchase_day
+        ON medicine_prices (date(purchase_date), medicine_id, final_price)
+        ''',
+        '''
+        CREATE INDEX IF NOT EXISTS idx_medicines_name
+        ON medicines (medicine_name, company_name)
+        ''',
+        '''
+        CREATE INDEX IF NOT EXISTS idx_medicines_created_at
+        ON medicines (created_at)
+        ''',
+        '''
+        CREATE INDEX IF NOT EXISTS idx_stockists_name
+        ON stockists (name)
+        '''
+    ]),
+    
+    # Full-text search over medicines: trigram for substrings, unicode61
+    # with prefix indexes for one- and two-letter type-ahead
+    ('medicine_search_fts', [
+        '''
+        CREATE VIRTUAL TABLE IF NOT EXISTS medicines_fts USING fts5(
+            medicine_name, generic_name, company_name,
+            content='medicines', content_rowid='id',
+            tokenize='trigram'
+        )
+        ''',
+        '''
+        CREATE VIRTUAL TABLE IF NOT EXISTS medicines_prefix_fts USING fts5(
+            medicine_name, generic_name, company_name,
+            content='medicines', content_rowid='id',
+            prefix='1 2'
+        )
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS medicines_fts_insert AFTER INSERT ON medicines BEGIN
+            INSERT INTO medicines_fts (rowid, medicine_name, generic_name, company_name)
+            VALUES (new.id, new.medicine_name, new.generic_name, new.company_name);
+            INSERT INTO medicines_prefix_fts (rowid, medicine_name, generic_name, company_name)
+            VALUES (new.id, new.medicine_name, new.generic_name, new.company_name);
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS medicines_fts_delete AFTER DELETE ON medicines BEGIN
+            INSERT INTO medicines_fts (medicines_fts, rowid, medicine_name, generic_name, company_name)
+            VALUES ('delete', old.id, old.medicine_name, old.generic_name, old.company_name);
+            INSERT INTO medicines_prefix_fts (medicines_prefix_fts, rowid, medicine_name, generic_name, company_name)
+            VALUES ('delete', old.id, old.medicine_name, old.generic_name, old.company_name);
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS medicines_fts_update AFTER UPDATE ON medicines BEGIN
+            INSERT INTO medicines_fts (medicines_fts, rowid, medicine_name, generic_name, company_name)
+            VALUES ('delete', old.id, old.medicine_name, old.generic_name, old.company_name);
+            INSERT INTO medicines_prefix_fts (medicines_prefix_fts, rowid, medicine_name, generic_name, company_name)
+            VALUES ('delete', old.id, old.medicine_name, old.generic_name, old.company_name);
+            INSERT INTO medicines_fts (rowid, medicine_name, generic_name, company_name)
+            VALUES (new.id, new.medicine_name, new.generic_name, new.company_name);
+            INSERT INTO medicines_prefix_fts (rowid, medicine_name, generic_name, company_name)
+            VALUES (new.id, new.medicine_name, new.generic_name, new.company_name);
+        END
+        ''',
+        "INSERT INTO medicines_fts (medicines_fts) VALUES ('rebuild')",
+        "INSERT INTO medicines_prefix_fts (medicines_prefix_fts) VALUES ('rebuild')"
+    ]),
+    
+    # Dashboard counters kept by triggers so the home screen does not
+    # aggregate whole tables; backfilled from the current rows
+    ('dashboard_counters', [
+        '''
+        CREATE TABLE IF NOT EXISTS stats_counters (
+            name TEXT PRIMARY KEY,
+            value REAL NOT NULL DEFAULT 0
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS medicine_name_counts (
+            medicine_name TEXT PRIMARY KEY,
+            refs INTEGER NOT NULL
+        )
+        ''',
+        *COUNTER_RECOMPUTE,
+        '''
+        CREATE TRIGGER IF NOT EXISTS stats_medicines_insert AFTER INSERT ON medicines BEGIN
+            UPDATE stats_counters SET value = value + 1
+            WHERE name = 'medicine_names'
+              AND NOT EXISTS (SELECT 1 FROM medicine_name_counts WHERE medicine_name = new.medicine_name);
+            INSERT INTO medicine_name_counts (medicine_name, refs) VALUES (new.medicine_name, 1)
+            ON CONFLICT (medicine_name) DO UPDATE SET refs = refs + 1;
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS stats_stockists_insert AFTER INSERT ON stockists BEGIN
+            UPDATE stats_counters SET value = value + 1 WHERE name = 'stockists';
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS stats_purchases_insert AFTER INSERT ON purchases BEGIN
+            UPDATE stats_counters SET value = value + 1 WHERE name = 'purchases';
+            UPDATE stats_counters SET value = value + new.savings WHERE name = 'total_savings';
+        END
+        '''
+    ]),
+    
+    # Keep the dashboard counters exact when rows are updated or deleted
+    ('dashboard_counter_maintenance', [
+        '''
+        CREATE TRIGGER IF NOT EXISTS stats_medicines_delete AFTER DELETE ON medicines BEGIN
+            UPDATE medicine_name_counts SET refs = refs - 1 WHERE medicine_name = old.medicine_name;
+            UPDATE stats_counters SET value = value - 1
+            WHERE name = 'medicine_names'
+              AND EXISTS (SELECT 1 FROM medicine_name_counts
+                          WHERE medicine_name = old.medicine_name AND refs <= 0);
+            DELETE FROM medicine_name_counts WHERE medicine_name = old.medicine_name AND refs <= 0;
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS stats_medicines_rename AFTER UPDATE OF medicine_name ON medicines
+        WHEN old.medicine_name IS NOT new.medicine_name BEGIN
+            UPDATE medicine_name_counts SET refs = refs - 1 WHERE medicine_name = old.medicine_name;
+            UPDATE stats_counters SET value = value - 1
+            WHERE name = 'medicine_names'
+              AND EXISTS (SELECT 1 FROM medicine_name_counts
+                          WHERE medicine_name = old.medicine_name AND refs <= 0);
+            DELETE FROM medicine_name_counts WHERE medicine_name = old.medicine_name AND refs <= 0;
+            UPDATE stats_counters SET value = value + 1
+            WHERE name = 'medicine_names'
+              AND NOT EXISTS (SELECT 1 FROM medicine_name_counts WHERE medicine_name = new.medicine_name);
+            INSERT INTO medicine_name_counts (medicine_name, refs) VALUES (new.medicine_name, 1)
+            ON CONFLICT (medicine_name) DO UPDATE SET refs = refs + 1;
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS stats_stockists_delete AFTER DELETE ON stockists BEGIN
+            UPDATE stats_counters SET value = value - 1 WHERE name = 'stockists';
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS stats_purchases_delete AFTER DELETE ON purchases BEGIN
+            UPDATE stats_counters SET value = value - 1 WHERE name = 'purchases';
+            UPDATE stats_counters SET value = value - old.savings WHERE name = 'total_savings';
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS stats_purchases_update AFTER UPDATE OF savings ON purchases BEGIN
+            UPDATE stats_counters SET value = value - old.savings + new.savings
+            WHERE name = 'total_savings';
+        END
+        '''
+    ]),
+    
+    # Cheapest current quote per medicine; inserts update it in place,
+    # deletes and edits recompute the one medicine they touch
+    ('medicine_best_price', [
+        '''
+        CREATE TABLE IF NOT EXISTS medicine_best_price (
+            medicine_id INTEGER PRIMARY KEY,
+            price_id INTEGER NOT NULL,
+            stockist_id INTEGER NOT NULL,
+            final_price REAL NOT NULL,
+            mrp REAL NOT NULL,
+            discount_percent REAL DEFAULT 0,
+            purchase_date TIMESTAMP,
+            stockist_count INTEGER NOT NULL DEFAULT 1
+        )
+        ''',
+        '''
+        CREATE INDEX IF NOT EXISTS idx_medicine_best_price_day
+        ON medicine_best_price (date(purchase_date), final_price)
+        ''',
+        *BEST_PRICE_RECOMPUTE,
+        '''
+        CREATE TRIGGER IF NOT EXISTS best_price_insert AFTER INSERT ON medicine_prices BEGIN
+            INSERT INTO medicine_best_price
+                (medicine_id, price_id, stockist_id, final_price, mrp, discount_percent,
+                 purchase_date, stockist_count)
+            VALUES (new.medicine_id, new.id, new.stockist_id, new.final_price, new.mrp,
+                    new.discount_percent, new.purchase_date, 1)
+            ON CONFLICT (medicine_id) DO UPDATE SET
+                stockist_count = stockist_count + (NOT EXISTS (
+                    SELECT 1 FROM medicine_prices
+                    WHERE medicine_id = new.medicine_id
+                      AND stockist_id = new.stockist_id
+                      AND id <> new.id
+                )),
+                price_id = CASE WHEN excluded.final_price < final_price
+                                THEN excluded.price_id ELSE price_id END,
+                stockist_id = CASE WHEN excluded.final_price < final_price
+                                   THEN excluded.stockist_id ELSE stockist_id END,
+                mrp = CASE WHEN excluded.final_price < final_price
+                           THEN excluded.mrp ELSE mrp END,
+                discount_percent = CASE WHEN excluded.final_price < final_price
+                                        THEN excluded.discount_percent ELSE discount_percent END,
+                purchase_date = CASE WHEN excluded.final_price < final_price
+                                     THEN excluded.purchase_date ELSE purchase_date END,
+                final_price = MIN(excluded.final_price, final_price);
+        END
+        ''',
+        f'''
+        CREATE TRIGGER IF NOT EXISTS best_price_delete AFTER DELETE ON medicine_prices BEGIN{_best_price_refresh('old.medicine_id')}
+        END
+        ''',
+        f'''
+        CREATE TRIGGER IF NOT EXISTS best_price_update
+        AFTER UPDATE OF medicine_id, stockist_id, final_price, mrp, discount_percent, purchase_date
+        ON medicine_prices BEGIN{_best_price_refresh('old.medicine_id')}{_best_price_refresh('new.medicine_id')}
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS best_price_medicine_delete AFTER DELETE ON medicines BEGIN
+            DELETE FROM medicine_best_price WHERE medicine_id = old.id;
+        END
+        '''
+    ]),
+    
+    # Append-only log of committed writes so other processes sharing the
+    # file can pick up just the rows that changed (see models.change_feed)
+    ('change_log', [
+        '''
+        CREATE TABLE IF NOT EXISTS change_log (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            table_name TEXT NOT NULL,
+            row_id INTEGER NOT NULL,
+            medicine_id INTEGER,
+            op TEXT NOT NULL,
+            changed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        ''',
+        *_change_log_triggers()
+    ]),
+    
+    # Daily and weekly min/max/avg/last price per medicine and stockist,
+    # updated in place on insert and recomputed per bucket on edits
+    ('price_history_rollups', _rollup_statements()),
+    
+    # Databases migrated before the guard failed every insert whose
+    # purchase_date is not a date; recreate their insert triggers
+    ('price_history_rollup_date_guard', [
+        statement
+        for table in PRICE_ROLLUPS
+        for statement in (f"DROP TRIGGER IF EXISTS {table}_insert", _rollup_insert_trigger(table))
+    ]),
+    
+    # Best deals read price_history_daily now, so no query filters on
+    # date(purchase_date) and these only slowed down every price write
+    ('drop_purchase_day_indexes', [
+        "DROP INDEX IF EXISTS idx_medicine_prices_purchase_day",
+        "DROP INDEX IF EXISTS idx_medicine_best_price_day"
+    ])
+]
+
+# Migrations that need SQLite extensions; skipped when the build lacks them
+OPTIONAL_MIGRATIONS = {'medicine_search_fts'}
+
+
+SCHEMA_VERSION = len(MIGRATIONS)
+
+
+def schema_version(conn):
+    """Number of migrations the database has applied"""
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def _run_migration(conn, name, statements):
+    """Run one migration inside the caller's transaction"""
+    try:
+        conn.execute("SAVEPOINT migration")
+        for statement in statements:
+            conn.execute(statement)
+        conn.execute("RELEASE migration")
+    except sqlite3.OperationalError as e:
+        if name not in OPTIONAL_MIGRATIONS or 'no such module' not in str(e):
+            raise
+        # Recorded as applied; the app checks for the tables it creates
+        conn.execute("ROLLBACK TO migration")
+        conn.execute("RELEASE migration")
+
+
+def apply_migrations(conn):
+    """Apply the migrations the database has not seen yet; return (old, new) version
+    
+    Each migration and its user_version bump commit together under
+    BEGIN IMMEDIATE, so an interrupted run resumes at the failed
+    migration and two processes opening the same file never both
+    apply one. A database from a newer release is left untouched.
+    """
+    conn.commit()
+    start = schema_version(conn)
+    version = start
+    while version < SCHEMA_VERSION:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # Another process may have migrated while we waited for the lock
+            version = schema_version(conn)
+            if version >= SCHEMA_VERSION:
+                conn.rollback()
+                break
+            _run_migration(conn, *MIGRATIONS[version])
+            version += 1
+            conn.execute(f"PRAGMA user_version = {version}")
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+    return start, version
+
+
+@contextmanager
+def triggers_suspended(conn):
+    """Bulk-load the base tables without per-row trigger and index work
+    
+    Triggers and idx_* indexes are dropped for the duration of the block.
+    Afterwards every migration runs again, which recreates them and
+    recomputes the counters, best prices, rollups and search index from
+    the loaded rows. change_log gets no rows for the load.
+    """
+    conn.commit()
+    with conn:
+        for kind, name in conn.execute("""
+            SELECT type, name FROM sqlite_master
+            WHERE type = 'trigger' OR (type = 'index' AND name LIKE 'idx\\_%' ESCAPE '\\')
+        """).fetchall():
+            conn.execute(f"DROP {kind.upper()} IF EXISTS {name}")
+    try:
+        yield conn
+    finally:
+        conn.commit()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            for name, statements in MIGRATIONS:
+                _run_migration(conn, name, statements)
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
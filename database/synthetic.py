@@ -0,0 +1,368 @@
+"""Generate a large, deterministic synthetic catalogue for load testing
+
+Usage: python -m database.synthetic --db PATH [--medicines 100000] [--stockists 2000]
+                                    [--prices 1000000] [--purchases 100000] [--seed 42]
+
+The same arguments (seed and end date included) always produce the same
+rows. Popularity is Zipfian: a few medicines and stockists carry most of
+the price quotes and purchases. Base prices are log-normal, each stockist
+has its own markup, and quotes are spread over --days, denser near the end.
+"""
+import argparse
+import math
+import os
+import random
+import sqlite3
+import sys
+import time
+from array import array
+from bisect import bisect
+from datetime import date, datetime, timedelta
+from itertools import accumulate
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database.init_db import init_database
+from database.migrations import triggers_suspended
+from models.database import apply_pragmas
+
+# Bump when the generated rows change, so cached fixtures are rebuilt
+GENERATOR_VERSION = 1
+
+STEMS = [
+    'Paracetamol', 'Amoxicillin', 'Omeprazole', 'Metformin', 'Amlodipine', 'Azithromycin',
+    'Cetirizine', 'Cholecalciferol', 'Calcium Carbonate', 'Aspirin', 'Atorvastatin',
+    'Levothyroxine', 'Pantoprazole', 'Losartan', 'Gabapentin', 'Diclofenac', 'Insulin',
+    'Ibuprofen', 'Ciprofloxacin', 'Doxycycline', 'Montelukast', 'Rosuvastatin', 'Telmisartan',
+    'Glimepiride', 'Sitagliptin', 'Clopidogrel', 'Ranitidine', 'Domperidone', 'Ondansetron',
+    'Levocetirizine', 'Fexofenadine', 'Prednisolone', 'Methylcobalamin', 'Folic Acid',
+    'Ferrous Sulphate', 'Multivitamin', 'Vitamin B Complex', 'Salbutamol', 'Budesonide',
+    'Esomeprazole', 'Rabeprazole', 'Cefixime', 'Cefuroxime', 'Linezolid', 'Fluconazole',
+    'Terbinafine', 'Acyclovir', 'Metronidazole', 'Tramadol', 'Aceclofenac', 'Nimesulide',
+    'Escitalopram', 'Sertraline', 'Alprazolam', 'Clonazepam', 'Propranolol', 'Metoprolol',
+    'Bisoprolol', 'Furosemide', 'Spironolactone', 'Hydrochlorothiazide', 'Warfarin',
+    'Enoxaparin', 'Vildagliptin', 'Dapagliflozin', 'Empagliflozin', 'Pioglitazone'
+]
+
+FORMS = ['Tablet', 'Capsule', 'Syrup', 'Injection', 'Gel', 'Drops', 'Suspension', 'SR Tablet']
+STRENGTHS = ['2.5mg', '5mg', '10mg', '20mg', '25mg', '40mg', '50mg', '100mg', '250mg',
+             '500mg', '650mg', '1g', '5ml', '10ml', '100ml']
+CATEGORIES = ['Analgesic', 'Antibiotic', 'Antacid', 'Antidiabetic', 'Antihypertensive',
+              'Antihistamine', 'Vitamin', 'Supplement', 'Cholesterol', 'Thyroid', 'Respiratory',
+              'Antifungal', 'Antiviral', 'Psychiatric', 'Cardiac', 'Anticoagulant']
+COMPANY_WORDS = ['Cipla', 'Lupin', 'Torrent', 'Alkem', 'Zydus', 'Mankind', 'Intas', 'Glenmark',
+                 'Aristo', 'Micro', 'Ajanta', 'Ipca', 'Emcure', 'Macleods', 'Abbott', 'Sun']
+CITIES = ['Mumbai, Maharashtra', 'Delhi, NCR', 'Bangalore, Karnataka', 'Chennai, Tamil Nadu',
+          'Kolkata, West Bengal', 'Pune, Maharashtra', 'Hyderabad, Telangana',
+          'Ahmedabad, Gujarat', 'Jaipur, Rajasthan', 'Lucknow, UP', 'Indore, MP', 'Nagpur, Maharashtra']
+
+
+def zipf_cum_weights(n, exponent):
+    """Cumulative Zipf weights for ranks 1..n, for random.choices(cum_weights=...)"""
+    return list(accumulate(1.0 / (rank ** exponent) for rank in range(1, n + 1)))
+
+
+class ZipfSampler:
+    """Draw ids 1..n with Zipfian popularity
+
+    Popularity ranks are shuffled over the ids, so popular medicines are
+    not simply the first ones inserted.
+    """
+
+    def __init__(self, rng, n, exponent):
+        if n < 1:
+            raise ValueError(f"ZipfSampler needs at least one id, got n={n}")
+        if exponent < 0:
+            raise ValueError(f"Zipf exponent must not be negative, got {exponent}")
+        self.rng = rng
+        self.cum_weights = zipf_cum_weights(n, exponent)
+        self.total = self.cum_weights[-1]
+        self.ids = list(range(1, n + 1))
+        rng.shuffle(self.ids)
+
+    def sample(self):
+        return self.ids[bisect(self.cum_weights, self.rng.random() * self.total)]
+
+
+class CatalogueGenerator:
+    """Write a synthetic catalogue into an empty database with bulk inserts
+
+    Rows go in with executemany, batch_size rows per transaction, while
+    triggers and secondary indexes are suspended; the derived tables are
+    rebuilt once at the end (see migrations.triggers_suspended).
+    """
+
+    def __init__(self, medicines=100000, stockists=2000, prices=1000000, purchases=100000,
+                 days=365, seed=42, end=None, medicine_skew=1.1, stockist_skew=0.8,
+                 batch_size=50000):
+        for name, value, minimum in (('medicines', medicines, 1), ('stockists', stockists, 1),
+                                     ('prices', prices, 0), ('purchases', purchases, 0),
+                                     ('days', days, 1), ('batch_size', batch_size, 1)):
+            if value < minimum:
+                raise ValueError(f"{name} must be at least {minimum}, got {value}")
+        self.medicines = medicines
+        self.stockists = stockists
+        self.prices = prices
+        self.purchases = purchases
+        self.days = days
+        self.seed = seed
+        self.end = end or date.today()
+        self.medicine_skew = medicine_skew
+        self.stockist_skew = stockist_skew
+        self.batch_size = batch_size
+
+    def spec(self):
+        """Everything the generated rows depend on"""
+        return {
+            'version': GENERATOR_VERSION,
+            'medicines': self.medicines,
+            'stockists': self.stockists,
+            'prices': self.prices,
+            'purchases': self.purchases,
+            'days': self.days,
+            'seed': self.seed,
+            'end': self.end.isoformat(),
+            'medicine_skew': self.medicine_skew,
+            'stockist_skew': self.stockist_skew
+        }
+
+    def generate(self, db_path, progress=None):
+        """Fill db_path (created if needed, must hold no medicines) and return a report"""
+        init_database(db_path, verbose=False)
+        conn = sqlite3.connect(db_path)
+        try:
+            apply_pragmas(conn, 'performance')
+            if conn.execute("SELECT COUNT(*) FROM medicines").fetchone()[0]:
+                raise ValueError(f"{db_path} already has medicines; generate into an empty database")
+
+            start = time.perf_counter()
+            self.rng = random.Random(self.seed)
+            self.progress = progress
+            self.counts = {}
+            self.medicine_sampler = ZipfSampler(self.rng, self.medicines, self.medicine_skew)
+            self.stockist_sampler = ZipfSampler(self.rng, self.stockists, self.stockist_skew)
+            with triggers_suspended(conn):
+                self._write_stockists(conn)
+                self._write_medicines(conn)
+                self._write_prices(conn)
+                self._write_purchases(conn)
+                self._report('derived tables', 0)
+            conn.execute("ANALYZE")
+        finally:
+            conn.close()
+
+        report = dict(self.counts)
+        report['seconds'] = round(time.perf_counter() - start, 3)
+        return report
+
+    def _insert(self, conn, table, query, rows):
+        """executemany rows in batch_size transactions"""
+        batch = []
+        count = 0
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= self.batch_size:
+                with conn:
+                    conn.executemany(query, batch)
+                count += len(batch)
+                batch = []
+                self._report(table, count)
+        if batch or not count:
+            with conn:
+                conn.executemany(query, batch)
+            count += len(batch)
+            self._report(table, count)
+        self.counts[table] = count
+
+    def _report(self, table, count):
+        if self.progress:
+            self.progress(table, count)
+
+    def _timestamp(self, days_ago):
+        """A time of day on the date days_ago before end"""
+        seconds = self.rng.randrange(8 * 3600, 21 * 3600)
+        moment = datetime.combine(self.end - timedelta(days=days_ago), datetime.min.time())
+        return (moment + timedelta(seconds=seconds)).strftime('%Y-%m-%d %H:%M:%S')
+
+    def _days_ago(self):
+        """Spread over days, denser near the end like a growing business"""
+        return min(int(self.rng.expovariate(3.0 / self.days)), self.days - 1)
+
+    def _write_stockists(self, conn):
+        rng = self.rng
+        self.stockist_names = []
+        # Per-stockist markup over the base price; big distributors run cheaper
+        self.stockist_markup = array('d', [0.0])
+        rows = []
+        for stockist_id in range(1, self.stockists + 1):
+            name = f"{rng.choice(COMPANY_WORDS)} {rng.choice(['Distributors', 'Pharma', 'Medicos', 'Agencies', 'Healthcare'])} {stockist_id}"
+            self.stockist_names.append(name)
+            self.stockist_markup.append(rng.gauss(1.0, 0.06))
+            rows.append((
+                stockist_id,
+                name,
+                f"9{rng.randrange(10 ** 8, 10 ** 9)}",
+                rng.choice(CITIES),
+                f"{rng.randrange(1, 38):02d}AA{rng.randrange(10 ** 6, 10 ** 7)}R1Z{rng.choice('ABCDEFGHJK')}",
+                self._timestamp(self.days - 1)
+            ))
+        self._insert(conn, 'stockists', """
+            INSERT INTO stockists (id, name, contact, address, gst_no, created_at)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, rows)
+
+    def _write_medicines(self, conn):
+        rng = self.rng
+        count = self.medicines
+        self.medicine_names = []
+        self.base_price = array('d', [0.0])
+        self.mrp = array('d', [0.0])
+        self.lowest = array('d', [0.0]) * (count + 1)
+        companies = [f"{word} {suffix}" for word in COMPANY_WORDS
+                     for suffix in ('Pharma', 'Labs', 'Healthcare', 'Life Sciences', 'Remedies')]
+        company_cum = zipf_cum_weights(len(companies), 1.0)
+
+        def rows():
+            for medicine_id in range(1, count + 1):
+                stem = rng.choice(STEMS)
+                # Suffix keeps names distinct in catalogues larger than the combinations
+                name = f"{stem} {rng.choice(STRENGTHS)} {rng.choice(FORMS)} {medicine_id}"
+                self.medicine_names.append(name)
+                base = min(max(rng.lognormvariate(math.log(120), 0.9), 2.0), 5000.0)
+                self.base_price.append(base)
+                self.mrp.append(round(base * rng.uniform(1.15, 1.35), 2))
+                yield (
+                    medicine_id,
+                    name,
+                    rng.choices(companies, cum_weights=company_cum)[0],
+                    stem,
+                    rng.choice(CATEGORIES),
+                    self._timestamp(self._days_ago())
+                )
+
+        self._insert(conn, 'medicines', """
+            INSERT INTO medicines (id, medicine_name, company_name, generic_name, category, created_at)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, rows())
+
+    def _write_prices(self, conn):
+        rng = self.rng
+        stockists = self.stockist_sampler
+
+        def medicine_ids():
+            # Every medicine is quoted at least once, the rest by popularity
+            first = list(range(1, self.medicines + 1))
+            rng.shuffle(first)
+            yield from first[:self.prices]
+            for _ in range(self.prices - len(first)):
+                yield self.medicine_sampler.sample()
+
+        def rows():
+            for medicine_id in medicine_ids():
+                stockist_id = stockists.sample()
+                mrp = self.mrp[medicine_id]
+                quoted = self.base_price[medicine_id] * self.stockist_markup[stockist_id]
+                quoted *= rng.lognormvariate(0.0, 0.08)
+                # A quote is a trade discount off MRP, never above it
+                discount = min(max(round((1 - quoted / mrp) * 100 / 2.5) * 2.5, 0.0), 40.0)
+                final_price = round(mrp * (1 - discount / 100), 2)
+                lowest = self.lowest[medicine_id]
+                if not lowest or final_price < lowest:
+                    self.lowest[medicine_id] = final_price
+                paid_status = rng.choice(('Paid', 'Unpaid', 'Half Paid'))
+                yield (
+                    medicine_id,
+                    stockist_id,
+                    round(final_price * 0.9, 2),
+                    mrp,
+                    discount,
+                    final_price,
+                    paid_status,
+                    final_price if paid_status == 'Paid' else
+                    round(final_price / 2, 2) if paid_status == 'Half Paid' else 0,
+                    self._timestamp(self._days_ago())
+                )
+
+        self._insert(conn, 'medicine_prices', """
+            INSERT INTO medicine_prices
+            (medicine_id, stockist_id, net_rate, mrp, discount_percent,
+             final_price, paid_status, paid_amount, purchase_date)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, rows())
+
+    def _write_purchases(self, conn):
+        rng = self.rng
+        medicines = self.medicine_sampler
+        stockists = self.stockist_sampler
+        if not self.prices:
+            self.counts['purchases'] = 0
+            return
+
+        def rows():
+            written = 0
+            while written < self.purchases:
+                medicine_id = medicines.sample()
+                lowest = self.lowest[medicine_id]
+                if not lowest:
+                    continue
+                written += 1
+                # Mostly near the lowest price, sometimes a pricier stockist
+                selected = round(lowest * (1 + rng.expovariate(12.0)), 2)
+                yield (
+                    self.medicine_names[medicine_id - 1],
+                    self.stockist_names[stockists.sample() - 1],
+                    selected,
+                    lowest,
+                    round(lowest - selected, 2),
+                    self._timestamp(self._days_ago())
+                )
+
+        self._insert(conn, 'purchases', """
+            INSERT INTO purchases
+            (medicine_name, selected_stockist, selected_price, lowest_price, savings, purchase_date)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, rows())
+
+
+def print_progress(table, count):
+    if count:
+        print(f"  {table}: {count} rows", flush=True)
+    else:
+        print(f"  rebuilding {table}...", flush=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--db', required=True, help="database file to create")
+    parser.add_argument('--medicines', type=int, default=100000)
+    parser.add_argument('--stockists', type=int, default=2000)
+    parser.add_argument('--prices', type=int, default=1000000, help="medicine_prices rows")
+    parser.add_argument('--purchases', type=int, default=100000)
+    parser.add_argument('--days', type=int, default=365, help="date spread of quotes and purchases")
+    parser.add_argument('--end', type=date.fromisoformat, help="last date (default today)")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--batch-size', type=int, default=50000, help="rows per transaction")
+    parser.add_argument('--reset', action='store_true', help="delete the database first")
+    args = parser.parse_args(argv)
+
+    if args.reset:
+        for path in (args.db, args.db + '-wal', args.db + '-shm'):
+            if os.path.exists(path):
+                os.remove(path)
+
+    try:
+        generator = CatalogueGenerator(
+            medicines=args.medicines, stockists=args.stockists, prices=args.prices,
+            purchases=args.purchases, days=args.days, seed=args.seed, end=args.end,
+            batch_size=args.batch_size
+        )
+        report = generator.generate(args.db, print_progress)
+    except ValueError as e:
+        sys.exit(str(e))
+    print(f"Generated {report['medicine_prices']} prices for {report['medicines']} medicines "
+          f"from {report['stockists']} stockists and {report['purchases']} purchases "
+          f"in {report['seconds']}s")
+
+
+if __name__ == '__main__':
+    main()
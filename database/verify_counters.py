@@ -0,0 +1,89 @@
+"""Check the trigger-maintained dashboard counters against a full recompute
+
+Usage: python -m database.verify_counters [--db PATH] [--fix]
+"""
+import argparse
+import os
+import sqlite3
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database.init_db import DEFAULT_DB_PATH
+from database.migrations import COUNTER_RECOMPUTE
+
+# Savings are summed as floats by the triggers, so allow rounding drift
+TOLERANCE = 0.005
+
+RECOUNT_QUERIES = {
+    'medicine_names': "SELECT COUNT(DISTINCT medicine_name) FROM medicines",
+    'stockists': "SELECT COUNT(*) FROM stockists",
+    'purchases': "SELECT COUNT(*) FROM purchases",
+    'total_savings': "SELECT COALESCE(SUM(savings), 0) FROM purchases"
+}
+
+
+def verify_counters(conn):
+    """Return {counter: (stored, recomputed)} for every counter that is off"""
+    stored = dict(conn.execute("SELECT name, value FROM stats_counters").fetchall())
+    mismatches = {}
+    for name, query in RECOUNT_QUERIES.items():
+        expected = conn.execute(query).fetchone()[0]
+        actual = stored.get(name)
+        if actual is None or abs(actual - expected) > TOLERANCE:
+            mismatches[name] = (actual, expected)
+    
+    # Per-name reference counts behind medicine_names
+    bad_refs = conn.execute("""
+        WITH actual AS (
+            SELECT medicine_name, COUNT(*) as refs FROM medicines GROUP BY medicine_name
+        )
+        SELECT
+            (SELECT COUNT(*) FROM (
+                SELECT medicine_name, refs FROM actual
+                EXCEPT SELECT medicine_name, refs FROM medicine_name_counts))
+            + (SELECT COUNT(*) FROM (
+                SELECT medicine_name, refs FROM medicine_name_counts
+                EXCEPT SELECT medicine_name, refs FROM actual))
+    """).fetchone()[0]
+    if bad_refs:
+        mismatches['medicine_name_counts'] = (bad_refs, 0)
+    return mismatches
+
+
+def recompute_counters(conn):
+    """Overwrite the counters with values computed from the base tables"""
+    for statement in COUNTER_RECOMPUTE:
+        conn.execute(statement)
+    conn.commit()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--db', default=DEFAULT_DB_PATH, help="database file")
+    parser.add_argument('--fix', action='store_true', help="recompute counters that are off")
+    args = parser.parse_args(argv)
+    
+    conn = sqlite3.connect(args.db)
+    try:
+        mismatches = verify_counters(conn)
+        for name, (stored, expected) in mismatches.items():
+            if name == 'medicine_name_counts':
+                print(f"MISMATCH {name}: {stored} medicine names with wrong reference counts")
+            else:
+                print(f"MISMATCH {name}: stored {stored}, recomputed {expected}")
+        
+        if mismatches and args.fix:
+            recompute_counters(conn)
+            print("Counters recomputed")
+        elif not mismatches:
+            print("All counters match")
+    finally:
+        conn.close()
+    
+    if mismatches and not args.fix:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
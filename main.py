@@ -1,55 +1,65 @@
 import sys
 import os
-from PyQt5.QtWidgets import QApplication, QMainWindow, QStackedWidget, QMessageBox
-from PyQt5.QtCore import Qt
 
 # Add project root to path
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-from controllers.dashboard_controller import DashboardController
-from views.dashboard_view import DashboardView
-from views.add_medicine_view import AddMedicineView
-from views.medicine_list_view import MedicineListView
-from database.init_db import init_database
+# python -X startuptime main.py prints how long each phase below takes
+from utils.startup_timer import startup_timer
+
+with startup_timer.phase('import PyQt5'):
+    from PyQt5.QtWidgets import QApplication, QMainWindow, QStackedWidget, QMessageBox
+    from PyQt5.QtCore import Qt, QTimer
+
+# Only the dashboard is imported up front; the other views load on first use
+with startup_timer.phase('import dashboard'):
+    from controllers.dashboard_controller import DashboardController
+    from views.dashboard_view import DashboardView
+    from views.components.future_watcher import FutureWatcher
 
 
 class MainWindow(QMainWindow):
+    CHANGE_POLL_MS = 2000
+    
     def __init__(self):
         super().__init__()
         self.setWindowTitle("Medicine Price Comparator - Doctor's Dashboard")
         self.setMinimumSize(1200, 800)
         
-        # Initialize database
-        try:
-            init_database()
-        except Exception as e:
-            QMessageBox.warning(None, "Database", f"Database initialized: {str(e)}")
-        
         # Setup stacked widget for views
         self.stacked_widget = QStackedWidget()
         self.setCentralWidget(self.stacked_widget)
         
         # Initialize controllers
         self.dashboard_controller = DashboardController(self)
+        self.watcher = FutureWatcher(self.dashboard_controller, self)
         
-        # Initialize views
-        self.dashboard_view = DashboardView(self.dashboard_controller)
-        self.add_medicine_view = AddMedicineView(self.dashboard_controller)
-        self.medicine_list_view = MedicineListView(self.dashboard_controller)
-        
-        # Add views to stacked widget
-        self.stacked_widget.addWidget(self.dashboard_view)
-        self.stacked_widget.addWidget(self.add_medicine_view)
-        self.stacked_widget.addWidget(self.medicine_list_view)
+        # Only the dashboard is built now; it shows placeholders until data arrives
+        with startup_timer.phase('build DashboardView'):
+            self.dashboard_view = DashboardView(self.dashboard_controller)
+            self.stacked_widget.addWidget(self.dashboard_view)
+        self.add_medicine_view = None
+        self.medicine_list_view = None
         
         # Connect signals
         self.connect_signals()
         
-        # Show dashboard first
-        self.show_dashboard()
-        
         # Apply global styles
-        self.apply_styles()
+        with startup_timer.phase('apply styles'):
+            self.apply_styles()
+        
+        # Create or migrate the database off the GUI thread, then load data
+        self.database_ready = False
+        self.watcher.watch(
+            self.dashboard_controller.prepare_database_async(),
+            self.on_database_ready,
+            lambda e: QMessageBox.warning(self, "Database", f"Database could not be opened: {str(e)}")
+        )
+        
+        # Watch for writes from other copies sharing the database file
+        self.change_timer = QTimer(self)
+        self.change_timer.timeout.connect(self.sync_changes)
+        self.change_poll = None
     
     def connect_signals(self):
         """Connect view signals to controller methods"""
@@ -57,36 +67,115 @@ class MainWindow(QMainWindow):
         self.dashboard_view.switch_to_add_medicine.connect(self.show_add_medicine)
         self.dashboard_view.switch_to_all_medicines.connect(self.show_all_medicines)
         self.dashboard_view.medicine_selected.connect(self.on_medicine_selected)
-        
-        # Add medicine signals
-        self.add_medicine_view.medicine_added.connect(self.on_medicine_added)
-        self.add_medicine_view.back_to_dashboard.connect(self.show_dashboard)
-        
-        # Medicine list signals
-        self.medicine_list_view.back_to_dashboard.connect(self.show_dashboard)
+    
+    def get_add_medicine_view(self):
+        """The add medicine view, imported and built on first use"""
+        if self.add_medicine_view is None:
+            with startup_timer.phase('build AddMedicineView'):
+                from views.add_medicine_view import AddMedicineView
+                self.add_medicine_view = AddMedicineView(self.dashboard_controller)
+                self.stacked_widget.addWidget(self.add_medicine_view)
+            startup_timer.report()
+            
+            self.add_medicine_view.medicine_added.connect(self.on_medicine_added)
+            self.add_medicine_view.back_to_dashboard.connect(self.show_dashboard)
+        return self.add_medicine_view
+    
+    def get_medicine_list_view(self):
+        """The medicine list view, imported and built on first use"""
+        if self.medicine_list_view is None:
+            with startup_timer.phase('build MedicineListView'):
+                from views.medicine_list_view import MedicineListView
+                self.medicine_list_view = MedicineListView(self.dashboard_controller)
+                self.stacked_widget.addWidget(self.medicine_list_view)
+            startup_timer.report()
+            
+            self.medicine_list_view.back_to_dashboard.connect(self.show_dashboard)
+        return self.medicine_list_view
+    
+    def on_first_frame(self):
+        """Called once the event loop has painted the window"""
+        startup_timer.mark('first frame')
+        startup_timer.report()
+    
+    def on_database_ready(self, _):
+        startup_timer.mark('database ready')
+        self.database_ready = True
+        self.change_timer.start(self.CHANGE_POLL_MS)
+        self.load_current_view()
+        startup_timer.report()
+    
+    def load_current_view(self):
+        """Load data for the view on screen; waits until the database is ready"""
+        if not self.database_ready:
+            return
+        view = self.stacked_widget.currentWidget()
+        if view is self.dashboard_view:
+            self.dashboard_view.refresh_data()
+        elif view is self.add_medicine_view:
+            self.add_medicine_view.load_stockists()
+        elif view is self.medicine_list_view:
+            self.medicine_list_view.load_medicines()
     
     def show_dashboard(self):
         self.stacked_widget.setCurrentWidget(self.dashboard_view)
-        self.dashboard_view.refresh_data()
+        self.load_current_view()
     
     def show_add_medicine(self):
-        self.stacked_widget.setCurrentWidget(self.add_medicine_view)
-        self.add_medicine_view.load_stockists()
+        self.stacked_widget.setCurrentWidget(self.get_add_medicine_view())
+        self.load_current_view()
     
     def show_all_medicines(self):
-        self.stacked_widget.setCurrentWidget(self.medicine_list_view)
-        self.medicine_list_view.load_medicines()
+        self.stacked_widget.setCurrentWidget(self.get_medicine_list_view())
+        self.load_current_view()
     
     def on_medicine_selected(self, medicine_data):
         """Handle medicine selection from dashboard search"""
         self.show_all_medicines()
         self.medicine_list_view.highlight_medicine(medicine_data)
     
-    def on_medicine_added(self):
-        """Refresh dashboard when new medicine added"""
+    def on_medicine_added(self, medicine_id):
+        """Refresh dashboard when new medicine added
+        
+        The list row of the new medicine is read on a worker thread.
+        """
+        if self.medicine_list_view is not None:
+            self.watcher.watch(
+                self.dashboard_controller.get_medicine_async(medicine_id),
+                self.medicine_list_view.add_medicine
+            )
         QMessageBox.information(self, "Success", "Medicine added successfully!")
         self.show_dashboard()
     
+    def sync_changes(self):
+        """Poll for writes committed by other seats on a worker thread
+        
+        A poll can wait on another seat's write lock while pruning the
+        change log, so it never runs on the GUI thread. A poll still
+        running is not superseded: it has already consumed its changes.
+        """
+        if self.change_poll is not None and not self.change_poll.done():
+            return
+        self.change_poll = self.watcher.watch(
+            self.dashboard_controller.poll_changes_async(),
+            self.apply_changes
+        )
+    
+    def apply_changes(self, changes):
+        """Refresh the views affected by a change poll"""
+        if not changes:
+            return
+        if self.stacked_widget.currentWidget() is self.dashboard_view:
+            self.dashboard_view.refresh_data()
+        if self.medicine_list_view is not None:
+            self.medicine_list_view.apply_changes(changes)
+    
+    def closeEvent(self, event):
+        """Stop background workers before closing"""
+        self.change_timer.stop()
+        self.dashboard_controller.shutdown()
+        super().closeEvent(event)
+    
     def apply_styles(self):
         """Apply global stylesheet"""
         self.setStyleSheet("""
@@ -127,10 +216,13 @@ def main():
     QApplication.setAttribute(Qt.AA_EnableHighDpiScaling, True)
     QApplication.setAttribute(Qt.AA_UseHighDpiPixmaps, True)
     
-    app = QApplication(sys.argv)
+    with startup_timer.phase('QApplication'):
+        app = QApplication(sys.argv)
     
-    window = MainWindow()
+    with startup_timer.phase('MainWindow'):
+        window = MainWindow()
     window.show()
+    QTimer.singleShot(0, window.on_first_frame)
     
     sys.exit(app.exec_())
 
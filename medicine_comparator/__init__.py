@@ -0,0 +1 @@
+"""Headless batch price comparison; run with python -m medicine_comparator"""
@@ -0,0 +1,5 @@
+from medicine_comparator.cli import main
+
+
+if __name__ == '__main__':
+    main()
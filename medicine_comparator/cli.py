@@ -0,0 +1,229 @@
+"""Headless medicine price comparison for batch jobs
+
+Usage: python -m medicine_comparator lookup NAME... [--file NAMES.txt] [-o OUT.csv]
+       python -m medicine_comparator import FILE [--stockist ID]
+       python -m medicine_comparator export [--stockist ID] [-o OUT.json]
+       python -m medicine_comparator stockists
+
+Only the models are loaded, never PyQt5, so this runs on servers
+without a display.
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+from contextlib import contextmanager
+from itertools import chain
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database.init_db import DEFAULT_DB_PATH, init_database
+from models.database import Database, DEFAULT_PROFILE, PRAGMA_PROFILES
+from models.medicine_model import MedicineModel
+from models.price_import import PriceImporter
+from models.stockist_model import StockistModel
+
+
+# Columns of medicine_model.PRICE_COMPARISON
+COMPARISON_COLUMNS = ('id', 'medicine_name', 'company_name', 'generic_name', 'stockist_name',
+                      'lowest_price', 'mrp', 'discount_percent', 'savings', 'stockist_count')
+
+
+def read_names(names, path):
+    """Medicine names from the command line and a file ('-' for stdin), one per line"""
+    names = [name.strip() for name in names]
+    if path:
+        f = sys.stdin if path == '-' else open(path, encoding='utf-8-sig')
+        try:
+            names.extend(line.strip() for line in f)
+        finally:
+            if f is not sys.stdin:
+                f.close()
+    return [name for name in names if name]
+
+
+@contextmanager
+def open_output(path):
+    if not path or path == '-':
+        yield sys.stdout
+    else:
+        with open(path, 'w', newline='', encoding='utf-8') as f:
+            yield f
+
+
+def cell(value):
+    """Output value of a column; floats are prices or percentages, shown to 2 decimals as in the GUI"""
+    return round(value, 2) if isinstance(value, float) else value
+
+
+def write_rows(rows, path=None, fmt=None):
+    """Stream rows (dicts or CompactRows) as CSV or a JSON array; returns the row count
+
+    The format is fmt, else guessed from the extension of path, else CSV.
+    """
+    if fmt is None:
+        fmt = 'json' if path and path.lower().endswith('.json') else 'csv'
+    count = 0
+    with open_output(path) as f:
+        if fmt == 'json':
+            f.write('[')
+        for row in rows:
+            if fmt == 'json':
+                f.write(',\n' if count else '\n')
+                f.write(json.dumps({column: cell(row[column]) for column in row.keys()}))
+            else:
+                if not count:
+                    columns = list(row.keys())
+                    writer = csv.writer(f)
+                    writer.writerow(columns)
+                writer.writerow([cell(row[column]) for column in columns])
+            count += 1
+        if fmt == 'json':
+            f.write('\n]\n' if count else ']\n')
+    return count
+
+
+def lookup_rows(model, names, exact=False):
+    """Lowest-price rows for names, in input order
+
+    Names are first matched exactly in one batched query; the rest go
+    through search_lowest_price and take its best-ranked medicine unless
+    exact is set. A name with no match yields a row with empty prices.
+    """
+    unique = list(dict.fromkeys(names))
+    found = {}
+    for row in model.get_price_comparison_by_name(unique, compact=True):
+        found.setdefault(row['medicine_name'], []).append(('exact', row))
+
+    if not exact:
+        searched = {}
+        for name in unique:
+            if name not in found:
+                results = model.search_lowest_price(name, compact=True)
+                if results:
+                    searched[name] = results[0]['id']
+        rows = model.get_price_comparison(set(searched.values()), compact=True)
+        by_id = {row['id']: row for row in rows}
+        for name, medicine_id in searched.items():
+            found[name] = [('search', by_id[medicine_id])]
+
+    empty = dict.fromkeys(COMPARISON_COLUMNS)
+    for name in names:
+        for match, row in found.get(name) or [('none', empty)]:
+            result = {'query': name, 'match': match}
+            result.update((column, row[column]) for column in COMPARISON_COLUMNS)
+            yield result
+
+
+def cmd_lookup(args):
+    names = read_names(args.names, args.file)
+    if not names:
+        sys.exit("No medicine names given")
+    rows = list(lookup_rows(MedicineModel(), names, args.exact))
+    write_rows(rows, args.output, args.format)
+    missing = sum(1 for row in rows if row['match'] == 'none')
+    print(f"Looked up {len(set(names))} medicines, {missing} not found", file=sys.stderr)
+    return 1 if missing else 0
+
+
+def print_progress(report):
+    print(f"  {report['rows']} rows, {report['rows_per_sec']} rows/sec", flush=True)
+
+
+def cmd_import(args):
+    importer = PriceImporter(chunk_size=args.chunk_size)
+    report = importer.import_file(args.file, args.stockist, print_progress)
+    print(f"Imported {report['prices']} prices from {report['rows']} rows "
+          f"in {report['seconds']}s ({report['rows_per_sec']} rows/sec)")
+    print(f"New medicines: {report['medicines_created']}, "
+          f"updated medicines: {report['medicines_updated']}, "
+          f"new stockists: {report['stockists_created']}")
+    if report['skipped']:
+        print(f"Skipped {report['skipped']} rows:")
+        for line, error in report['errors']:
+            print(f"  row {line}: {error}")
+        return 1
+    return 0
+
+
+def cmd_export(args):
+    if args.stockist is not None:
+        chunks = StockistModel().iter_stockist_medicines(args.stockist, args.chunk_size)
+    else:
+        chunks = MedicineModel().iter_price_comparison(args.chunk_size, compact=True)
+    count = write_rows(chain.from_iterable(chunks), args.output, args.format)
+    print(f"Exported {count} rows", file=sys.stderr)
+    return 0
+
+
+def cmd_stockists(args):
+    write_rows(StockistModel().get_all_stockists(), args.output, args.format)
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='python -m medicine_comparator',
+                                     description=__doc__.splitlines()[0])
+    parser.add_argument('--db', default=DEFAULT_DB_PATH, help="database file")
+    parser.add_argument('--profile', choices=sorted(PRAGMA_PROFILES), help="PRAGMA profile")
+    parser.add_argument('--query-stats', metavar='PATH',
+                        help="write per-query timings as JSON (or Prometheus text for .prom)")
+    parser.add_argument('--slow-query-ms', type=float, default=100.0,
+                        help="log statements slower than this with their query plan")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    def add_output(command):
+        command.add_argument('-o', '--output', help="output file (default stdout)")
+        command.add_argument('--format', choices=('csv', 'json'),
+                             help="output format (default from the file extension, else csv)")
+
+    lookup = commands.add_parser('lookup', help="lowest price for a list of medicines")
+    lookup.add_argument('names', nargs='*', help="medicine names")
+    lookup.add_argument('-f', '--file', help="file with one medicine name per line ('-' for stdin)")
+    lookup.add_argument('--exact', action='store_true',
+                        help="only exact name matches, no search fallback")
+    add_output(lookup)
+    lookup.set_defaults(handler=cmd_lookup)
+
+    bulk_import = commands.add_parser('import', help="bulk-import a stockist price list")
+    bulk_import.add_argument('file', help="price list to import")
+    bulk_import.add_argument('--stockist', type=int, help="stockist id for rows without a stockist column")
+    bulk_import.add_argument('--chunk-size', type=int, default=5000, help="rows per transaction")
+    bulk_import.set_defaults(handler=cmd_import)
+
+    export = commands.add_parser('export', help="export the price comparison of every medicine")
+    export.add_argument('--stockist', type=int, help="export one stockist's price rows instead")
+    export.add_argument('--chunk-size', type=int, default=5000, help="rows read per batch")
+    add_output(export)
+    export.set_defaults(handler=cmd_export)
+
+    stockists = commands.add_parser('stockists', help="list stockists")
+    add_output(stockists)
+    stockists.set_defaults(handler=cmd_stockists)
+
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if not os.path.exists(args.db):
+        sys.exit(f"Database not found: {args.db}")
+
+    # Brings an older schema up to date; a current one costs one PRAGMA
+    init_database(args.db, profile=args.profile or DEFAULT_PROFILE, verbose=False)
+
+    db = Database()
+    db.configure(db_path=args.db, profile=args.profile)
+    if args.query_stats:
+        db.instrument(slow_query_ms=args.slow_query_ms)
+    try:
+        sys.exit(args.handler(args))
+    except BrokenPipeError:
+        # Output piped into head or similar that stopped reading
+        sys.stderr.close()
+        sys.exit(1)
+    finally:
+        if args.query_stats:
+            db.write_query_stats(args.query_stats)
+        db.close()
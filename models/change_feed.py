@@ -0,0 +1,123 @@
+import sqlite3
+import threading
+import time
+from typing import Optional, Set
+
+from models.database import Database, apply_pragmas
+
+
+class ChangeSet:
+    """Writes committed since the previous poll"""
+
+    def __init__(self, full_reload=False):
+        self.full_reload = full_reload
+        self.tables: Set[str] = set()
+        self.medicine_ids: Set[int] = set()
+        # Medicines were renamed or deleted, so in-memory indexes are stale
+        self.medicines_rewritten = False
+
+    def __bool__(self):
+        return self.full_reload or bool(self.tables)
+
+
+class ChangeFeed:
+    """Pick up writes from every process sharing the database file
+
+    PRAGMA data_version on a connection of our own only changes when some
+    other connection commits, so an idle poll costs one PRAGMA. When it
+    moves, the change_log rows after our high-water mark say which tables
+    and medicines changed; cached reads of those tables are invalidated.
+    """
+
+    # Rows kept in change_log; a seat that falls further behind reloads
+    KEEP_ROWS = 100000
+    PRUNE_INTERVAL = 600.0
+
+    def __init__(self):
+        self.db = Database()
+        self._lock = threading.Lock()
+        self._conn = None
+        self._conn_path = None
+        self._data_version = None
+        self._last_prune = time.monotonic()
+        self.last_id = None
+
+    def _connection(self):
+        """Dedicated connection; data_version is only meaningful per connection"""
+        if self._conn is None or self._conn_path != self.db.db_path:
+            self.close()
+            self._conn = sqlite3.connect(self.db.db_path, check_same_thread=False)
+            apply_pragmas(self._conn, self.db.pool.profile)
+            self._conn_path = self.db.db_path
+            self._data_version = None
+            self.last_id = None
+        return self._conn
+
+    def poll(self) -> Optional[ChangeSet]:
+        """Changes since the last poll, or None if nothing was committed
+
+        The first poll only records the current high-water mark.
+        """
+        with self._lock:
+            conn = self._connection()
+            version = conn.execute("PRAGMA data_version").fetchone()[0]
+            if version == self._data_version:
+                return None
+            self._data_version = version
+
+            if self.last_id is None:
+                self.last_id = conn.execute(
+                    "SELECT COALESCE(MAX(id), 0) FROM change_log"
+                ).fetchone()[0]
+                return None
+
+            changes = self._read_changes(conn)
+            self._prune(conn)
+
+        if changes.full_reload and self.db.cache is not None:
+            self.db.cache.clear()
+        elif changes.tables:
+            self.db.invalidate(*changes.tables)
+        return changes or None
+
+    def _read_changes(self, conn) -> ChangeSet:
+        """Fold the change_log rows after last_id into a ChangeSet"""
+        oldest = conn.execute("SELECT MIN(id) FROM change_log").fetchone()[0]
+        if oldest is not None and oldest > self.last_id + 1:
+            # Rows we never saw were pruned already
+            self.last_id = conn.execute("SELECT MAX(id) FROM change_log").fetchone()[0]
+            return ChangeSet(full_reload=True)
+
+        changes = ChangeSet()
+        rows = conn.execute("""
+            SELECT id, table_name, medicine_id, op
+            FROM change_log
+            WHERE id > ?
+            ORDER BY id
+        """, (self.last_id,))
+        for change_id, table, medicine_id, op in rows:
+            changes.tables.add(table)
+            if medicine_id is not None:
+                changes.medicine_ids.add(medicine_id)
+            if table == 'medicines' and op != 'I':
+                changes.medicines_rewritten = True
+            self.last_id = change_id
+        return changes
+
+    def _prune(self, conn):
+        """Drop the oldest log rows every PRUNE_INTERVAL seconds"""
+        now = time.monotonic()
+        if now - self._last_prune < self.PRUNE_INTERVAL:
+            return
+        self._last_prune = now
+        with conn:
+            conn.execute(
+                "DELETE FROM change_log WHERE id <= (SELECT MAX(id) FROM change_log) - ?",
+                (self.KEEP_ROWS,)
+            )
+
+    def close(self):
+        """Close the feed's own connection"""
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
@@ -1,7 +1,169 @@
 import sqlite3
 import os
+import threading
+import time
+import atexit
 from contextlib import contextmanager
 
+from models.rows import compact_row_factory
+from models.query_cache import QueryCache
+from models.query_stats import EXPLAINABLE, QueryStats
+
+
+# PRAGMAs applied to every new connection; 'default' leaves SQLite's own settings
+PRAGMA_PROFILES = {
+    'default': {},
+    'durable': {
+        'journal_mode': 'WAL',
+        'synchronous': 'FULL',
+        'busy_timeout': 5000
+    },
+    'performance': {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'cache_size': -65536,
+        'mmap_size': 268435456,
+        'temp_store': 'MEMORY',
+        'busy_timeout': 5000
+    }
+}
+
+DEFAULT_PROFILE = 'performance'
+
+
+def resolve_profile(profile):
+    """Return the PRAGMA mapping for a profile name or a custom dict"""
+    if isinstance(profile, dict):
+        return profile
+    try:
+        return PRAGMA_PROFILES[profile]
+    except KeyError:
+        raise ValueError(f"Unknown database profile: {profile}")
+
+
+def apply_pragmas(conn, profile=DEFAULT_PROFILE):
+    """Apply a performance profile to an open connection"""
+    for name, value in resolve_profile(profile).items():
+        conn.execute(f"PRAGMA {name} = {value}")
+
+
+class PooledConnection:
+    """A connection owned by one thread and kept open between queries"""
+    
+    def __init__(self, conn, pooled=True):
+        self.conn = conn
+        self.pooled = pooled
+        self.depth = 0
+        self.last_used = time.monotonic()
+        # Tables written in the open transaction, invalidated on commit
+        self.written_tables = set()
+        # Database._hooks last installed on this connection
+        self.hooks = None
+
+
+class ConnectionPool:
+    """Per-thread pool of long-lived SQLite connections"""
+    
+    def __init__(self, db_path, max_size=8, idle_timeout=300.0, profile=DEFAULT_PROFILE):
+        self.db_path = db_path
+        self.profile = resolve_profile(profile)
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self._lock = threading.Lock()
+        self._slots = {}
+        self.stats = {
+            'opened': 0,
+            'reused': 0,
+            'evicted': 0,
+            'overflow': 0
+        }
+    
+    def _connect(self):
+        """Open a new connection to the database file"""
+        conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        apply_pragmas(conn, self.profile)
+        return conn
+    
+    def _evict(self, thread_id):
+        """Close and forget the connection of a thread (lock must be held)"""
+        slot = self._slots.pop(thread_id)
+        slot.conn.close()
+        self.stats['evicted'] += 1
+    
+    def _evict_idle(self, now):
+        """Close connections nobody has used for idle_timeout seconds"""
+        for thread_id, slot in list(self._slots.items()):
+            if slot.depth == 0 and now - slot.last_used > self.idle_timeout:
+                self._evict(thread_id)
+    
+    def _evict_oldest_idle(self):
+        """Make room for a new thread by closing the least recently used idle connection"""
+        idle = [(slot.last_used, thread_id) for thread_id, slot in self._slots.items()
+                if slot.depth == 0]
+        if not idle:
+            return False
+        self._evict(min(idle)[1])
+        return True
+    
+    def acquire(self):
+        """Return the calling thread's connection, opening one if needed"""
+        thread_id = threading.get_ident()
+        now = time.monotonic()
+        
+        with self._lock:
+            slot = self._slots.get(thread_id)
+            if slot is not None:
+                if slot.depth == 0:
+                    self.stats['reused'] += 1
+                slot.depth += 1
+                return slot
+            
+            self._evict_idle(now)
+            pooled = len(self._slots) < self.max_size or self._evict_oldest_idle()
+            if not pooled:
+                self.stats['overflow'] += 1
+            self.stats['opened'] += 1
+        
+        slot = PooledConnection(self._connect(), pooled)
+        slot.depth = 1
+        if pooled:
+            with self._lock:
+                self._slots[thread_id] = slot
+        return slot
+    
+    def active(self):
+        """The calling thread's pooled connection if it is checked out, else None"""
+        with self._lock:
+            slot = self._slots.get(threading.get_ident())
+        return slot if slot is not None and slot.depth > 0 else None
+    
+    def release(self, slot):
+        """Hand a connection back; overflow connections are closed"""
+        with self._lock:
+            slot.depth -= 1
+            if slot.depth > 0:
+                return
+            slot.last_used = time.monotonic()
+        if not slot.pooled:
+            slot.conn.close()
+    
+    def close_all(self):
+        """Close every idle pooled connection"""
+        with self._lock:
+            for thread_id, slot in list(self._slots.items()):
+                if slot.depth == 0:
+                    self._evict(thread_id)
+    
+    def get_stats(self):
+        """Pool counters plus the share of acquisitions served by an open connection"""
+        with self._lock:
+            stats = dict(self.stats)
+            stats['open'] = len(self._slots)
+        acquired = stats['opened'] + stats['reused']
+        stats['reuse_ratio'] = round(stats['reused'] / acquired, 4) if acquired else 0.0
+        return stats
+
 
 class Database:
     """Database connection manager"""
@@ -16,47 +178,283 @@ class Database:
                 'database',
                 'medicine_prices.db'
             )
+            cls._instance.pool = ConnectionPool(cls._instance.db_path)
+            cls._instance._tables = None
+            cls._instance.cache = QueryCache()
+            cls._instance.stats = None
+            cls._instance._hooks = None
+            cls._instance._steps = threading.local()
+            atexit.register(cls._instance.close)
+            
+            # MEDICINE_QUERY_STATS=stats.json (or .prom) profiles a whole run
+            stats_path = os.environ.get('MEDICINE_QUERY_STATS')
+            if stats_path:
+                cls._instance.instrument(
+                    slow_query_ms=float(os.environ.get('MEDICINE_SLOW_QUERY_MS', 100))
+                )
+                atexit.register(cls._instance.write_query_stats, stats_path)
         return cls._instance
     
+    def configure(self, db_path=None, pool_size=None, idle_timeout=None, profile=None,
+                  cache_size=None, cache_ttl=None):
+        """Point the manager at another database file, resize the pool or cache, or change profile
+        
+        cache_size=0 turns the read cache off.
+        """
+        self.close()
+        if db_path is not None:
+            self.db_path = db_path
+        self.pool = ConnectionPool(
+            self.db_path,
+            max_size=pool_size if pool_size is not None else self.pool.max_size,
+            idle_timeout=idle_timeout if idle_timeout is not None else self.pool.idle_timeout,
+            profile=profile if profile is not None else self.pool.profile
+        )
+        self._tables = None
+        
+        if cache_size is None:
+            cache_size = self.cache.max_entries if self.cache is not None else 0
+        if cache_ttl is None:
+            cache_ttl = self.cache.ttl if self.cache is not None else 60.0
+        self.cache = QueryCache(cache_size, cache_ttl) if cache_size else None
+    
+    def close(self):
+        """Close all pooled connections"""
+        self.pool.close_all()
+    
+    def tables(self):
+        """Names of the tables (and virtual tables), cached per database"""
+        if self._tables is None:
+            rows = self.fetch_all("SELECT name FROM sqlite_master WHERE type = 'table'")
+            self._tables = {row['name'] for row in rows}
+        return self._tables
+    
+    def table_exists(self, name):
+        """Check whether a table (or virtual table) exists"""
+        return name in self.tables()
+    
+    def schema_changed(self):
+        """Forget the cached table names and every cached read, e.g. after migrations
+        
+        Reads made before the schema was complete may have picked a
+        fallback (LIKE instead of FTS, aggregates instead of counters).
+        """
+        self._tables = None
+        if self.cache is not None:
+            self.cache.invalidate(self.tables())
+    
+    def pool_stats(self):
+        """Connection reuse counters"""
+        return self.pool.get_stats()
+    
+    def cache_stats(self):
+        """Read cache hit/miss counters, or None when the cache is off"""
+        return self.cache.get_stats() if self.cache is not None else None
+    
+    def instrument(self, enabled=True, slow_query_ms=100.0, trace=None, progress=None,
+                   progress_steps=1000):
+        """Time every statement into self.stats and optionally hook sqlite3 callbacks
+        
+        Statements slower than slow_query_ms (None for no slow log) are
+        logged with their EXPLAIN QUERY PLAN. trace is passed to
+        set_trace_callback and progress to set_progress_handler every
+        progress_steps VM instructions; a true return from progress
+        interrupts the statement. While enabled the progress handler also
+        counts VM steps per statement, to the nearest progress_steps.
+        Connections pick the hooks up on their next checkout.
+        """
+        if not enabled:
+            self.stats = None
+        elif self.stats is None:
+            self.stats = QueryStats(slow_query_ms)
+        else:
+            self.stats.slow_query_ms = slow_query_ms
+        if enabled or trace is not None or progress is not None:
+            self._hooks = (trace, progress, progress_steps)
+        else:
+            self._hooks = None
+    
+    def query_stats(self):
+        """Per-statement timings and the slow-query log, or None when not instrumented"""
+        return self.stats.snapshot() if self.stats is not None else None
+    
+    def write_query_stats(self, path):
+        """Write the query stats as Prometheus text (.prom, .txt) or JSON"""
+        if self.stats is not None:
+            self.stats.write(path)
+    
+    def _install_hooks(self, slot):
+        """Bring a connection's trace and progress callbacks in line with _hooks"""
+        conn = slot.conn
+        trace, progress, steps = self._hooks or (None, None, 0)
+        conn.set_trace_callback(trace)
+        if self.stats is None and progress is None:
+            conn.set_progress_handler(None, 0)
+        else:
+            counter = self._steps
+            
+            def handler():
+                counter.count = getattr(counter, 'count', 0) + steps
+                return progress() if progress is not None else 0
+            
+            conn.set_progress_handler(handler, steps)
+        slot.hooks = self._hooks
+    
+    def _begin(self):
+        """Start time and VM step count of a statement about to be timed"""
+        return time.perf_counter(), getattr(self._steps, 'count', 0)
+    
+    def _record(self, conn, query, params, begun, rows):
+        """Add a finished statement to the stats; log it with its plan if slow"""
+        start, steps = begun
+        seconds = time.perf_counter() - start
+        steps = getattr(self._steps, 'count', 0) - steps
+        stats = self.stats
+        if stats is None:
+            return
+        sql = stats.record(query, seconds, rows, steps)
+        if sql is None:
+            return
+        plan = None
+        if stats.needs_plan(sql) and query.lstrip().upper().startswith(EXPLAINABLE):
+            try:
+                plan = [row['detail'] for row in conn.execute(f"EXPLAIN QUERY PLAN {query}", params)]
+            except sqlite3.Error as e:
+                plan = [f"unavailable: {e}"]
+        stats.add_slow(sql, params, seconds, rows, plan)
+    
+    def invalidate(self, *tables):
+        """Drop cached reads of tables once the current write is committed
+        
+        Inside an open transaction the tables are remembered and dropped
+        after the outermost block commits, so no other thread can cache
+        rows from before the write in the meantime.
+        """
+        if self.cache is None:
+            return
+        slot = self.pool.active()
+        if slot is not None:
+            slot.written_tables.update(tables)
+        else:
+            self.cache.invalidate(tables)
+    
     @contextmanager
     def get_connection(self):
-        """Get database connection with context manager"""
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
+        """Get database connection with context manager
+        
+        Nested calls on the same thread share one connection; only the
+        outermost block commits or rolls back.
+        """
+        slot = self.pool.acquire()
+        conn = slot.conn
+        if slot.hooks is not self._hooks:
+            self._install_hooks(slot)
         try:
             yield conn
-            conn.commit()
+            if slot.depth == 1:
+                conn.commit()
         except Exception as e:
-            conn.rollback()
+            if slot.depth == 1:
+                conn.rollback()
             raise e
         finally:
-            conn.close()
+            if slot.depth == 1 and slot.written_tables:
+                if self.cache is not None:
+                    self.cache.invalidate(slot.written_tables)
+                slot.written_tables = set()
+            self.pool.release(slot)
+    
+    @contextmanager
+    def transaction(self):
+        """Run several statements on one connection as one transaction
+        
+        An explicit BEGIN gives reads inside the block a single consistent
+        snapshot; nested blocks join the outer transaction.
+        """
+        with self.get_connection() as conn:
+            if not conn.in_transaction:
+                conn.execute("BEGIN")
+            yield conn
     
     def execute_query(self, query, params=()):
         """Execute a query and return cursor"""
         with self.get_connection() as conn:
+            begun = self._begin() if self.stats is not None else None
             cursor = conn.cursor()
             cursor.execute(query, params)
+            if begun is not None:
+                self._record(conn, query, params, begun, cursor.rowcount)
             return cursor
     
-    def fetch_all(self, query, params=()):
-        """Fetch all results"""
+    def fetch_all(self, query, params=(), compact=False):
+        """Fetch all results, as dicts or (compact) as CompactRow tuples"""
         with self.get_connection() as conn:
+            begun = self._begin() if self.stats is not None else None
             cursor = conn.cursor()
-            cursor.execute(query, params)
-            return [dict(row) for row in cursor.fetchall()]
+            if compact:
+                cursor.row_factory = compact_row_factory
+                cursor.execute(query, params)
+                rows = cursor.fetchall()
+            else:
+                cursor.execute(query, params)
+                rows = [dict(row) for row in cursor.fetchall()]
+            if begun is not None:
+                self._record(conn, query, params, begun, len(rows))
+            return rows
+    
+    def iter_chunks(self, query, params=(), chunk_size=1000, compact=False):
+        """Yield results lazily as lists of at most chunk_size rows
+        
+        The connection stays checked out until the generator is exhausted
+        or closed, and the cursor is closed either way. Writes made on the
+        same thread meanwhile join its connection and commit when the
+        iteration ends, so consume or close the generator promptly.
+        Query stats count the time spent fetching, not the consumer's.
+        """
+        with self.get_connection() as conn:
+            begun = self._begin() if self.stats is not None else None
+            elapsed = 0.0
+            count = 0
+            cursor = conn.cursor()
+            if compact:
+                cursor.row_factory = compact_row_factory
+            try:
+                start = time.perf_counter()
+                cursor.execute(query, params)
+                while True:
+                    rows = cursor.fetchmany(chunk_size)
+                    if not rows:
+                        break
+                    rows = rows if compact else [dict(row) for row in rows]
+                    elapsed += time.perf_counter() - start
+                    count += len(rows)
+                    yield rows
+                    start = time.perf_counter()
+                elapsed += time.perf_counter() - start
+            finally:
+                cursor.close()
+                if begun is not None:
+                    # Reported as if the chunks had been read back to back
+                    self._record(conn, query, params,
+                                 (time.perf_counter() - elapsed, begun[1]), count)
     
     def fetch_one(self, query, params=()):
         """Fetch one result"""
         with self.get_connection() as conn:
+            begun = self._begin() if self.stats is not None else None
             cursor = conn.cursor()
             cursor.execute(query, params)
             row = cursor.fetchone()
+            if begun is not None:
+                self._record(conn, query, params, begun, 1 if row else 0)
             return dict(row) if row else None
     
     def insert(self, query, params=()):
         """Insert and return last row id"""
         with self.get_connection() as conn:
+            begun = self._begin() if self.stats is not None else None
             cursor = conn.cursor()
             cursor.execute(query, params)
+            if begun is not None:
+                self._record(conn, query, params, begun, cursor.rowcount)
             return cursor.lastrowid
\ No newline at end of file
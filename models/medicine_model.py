@@ -1,53 +1,143 @@
 from models.database import Database
-from typing import List, Dict, Any
+from models.query_cache import cached
+from models.search_cache import SearchResultCache
+from typing import List, Dict, Any, Iterator
+
+
+# Medicines with their lowest prices, for the list view
+MEDICINES_WITH_PRICES = """
+    SELECT 
+        m.id,
+        m.medicine_name,
+        m.company_name,
+        m.generic_name,
+        bp.final_price as lowest_price,
+        COALESCE(bp.stockist_count, 0) as stockist_count,
+        bp.mrp
+    FROM medicines m
+    LEFT JOIN medicine_best_price bp ON bp.medicine_id = m.id
+"""
+
+ALL_MEDICINES_QUERY = MEDICINES_WITH_PRICES + "ORDER BY m.medicine_name ASC"
+
+# Medicines with their cheapest stockist, for batch comparisons and exports
+PRICE_COMPARISON = """
+    SELECT 
+        m.id,
+        m.medicine_name,
+        m.company_name,
+        m.generic_name,
+        s.name as stockist_name,
+        bp.final_price as lowest_price,
+        bp.mrp,
+        bp.discount_percent,
+        (bp.mrp - bp.final_price) as savings,
+        COALESCE(bp.stockist_count, 0) as stockist_count
+    FROM medicines m
+    LEFT JOIN medicine_best_price bp ON bp.medicine_id = m.id
+    LEFT JOIN stockists s ON bp.stockist_id = s.id
+"""
 
 
 class MedicineModel:
     def __init__(self):
         self.db = Database()
+        self.search_cache = SearchResultCache(self.db)
     
-    def get_dashboard_stats(self) -> Dict[str, Any]:
-        """Get statistics for dashboard"""
+    @cached('medicines', 'stockists', 'purchases', 'medicine_prices')
+    def get_dashboard_stats(self, use_counters: bool = True,
+                            compact: bool = False) -> Dict[str, Any]:
+        """Get statistics for dashboard in one transaction on one connection
         
-        # Total unique medicines
-        total_medicines = self.db.fetch_one("""
-            SELECT COUNT(DISTINCT medicine_name) as count 
-            FROM medicines
-        """)['count']
+        With use_counters the totals come from the trigger-maintained
+        stats_counters rows instead of aggregating whole tables. With
+        compact the deal and recent lists hold CompactRow tuples.
+        """
         
-        # Total stockists
-        total_stockists = self.db.fetch_one("""
-            SELECT COUNT(*) as count 
-            FROM stockists
-        """)['count']
+        with self.db.transaction():
+            if use_counters and self.db.table_exists('stats_counters'):
+                counters = self._read_counters()
+            else:
+                counters = self._aggregate_counters()
+            
+            best_deals, recent_medicines = self._dashboard_lists(compact)
         
-        # Total purchases and savings
-        purchase_stats = self.db.fetch_one("""
+        return {
+            'total_medicines': counters['total_medicines'],
+            'total_stockists': counters['total_stockists'],
+            'total_purchases': counters['total_purchases'],
+            'total_savings': round(counters['total_savings'], 2),
+            'avg_savings': round(counters['avg_savings'], 2),
+            'best_deals': best_deals,
+            'recent_medicines': recent_medicines
+        }
+    
+    def _read_counters(self) -> Dict[str, Any]:
+        """Dashboard totals from the stats_counters summary rows"""
+        
+        values = {
+            row['name']: row['value']
+            for row in self.db.fetch_all("SELECT name, value FROM stats_counters")
+        }
+        purchases = int(values.get('purchases', 0))
+        total_savings = values.get('total_savings', 0)
+        
+        return {
+            'total_medicines': int(values.get('medicine_names', 0)),
+            'total_stockists': int(values.get('stockists', 0)),
+            'total_purchases': purchases,
+            'total_savings': total_savings,
+            'avg_savings': total_savings / purchases if purchases else 0
+        }
+    
+    def _aggregate_counters(self) -> Dict[str, Any]:
+        """Dashboard totals computed from the base tables in one query
+        
+        The average is derived from the sum and count; a separate AVG
+        aggregate made the purchases scan about a third slower.
+        """
+        
+        totals = self.db.fetch_one("""
             SELECT 
+                (SELECT COUNT(DISTINCT medicine_name) FROM medicines) as total_medicines,
+                (SELECT COUNT(*) FROM stockists) as total_stockists,
                 COUNT(*) as total_purchases,
-                COALESCE(SUM(savings), 0) as total_savings,
-                COALESCE(AVG(savings), 0) as avg_savings
+                COALESCE(SUM(savings), 0) as total_savings
             FROM purchases
         """)
+        purchases = totals['total_purchases']
+        totals['avg_savings'] = totals['total_savings'] / purchases if purchases else 0
+        return totals
+    
+    def _dashboard_lists(self, compact=False):
+        """Today's best deals and recently added medicines"""
         
-        # Today's best deals (lowest prices)
+        # Today's best deals: cheapest quote per medicine from today's rollup rows
         best_deals = self.db.fetch_all("""
             SELECT 
                 m.medicine_name,
                 m.company_name,
                 s.name as stockist_name,
-                MIN(mp.final_price) as price,
-                mp.mrp,
-                (mp.mrp - mp.final_price) as savings,
-                mp.discount_percent
-            FROM medicine_prices mp
-            JOIN medicines m ON mp.medicine_id = m.id
-            JOIN stockists s ON mp.stockist_id = s.id
-            WHERE date(mp.purchase_date) = date('now')
-            GROUP BY m.id
-            ORDER BY mp.final_price ASC
+                d.price,
+                d.mrp,
+                (d.mrp - d.price) as savings,
+                d.discount_percent
+            FROM (
+                SELECT 
+                    medicine_id,
+                    stockist_id,
+                    MIN(min_price) as price,
+                    min_mrp as mrp,
+                    min_discount as discount_percent
+                FROM price_history_daily
+                WHERE day = date('now')
+                GROUP BY medicine_id
+            ) d
+            JOIN medicines m ON d.medicine_id = m.id
+            JOIN stockists s ON d.stockist_id = s.id
+            ORDER BY d.price ASC
             LIMIT 5
-        """)
+        """, compact=compact)
         
         # Recently added medicines
         recent_medicines = self.db.fetch_all("""
@@ -58,46 +148,90 @@ class MedicineModel:
             FROM medicines
             ORDER BY created_at DESC
             LIMIT 5
-        """)
+        """, compact=compact)
         
-        return {
-            'total_medicines': total_medicines,
-            'total_stockists': total_stockists,
-            'total_purchases': purchase_stats['total_purchases'],
-            'total_savings': round(purchase_stats['total_savings'], 2),
-            'avg_savings': round(purchase_stats['avg_savings'], 2),
-            'best_deals': best_deals,
-            'recent_medicines': recent_medicines
-        }
+        return best_deals, recent_medicines
     
-    def search_lowest_price(self, search_term: str) -> List[Dict]:
-        """Search medicine and get lowest price from all stockists"""
+    def search_lowest_price(self, search_term: str, compact: bool = False) -> List[Dict]:
+        """Search medicine and get lowest price from all stockists
+        
+        Results are kept in search_cache. Without the FTS tables, a term
+        extending a cached term of three or more characters is answered
+        by filtering its rows.
+        """
         
+        refine = not self.db.table_exists('medicines_fts')
+        rows = self.search_cache.get(search_term, compact, refine_prefix=refine)
+        if rows is not None:
+            return rows
+        
+        versions = self.search_cache.versions()
+        rows = self._search(search_term, compact)
+        self.search_cache.put(search_term, compact, rows, versions)
+        return rows
+    
+    def _search(self, search_term: str, compact: bool = False) -> List[Dict]:
+        """Lowest-price search against the database"""
+        
+        if self.db.table_exists('medicines_fts'):
+            return self._search_fts(search_term, compact)
+        
+        # The cheapest price per medicine is kept in medicine_best_price
         return self.db.fetch_all("""
-            WITH PriceRanks AS (
-                SELECT 
-                    m.id,
-                    m.medicine_name,
-                    m.company_name,
-                    m.generic_name,
-                    s.name as stockist_name,
-                    s.id as stockist_id,
-                    mp.final_price,
-                    mp.mrp,
-                    mp.discount_percent,
-                    (mp.mrp - mp.final_price) as savings,
-                    ROW_NUMBER() OVER (PARTITION BY m.id ORDER BY mp.final_price ASC) as price_rank
-                FROM medicines m
-                JOIN medicine_prices mp ON m.id = mp.medicine_id
-                JOIN stockists s ON mp.stockist_id = s.id
-                WHERE m.medicine_name LIKE ? OR m.generic_name LIKE ? OR m.company_name LIKE ?
-            )
-            SELECT *
-            FROM PriceRanks
-            WHERE price_rank = 1
-            ORDER BY medicine_name ASC
-        """, (f'%{search_term}%', f'%{search_term}%', f'%{search_term}%'))
+            SELECT 
+                m.id,
+                m.medicine_name,
+                m.company_name,
+                m.generic_name,
+                s.name as stockist_name,
+                s.id as stockist_id,
+                bp.final_price,
+                bp.mrp,
+                bp.discount_percent,
+                (bp.mrp - bp.final_price) as savings,
+                1 as price_rank
+            FROM medicines m
+            JOIN medicine_best_price bp ON bp.medicine_id = m.id
+            JOIN stockists s ON bp.stockist_id = s.id
+            WHERE m.medicine_name LIKE ? OR m.generic_name LIKE ? OR m.company_name LIKE ?
+            ORDER BY m.medicine_name ASC
+        """, (f'%{search_term}%', f'%{search_term}%', f'%{search_term}%'), compact=compact)
     
+    def _search_fts(self, search_term: str, compact: bool = False) -> List[Dict]:
+        """BM25-ranked full-text search carrying the lowest-price columns"""
+        
+        # Trigram needs three characters; shorter terms use the prefix index
+        phrase = '"' + search_term.replace('"', '""') + '"'
+        if len(search_term) >= 3:
+            fts_table, match = 'medicines_fts', phrase
+        else:
+            fts_table, match = 'medicines_prefix_fts', phrase + '*'
+        
+        return self.db.fetch_all(f"""
+            SELECT 
+                m.id,
+                m.medicine_name,
+                m.company_name,
+                m.generic_name,
+                s.name as stockist_name,
+                s.id as stockist_id,
+                bp.final_price,
+                bp.mrp,
+                bp.discount_percent,
+                (bp.mrp - bp.final_price) as savings,
+                1 as price_rank
+            FROM (
+                SELECT rowid as id, bm25({fts_table}, 10.0, 5.0, 1.0) as score
+                FROM {fts_table}
+                WHERE {fts_table} MATCH ?
+            ) matches
+            JOIN medicines m ON m.id = matches.id
+            JOIN medicine_best_price bp ON bp.medicine_id = m.id
+            JOIN stockists s ON bp.stockist_id = s.id
+            ORDER BY matches.score ASC, m.medicine_name ASC
+        """, (match,), compact=compact)
+    
+    @cached('medicine_prices', 'stockists')
     def get_all_stockist_prices(self, medicine_id: int) -> List[Dict]:
         """Get all prices for a medicine from different stockists"""
         
@@ -131,6 +265,7 @@ class MedicineModel:
             medicine_data.get('generic_name', ''),
             medicine_data.get('category', '')
         ))
+        self.db.invalidate('medicines')
         
         return medicine_id
     
@@ -154,24 +289,79 @@ class MedicineModel:
             price_data.get('paid_status', 'Unpaid'),
             price_data.get('paid_amount', 0)
         ))
+        self.db.invalidate('medicine_prices')
     
-    def get_all_medicines_with_prices(self) -> List[Dict]:
-        """Get all medicines with their lowest prices"""
+    def get_all_medicines_with_prices(self, compact: bool = False) -> List[Dict]:
+        """Get all medicines with their lowest prices
         
-        return self.db.fetch_all("""
-            SELECT DISTINCT
+        Not cached: the whole catalogue is too large to pin in memory,
+        and the list view keeps its own copy.
+        """
+        
+        return self.db.fetch_all(ALL_MEDICINES_QUERY, compact=compact)
+    
+    def iter_all_medicines_with_prices(self, chunk_size: int = 1000,
+                                       compact: bool = False) -> Iterator[List[Dict]]:
+        """Stream all medicines with their lowest prices in chunks"""
+        
+        return self.db.iter_chunks(ALL_MEDICINES_QUERY, chunk_size=chunk_size, compact=compact)
+    
+    def get_medicines_with_prices(self, medicine_ids, compact: bool = False) -> List[Dict]:
+        """Rows of get_all_medicines_with_prices for the given medicine ids"""
+        
+        return self._fetch_in(MEDICINES_WITH_PRICES, 'm.id', medicine_ids, compact)
+    
+    def _fetch_in(self, query: str, column: str, values, compact: bool = False) -> List[Dict]:
+        """Rows of query whose column is one of values, in batches"""
+        
+        values = list(values)
+        rows = []
+        # Stay well below SQLite's bound-parameter limit
+        for start in range(0, len(values), 500):
+            batch = values[start:start + 500]
+            rows.extend(self.db.fetch_all(
+                query + f"WHERE {column} IN ({', '.join('?' * len(batch))})",
+                batch, compact=compact
+            ))
+        return rows
+    
+    def get_price_comparison(self, medicine_ids, compact: bool = False) -> List[Dict]:
+        """Cheapest stockist, price and savings for the given medicine ids"""
+        
+        return self._fetch_in(PRICE_COMPARISON, 'm.id', medicine_ids, compact)
+    
+    def get_price_comparison_by_name(self, medicine_names, compact: bool = False) -> List[Dict]:
+        """Cheapest stockist, price and savings for medicines named exactly as given
+        
+        A name shared by several companies' medicines returns a row for each.
+        """
+        
+        return self._fetch_in(PRICE_COMPARISON, 'm.medicine_name', medicine_names, compact)
+    
+    def iter_price_comparison(self, chunk_size: int = 1000,
+                              compact: bool = False) -> Iterator[List[Dict]]:
+        """Stream the price comparison of every medicine in chunks"""
+        
+        return self.db.iter_chunks(PRICE_COMPARISON + "ORDER BY m.medicine_name ASC",
+                                   chunk_size=chunk_size, compact=compact)
+    
+    @cached('medicines', 'medicine_prices')
+    def get_medicine_with_prices(self, medicine_id: int) -> Dict:
+        """Get one medicine with its lowest price"""
+        
+        return self.db.fetch_one("""
+            SELECT 
                 m.id,
                 m.medicine_name,
                 m.company_name,
                 m.generic_name,
-                MIN(mp.final_price) as lowest_price,
-                COUNT(DISTINCT mp.stockist_id) as stockist_count,
-                MIN(mp.mrp) as mrp
+                bp.final_price as lowest_price,
+                COALESCE(bp.stockist_count, 0) as stockist_count,
+                bp.mrp
             FROM medicines m
-            LEFT JOIN medicine_prices mp ON m.id = mp.medicine_id
-            GROUP BY m.id
-            ORDER BY m.medicine_name ASC
-        """)
+            LEFT JOIN medicine_best_price bp ON bp.medicine_id = m.id
+            WHERE m.id = ?
+        """, (medicine_id,))
     
     def record_purchase(self, medicine_name: str, stockist_name: str, 
                        paid_price: float, lowest_price: float):
@@ -184,5 +374,6 @@ class MedicineModel:
             (medicine_name, selected_stockist, selected_price, lowest_price, savings)
             VALUES (?, ?, ?, ?, ?)
         """, (medicine_name, stockist_name, paid_price, lowest_price, savings))
+        self.db.invalidate('purchases')
         
         return savings
\ No newline at end of file
@@ -0,0 +1,79 @@
+from models.database import Database
+from models.query_cache import cached
+from typing import List, Dict, Optional
+
+
+# Rollup table and bucket column per period
+PERIODS = {
+    'daily': ('price_history_daily', 'day'),
+    'weekly': ('price_history_weekly', 'week_start')
+}
+
+
+class PriceHistoryModel:
+    """Price trends read from the daily and weekly rollup tables"""
+    
+    def __init__(self):
+        self.db = Database()
+    
+    def _period(self, period: str):
+        try:
+            return PERIODS[period]
+        except KeyError:
+            raise ValueError(f"Unknown price history period: {period}")
+    
+    @cached('medicine_prices')
+    def get_price_trend(self, medicine_id: int, period: str = 'daily', days: int = 90,
+                        stockist_id: Optional[int] = None) -> List[Dict]:
+        """Min, max, average and last price per period for a medicine
+        
+        Without stockist_id the buckets of all stockists are combined; the
+        last price is the latest quote from any of them.
+        """
+        
+        table, bucket = self._period(period)
+        stockist_filter = "AND stockist_id = :stockist_id" if stockist_id is not None else ""
+        
+        return self.db.fetch_all(f"""
+            SELECT 
+                {bucket} as period_start,
+                MIN(min_price) as min_price,
+                MAX(max_price) as max_price,
+                SUM(sum_price) / SUM(quotes) as avg_price,
+                SUM(quotes) as quotes,
+                (SELECT last_price FROM {table}
+                 WHERE medicine_id = :medicine_id
+                   AND {bucket} = h.{bucket}
+                   {stockist_filter}
+                 ORDER BY last_at DESC
+                 LIMIT 1) as last_price
+            FROM {table} h
+            WHERE medicine_id = :medicine_id
+              AND {bucket} >= date('now', :since)
+              {stockist_filter}
+            GROUP BY {bucket}
+            ORDER BY {bucket} ASC
+        """, {'medicine_id': medicine_id, 'since': f'-{days} days', 'stockist_id': stockist_id})
+    
+    @cached('medicine_prices', 'stockists')
+    def get_stockist_trends(self, medicine_id: int, period: str = 'weekly',
+                            days: int = 90) -> List[Dict]:
+        """One row per stockist and period for a medicine"""
+        
+        table, bucket = self._period(period)
+        return self.db.fetch_all(f"""
+            SELECT 
+                s.name as stockist_name,
+                h.stockist_id,
+                h.{bucket} as period_start,
+                h.min_price,
+                h.max_price,
+                h.sum_price / h.quotes as avg_price,
+                h.quotes,
+                h.last_price
+            FROM {table} h
+            JOIN stockists s ON h.stockist_id = s.id
+            WHERE h.medicine_id = ?
+              AND h.{bucket} >= date('now', ?)
+            ORDER BY h.{bucket} ASC, h.min_price ASC
+        """, (medicine_id, f'-{days} days'))
@@ -0,0 +1,287 @@
+import csv
+import time
+from datetime import datetime
+from itertools import islice
+from typing import Callable, Dict, Iterable, Optional
+
+from models.database import Database
+
+
+# Header spellings seen in stockist price lists, mapped to our column names
+COLUMN_ALIASES = {
+    'medicine': 'medicine_name',
+    'name': 'medicine_name',
+    'product': 'medicine_name',
+    'product_name': 'medicine_name',
+    'item': 'medicine_name',
+    'company': 'company_name',
+    'manufacturer': 'company_name',
+    'mfr': 'company_name',
+    'generic': 'generic_name',
+    'stockist': 'stockist_name',
+    'supplier': 'stockist_name',
+    'rate': 'net_rate',
+    'discount': 'discount_percent',
+    'disc': 'discount_percent',
+    'disc_%': 'discount_percent',
+    'discount_%': 'discount_percent',
+    'status': 'paid_status',
+    'paid': 'paid_amount',
+    'date': 'purchase_date'
+}
+
+INSERT_PRICE = """
+    INSERT INTO medicine_prices
+    (medicine_id, stockist_id, net_rate, mrp, discount_percent,
+     final_price, paid_status, paid_amount, purchase_date)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, COALESCE(?, CURRENT_TIMESTAMP))
+"""
+
+# Keep only the first few bad rows in the report
+MAX_ERRORS = 20
+
+# Purchase date spellings accepted in price lists; day before month, as
+# Indian stockists write them
+DATE_FORMATS = (
+    '%Y-%m-%d %H:%M:%S',
+    '%Y-%m-%d %H:%M',
+    '%Y-%m-%d',
+    '%d/%m/%Y',
+    '%d-%m-%Y',
+    '%d.%m.%Y',
+    '%d/%m/%y',
+    '%d-%b-%Y',
+    '%d %b %Y'
+)
+
+
+def normalize_header(name: str) -> str:
+    """Map a price-list column header to a medicine_prices/medicines column"""
+    key = (name or '').strip().lower().replace(' ', '_').replace('-', '_')
+    return COLUMN_ALIASES.get(key, key)
+
+
+def read_price_file(path: str) -> Iterable[Dict]:
+    """Stream rows of a CSV price list as dicts with normalized keys
+
+    Comma, semicolon and tab separated exports (as written by Excel) are
+    detected from the first few kilobytes; a UTF-8 BOM is ignored.
+    """
+    with open(path, newline='', encoding='utf-8-sig') as f:
+        sample = f.read(8192)
+        f.seek(0)
+        try:
+            dialect = csv.Sniffer().sniff(sample, delimiters=',;\t')
+        except csv.Error:
+            dialect = csv.excel
+        reader = csv.reader(f, dialect)
+        header = [normalize_header(name) for name in next(reader, [])]
+        for values in reader:
+            if any(value.strip() for value in values):
+                yield dict(zip(header, values))
+
+
+def _number(value, default=None):
+    """Parse a price-list number, tolerating blanks, commas and % signs"""
+    if value is None:
+        return default
+    if isinstance(value, (int, float)):
+        return float(value)
+    text = str(value).strip().replace(',', '').rstrip('%')
+    if not text:
+        return default
+    return float(text)
+
+
+def _timestamp(value):
+    """Parse a price-list date into SQLite's timestamp format; None when blank"""
+    text = (value or '').strip()
+    if not text:
+        return None
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(text, fmt).strftime('%Y-%m-%d %H:%M:%S')
+        except ValueError:
+            pass
+    raise ValueError(f"unrecognised date: {text}")
+
+
+class PriceImporter:
+    """Bulk import of stockist price lists
+
+    Rows are processed in chunks; each chunk is one transaction in which
+    unknown medicines and stockists are created through name->id caches
+    and the prices are written with a single executemany. The per-row
+    path (add_medicine + add_medicine_price) commits twice per line.
+    A known medicine takes the generic name and category of a row that
+    gives different ones; blank columns leave them as they are.
+    """
+
+    def __init__(self, chunk_size: int = 5000):
+        self.db = Database()
+        self.chunk_size = chunk_size
+        self._medicine_ids = None
+        self._stockist_ids = None
+
+    def _load_caches(self, conn):
+        """Fill the name->id caches from the current tables
+
+        Medicines map to [id, generic_name, category] so changed details
+        are found without querying.
+        """
+        self._medicine_ids = {
+            (row['medicine_name'], row['company_name']):
+                [row['id'], row['generic_name'] or '', row['category'] or '']
+            for row in conn.execute(
+                "SELECT id, medicine_name, company_name, generic_name, category FROM medicines"
+            )
+        }
+        self._stockist_ids = {
+            row['name']: row['id']
+            for row in conn.execute("SELECT id, name FROM stockists")
+        }
+
+    def _medicine_id(self, conn, row: Dict) -> int:
+        """Id of the medicine named in row, inserting it if it is new
+
+        A known medicine is updated when row gives a different generic
+        name or category.
+        """
+        key = (row['medicine_name'].strip(), (row.get('company_name') or '').strip())
+        generic_name = (row.get('generic_name') or '').strip()
+        category = (row.get('category') or '').strip()
+        known = self._medicine_ids.get(key)
+        if known is None:
+            medicine_id = conn.execute("""
+                INSERT INTO medicines
+                (medicine_name, company_name, generic_name, category)
+                VALUES (?, ?, ?, ?)
+            """, (key[0], key[1], generic_name, category)).lastrowid
+            self._medicine_ids[key] = [medicine_id, generic_name, category]
+            self._report['medicines_created'] += 1
+            return medicine_id
+
+        medicine_id, old_generic, old_category = known
+        generic_name = generic_name or old_generic
+        category = category or old_category
+        if (generic_name, category) != (old_generic, old_category):
+            conn.execute(
+                "UPDATE medicines SET generic_name = ?, category = ? WHERE id = ?",
+                (generic_name, category, medicine_id)
+            )
+            known[1:] = [generic_name, category]
+            self._report['medicines_updated'] += 1
+        return medicine_id
+
+    def _stockist_id(self, conn, row: Dict, default: Optional[int]) -> int:
+        """Id of the stockist named in row, or the file-wide default"""
+        name = (row.get('stockist_name') or '').strip()
+        if not name:
+            if default is None:
+                raise ValueError("no stockist given")
+            return default
+        stockist_id = self._stockist_ids.get(name)
+        if stockist_id is None:
+            stockist_id = conn.execute(
+                "INSERT INTO stockists (name) VALUES (?)", (name,)
+            ).lastrowid
+            self._stockist_ids[name] = stockist_id
+            self._report['stockists_created'] += 1
+        return stockist_id
+
+    def _price_params(self, conn, row: Dict, stockist_id: Optional[int]) -> tuple:
+        """medicine_prices parameters for one price-list row
+
+        Every field is parsed before any stockist or medicine is created,
+        so a row skipped as invalid leaves nothing behind.
+        """
+        if not (row.get('medicine_name') or '').strip():
+            raise ValueError("missing medicine name")
+        mrp = _number(row.get('mrp'))
+        if mrp is None:
+            raise ValueError("missing MRP")
+        discount = _number(row.get('discount_percent'), 0.0)
+        final_price = mrp * (1 - discount / 100)
+        net_rate = _number(row.get('net_rate'), final_price)
+        paid_amount = _number(row.get('paid_amount'), 0.0)
+        purchase_date = _timestamp(row.get('purchase_date'))
+        stockist_id = self._stockist_id(conn, row, stockist_id)
+
+        return (
+            self._medicine_id(conn, row),
+            stockist_id,
+            net_rate,
+            mrp,
+            discount,
+            final_price,
+            (row.get('paid_status') or '').strip() or 'Unpaid',
+            paid_amount,
+            purchase_date
+        )
+
+    def import_rows(self, rows: Iterable[Dict], stockist_id: Optional[int] = None,
+                    progress: Optional[Callable[[Dict], None]] = None) -> Dict:
+        """Import price-list rows and return counts and throughput
+
+        stockist_id applies to rows without a stockist_name column. Bad
+        rows are skipped and listed (up to MAX_ERRORS) in the report.
+        """
+        self._report = {
+            'rows': 0,
+            'prices': 0,
+            'medicines_created': 0,
+            'medicines_updated': 0,
+            'stockists_created': 0,
+            'skipped': 0,
+            'errors': []
+        }
+        self._medicine_ids = None
+        self._stockist_ids = None
+        start = time.perf_counter()
+        rows = iter(rows)
+        line = 0
+
+        while True:
+            chunk = list(islice(rows, self.chunk_size))
+            if not chunk:
+                break
+
+            try:
+                with self.db.transaction() as conn:
+                    if self._medicine_ids is None:
+                        self._load_caches(conn)
+                    params = []
+                    for row in chunk:
+                        line += 1
+                        try:
+                            params.append(self._price_params(conn, row, stockist_id))
+                        except ValueError as e:
+                            self._report['skipped'] += 1
+                            if len(self._report['errors']) < MAX_ERRORS:
+                                self._report['errors'].append((line, str(e)))
+                    conn.executemany(INSERT_PRICE, params)
+                    self.db.invalidate('medicines', 'stockists', 'medicine_prices')
+            except Exception:
+                # Ids created in the rolled-back chunk are gone again
+                self._medicine_ids = None
+                self._stockist_ids = None
+                raise
+
+            self._report['rows'] = line
+            self._report['prices'] += len(params)
+            if progress:
+                progress(self._finish(start))
+
+        return self._finish(start)
+
+    def import_file(self, path: str, stockist_id: Optional[int] = None,
+                    progress: Optional[Callable[[Dict], None]] = None) -> Dict:
+        """Import a CSV (or Excel CSV export) price list"""
+        return self.import_rows(read_price_file(path), stockist_id, progress)
+
+    def _finish(self, start: float) -> Dict:
+        """Copy of the running report with elapsed time and rows/sec"""
+        report = dict(self._report)
+        report['seconds'] = round(time.perf_counter() - start, 3)
+        report['rows_per_sec'] = round(report['rows'] / report['seconds']) if report['seconds'] else 0
+        return report
@@ -0,0 +1,128 @@
+from collections import OrderedDict
+import functools
+import threading
+import time
+
+
+class CacheEntry:
+    """A cached result and the tables it was read from"""
+
+    __slots__ = ('value', 'tables', 'expires')
+
+    def __init__(self, value, tables, expires):
+        self.value = value
+        self.tables = tables
+        self.expires = expires
+
+
+class QueryCache:
+    """LRU + TTL cache of read results, invalidated per table
+
+    Every table has a version that invalidate() bumps, and clear() bumps
+    a generation shared by all tables. A reader notes the versions before
+    it queries and put() discards its result if any of its tables changed
+    meanwhile, so a read racing a write never caches the old rows.
+    """
+
+    def __init__(self, max_entries=256, ttl=60.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._versions = {}
+        self._generation = 0
+        self.stats = {
+            'hits': 0,
+            'misses': 0,
+            'expired': 0,
+            'evicted': 0,
+            'invalidated': 0
+        }
+
+    def get(self, key):
+        """Return (True, value) for a live entry, else (False, None)"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.expires < now:
+                del self._entries[key]
+                self.stats['expired'] += 1
+                entry = None
+            if entry is None:
+                self.stats['misses'] += 1
+                return False, None
+            self._entries.move_to_end(key)
+            self.stats['hits'] += 1
+            return True, entry.value
+
+    def _current(self, tables):
+        """Generation and versions of tables (lock must be held)"""
+        return (self._generation,) + tuple(self._versions.get(table, 0) for table in tables)
+
+    def versions(self, tables):
+        """Current versions of tables, to hand back to put()"""
+        with self._lock:
+            return self._current(tables)
+
+    def put(self, key, value, tables, versions):
+        """Store value unless one of its tables changed since versions was taken"""
+        with self._lock:
+            if versions != self._current(tables):
+                return
+            self._entries[key] = CacheEntry(value, frozenset(tables), time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.stats['evicted'] += 1
+
+    def invalidate(self, tables):
+        """Drop every entry read from any of tables"""
+        tables = set(tables)
+        with self._lock:
+            for table in tables:
+                self._versions[table] = self._versions.get(table, 0) + 1
+            stale = [key for key, entry in self._entries.items() if entry.tables & tables]
+            for key in stale:
+                del self._entries[key]
+            self.stats['invalidated'] += len(stale)
+
+    def clear(self):
+        """Drop every entry, including ones of reads still running"""
+        with self._lock:
+            self._entries.clear()
+            self._generation += 1
+
+    def get_stats(self):
+        """Cache counters plus the share of lookups served from memory"""
+        with self._lock:
+            stats = dict(self.stats)
+            stats['entries'] = len(self._entries)
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_ratio'] = round(stats['hits'] / lookups, 4) if lookups else 0.0
+        return stats
+
+
+def cached(*tables):
+    """Serve a model read method from Database.cache, keyed by its arguments
+
+    tables lists every table the result depends on; a write to any of
+    them (see Database.invalidate) drops the entry. Cached results are
+    shared between callers and must not be modified.
+    """
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            cache = self.db.cache
+            if cache is None:
+                return method(self, *args, **kwargs)
+
+            key = (method.__qualname__, args, tuple(sorted(kwargs.items())))
+            found, value = cache.get(key)
+            if found:
+                return value
+            versions = cache.versions(tables)
+            value = method(self, *args, **kwargs)
+            cache.put(key, value, tables, versions)
+            return value
+        return wrapper
+    return decorator
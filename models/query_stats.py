@@ -0,0 +1,218 @@
+from collections import OrderedDict, deque
+from datetime import datetime
+import hashlib
+import json
+import re
+import threading
+
+
+# Latency histogram bucket bounds in seconds (Prometheus "le" labels)
+BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+# Statements that can be passed to EXPLAIN QUERY PLAN
+EXPLAINABLE = ('SELECT', 'WITH', 'INSERT', 'UPDATE', 'DELETE', 'REPLACE')
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r'(?<![\w.])-?\d+(?:\.\d+)?\b')
+_IN_LIST = re.compile(r'\bIN\s*\(\s*\?(?:\s*,\s*\?)*\s*\)', re.IGNORECASE)
+_SPACE = re.compile(r'\s+')
+
+
+def normalize_sql(query):
+    """Statement shape with literals and IN lists folded to ?, whitespace collapsed
+
+    Calls differing only in their values share one histogram entry.
+    """
+    query = _STRING.sub('?', query)
+    query = _NUMBER.sub('?', query)
+    query = _IN_LIST.sub('IN (...)', query)
+    return _SPACE.sub(' ', query).strip()
+
+
+class StatementStats:
+    """Counters of one normalized statement"""
+
+    __slots__ = ('sql', 'calls', 'seconds', 'max_seconds', 'rows', 'steps', 'slow', 'buckets')
+
+    def __init__(self, sql):
+        self.sql = sql
+        self.calls = 0
+        self.seconds = 0.0
+        self.max_seconds = 0.0
+        self.rows = 0
+        self.steps = 0
+        self.slow = 0
+        self.buckets = [0] * len(BUCKETS)
+
+    def add(self, seconds, rows, steps):
+        self.calls += 1
+        self.seconds += seconds
+        self.max_seconds = max(self.max_seconds, seconds)
+        self.rows += max(rows, 0)
+        self.steps += steps
+        for index, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                self.buckets[index] += 1
+                break
+
+    def to_dict(self):
+        cumulative = 0
+        histogram = {}
+        for bound, count in zip(BUCKETS, self.buckets):
+            cumulative += count
+            histogram[str(bound)] = cumulative
+        histogram['+Inf'] = self.calls
+        return {
+            'id': statement_id(self.sql),
+            'sql': self.sql,
+            'calls': self.calls,
+            'total_ms': round(self.seconds * 1000, 3),
+            'mean_ms': round(self.seconds * 1000 / self.calls, 3) if self.calls else 0.0,
+            'max_ms': round(self.max_seconds * 1000, 3),
+            'rows': self.rows,
+            'vm_steps': self.steps,
+            'slow': self.slow,
+            'histogram': histogram
+        }
+
+
+def statement_id(sql):
+    """Short stable id of a normalized statement, for labels and log lines"""
+    return hashlib.sha1(sql.encode()).hexdigest()[:10]
+
+
+def _label(value):
+    """Escape a Prometheus label value"""
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', ' ')
+
+
+class QueryStats:
+    """Per-statement timing, row counts and a slow-query log
+
+    Database records every statement it runs here while instrumentation
+    is on (see Database.instrument). Statements are grouped by
+    normalize_sql; at most max_statements shapes are kept and the rest
+    are counted under '<other>'. Statements slower than slow_query_ms
+    go to a bounded log together with their EXPLAIN QUERY PLAN.
+    """
+
+    def __init__(self, slow_query_ms=100.0, max_statements=500, slow_log_size=100):
+        self.slow_query_ms = slow_query_ms
+        self.max_statements = max_statements
+        self._lock = threading.Lock()
+        self._statements = {}
+        self._normalized = OrderedDict()
+        self._plans = {}
+        self.slow_log = deque(maxlen=slow_log_size)
+        self.started = datetime.now()
+
+    def _normalize(self, query):
+        """normalize_sql with a small cache; model queries are string constants"""
+        sql = self._normalized.get(query)
+        if sql is None:
+            sql = self._normalized[query] = normalize_sql(query)
+            if len(self._normalized) > 1024:
+                self._normalized.popitem(last=False)
+        return sql
+
+    def record(self, query, seconds, rows=0, steps=0):
+        """Count one statement run; returns its normalized SQL if it was slow, else None"""
+        with self._lock:
+            sql = self._normalize(query)
+            entry = self._statements.get(sql)
+            if entry is None:
+                if len(self._statements) >= self.max_statements:
+                    sql = '<other>'
+                    entry = self._statements.get(sql)
+                if entry is None:
+                    entry = self._statements[sql] = StatementStats(sql)
+            entry.add(seconds, rows, steps)
+            if self.slow_query_ms is None or seconds * 1000 < self.slow_query_ms:
+                return None
+            entry.slow += 1
+            return sql
+
+    def needs_plan(self, sql):
+        """True until a query plan has been captured for sql"""
+        with self._lock:
+            return sql not in self._plans
+
+    def add_slow(self, sql, params, seconds, rows, plan=None):
+        """Append a slow statement to the log; plan is remembered per normalized SQL"""
+        if isinstance(params, dict):
+            params = {key: repr(value)[:60] for key, value in params.items()}
+        else:
+            params = [repr(value)[:60] for value in params or ()]
+        with self._lock:
+            if plan is not None:
+                self._plans[sql] = plan
+            self.slow_log.append({
+                'id': statement_id(sql),
+                'sql': sql,
+                'params': params,
+                'ms': round(seconds * 1000, 3),
+                'rows': rows,
+                'at': datetime.now().isoformat(timespec='milliseconds'),
+                'thread': threading.current_thread().name,
+                'plan': self._plans.get(sql, [])
+            })
+
+    def reset(self):
+        with self._lock:
+            self._statements.clear()
+            self._plans.clear()
+            self.slow_log.clear()
+            self.started = datetime.now()
+
+    def snapshot(self):
+        """Statements (slowest total first), the slow log and totals as plain data"""
+        with self._lock:
+            statements = [entry.to_dict() for entry in self._statements.values()]
+            slow = list(self.slow_log)
+        statements.sort(key=lambda entry: entry['total_ms'], reverse=True)
+        return {
+            'since': self.started.isoformat(timespec='seconds'),
+            'slow_query_ms': self.slow_query_ms,
+            'statements': statements,
+            'slow_queries': slow,
+            'totals': {
+                'calls': sum(entry['calls'] for entry in statements),
+                'total_ms': round(sum(entry['total_ms'] for entry in statements), 3),
+                'rows': sum(entry['rows'] for entry in statements),
+                'slow': sum(entry['slow'] for entry in statements)
+            }
+        }
+
+    def to_json(self, indent=2):
+        return json.dumps(self.snapshot(), indent=indent)
+
+    def to_prometheus(self, prefix='medicine_db'):
+        """Prometheus text exposition of the per-statement counters and histograms"""
+        snapshot = self.snapshot()
+        lines = [
+            f"# HELP {prefix}_query_seconds Time spent running SQL statements.",
+            f"# TYPE {prefix}_query_seconds histogram"
+        ]
+        for entry in snapshot['statements']:
+            labels = f'query_id="{entry["id"]}",sql="{_label(entry["sql"][:200])}"'
+            for bound, count in entry['histogram'].items():
+                lines.append(f'{prefix}_query_seconds_bucket{{{labels},le="{bound}"}} {count}')
+            lines.append(f"{prefix}_query_seconds_sum{{{labels}}} {entry['total_ms'] / 1000:.6f}")
+            lines.append(f"{prefix}_query_seconds_count{{{labels}}} {entry['calls']}")
+
+        for name, key, help_text in (
+            ('query_rows_total', 'rows', "Rows returned or changed by SQL statements."),
+            ('query_vm_steps_total', 'vm_steps', "SQLite VM steps counted by the progress handler."),
+            ('slow_queries_total', 'slow', "Statements slower than the slow-query threshold.")
+        ):
+            lines.append(f"# HELP {prefix}_{name} {help_text}")
+            lines.append(f"# TYPE {prefix}_{name} counter")
+            for entry in snapshot['statements']:
+                lines.append(f'{prefix}_{name}{{query_id="{entry["id"]}"}} {entry[key]}')
+        return '\n'.join(lines) + '\n'
+
+    def write(self, path):
+        """Write the stats to path: Prometheus text for .prom/.txt, else JSON"""
+        text = self.to_prometheus() if path.endswith(('.prom', '.txt')) else self.to_json()
+        with open(path, 'w') as f:
+            f.write(text)
@@ -0,0 +1,57 @@
+from collections import namedtuple
+import sys
+import threading
+from typing import Dict, Sequence, Tuple
+
+
+_row_types: Dict[Tuple[str, ...], type] = {}
+_row_types_lock = threading.Lock()
+
+
+def _intern(value):
+    """Share one copy of repeated strings such as medicine and stockist names"""
+    return sys.intern(value) if type(value) is str else value
+
+
+def row_type(columns: Sequence[str]) -> type:
+    """Compact row class for a result with the given columns, cached per column list
+
+    Rows are named tuples without a per-instance __dict__. They also
+    answer row['column'] and row.get('column', default) so views written
+    against dict rows work with them unchanged.
+    """
+    columns = tuple(columns)
+    cls = _row_types.get(columns)
+    if cls is not None:
+        return cls
+
+    base = namedtuple('CompactRow', columns, rename=True)
+    fields = dict(zip(columns, range(len(columns))))
+
+    class CompactRow(base):
+        __slots__ = ()
+        _columns = fields
+
+        def __getitem__(self, key):
+            if type(key) is str:
+                return tuple.__getitem__(self, self._columns[key])
+            return tuple.__getitem__(self, key)
+
+        def get(self, key, default=None):
+            index = self._columns.get(key)
+            return default if index is None else tuple.__getitem__(self, index)
+
+        def keys(self):
+            return self._columns.keys()
+
+        def to_dict(self):
+            return dict(zip(self._columns, self))
+
+    with _row_types_lock:
+        return _row_types.setdefault(columns, CompactRow)
+
+
+def compact_row_factory(cursor, values):
+    """sqlite3 row factory producing CompactRow instances"""
+    cls = row_type([column[0] for column in cursor.description])
+    return cls._make([_intern(value) for value in values])
@@ -0,0 +1,179 @@
+from collections import OrderedDict
+import re
+import sys
+import threading
+
+
+# Tables a search result is read from
+SEARCH_TABLES = ('medicines', 'medicine_prices', 'stockists')
+
+# Row fields a search term is matched against
+SEARCH_FIELDS = ('medicine_name', 'generic_name', 'company_name')
+
+
+def result_size(rows):
+    """Rough size in bytes of a result list, its rows and their values
+
+    Values shared between rows (interned names, small ints) count once.
+    """
+    size = sys.getsizeof(rows)
+    seen = set()
+    for row in rows:
+        size += sys.getsizeof(row)
+        for value in (row.values() if isinstance(row, dict) else row):
+            if id(value) not in seen:
+                seen.add(id(value))
+                size += sys.getsizeof(value)
+    return size
+
+
+def like_matcher(term):
+    """Predicate on lower-cased text matching LIKE '%term%' (% and _ are wildcards)"""
+    if '%' not in term and '_' not in term:
+        return lambda text: term in text
+    pattern = re.compile(
+        ''.join('.*' if c == '%' else '.' if c == '_' else re.escape(c) for c in term),
+        re.DOTALL
+    )
+    return lambda text: pattern.search(text) is not None
+
+
+def refine(rows, term):
+    """Rows of a shorter term's result that also match term, in their original order
+
+    Matching follows the LIKE fallback of MedicineModel._search, whose
+    results are ordered by name, so the refined rows come out in the same
+    order a fresh query would return them.
+    """
+    matches = like_matcher(term)
+    return [
+        row for row in rows
+        if any(matches((row.get(field) or '').lower()) for field in SEARCH_FIELDS)
+    ]
+
+
+class SearchEntry:
+    __slots__ = ('rows', 'size', 'versions')
+
+    def __init__(self, rows, size, versions):
+        self.rows = rows
+        self.size = size
+        self.versions = versions
+
+
+class SearchResultCache:
+    """Bounded per-term cache of search results with prefix refinement
+
+    With refine, used for the LIKE search whose results are ordered by
+    name, a cached term that is a prefix of the new one of three or more
+    characters has its rows filtered in memory instead of querying
+    again. BM25-ranked FTS results are not refined, as their order
+    depends on the whole term. Entries remember the table versions of
+    Database.cache when they were read; any write to the search tables
+    bumps those versions and the entry is dropped on its next lookup.
+    """
+
+    def __init__(self, db, max_entries=128, max_bytes=16 * 1024 * 1024):
+        self.db = db
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self.stats = {
+            'hits': 0,
+            'refined': 0,
+            'misses': 0,
+            'evicted': 0,
+            'invalidated': 0
+        }
+
+    def _drop(self, key):
+        entry = self._entries.pop(key)
+        self._bytes -= entry.size
+
+    def _live(self, key, versions):
+        """Entry for key if its tables are unchanged (lock must be held)"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry.versions != versions:
+            self._drop(key)
+            self.stats['invalidated'] += 1
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def versions(self):
+        """Current versions of the search tables, to hand back to put()
+
+        None while Database.cache is off, which turns this cache off too.
+        The QueryCache itself is part of the key, so reconfiguring the
+        database never matches versions of the old one.
+        """
+        cache = self.db.cache
+        if cache is None:
+            return None
+        return (cache,) + cache.versions(SEARCH_TABLES)
+
+    def get(self, term, compact, refine_prefix=True):
+        """Cached (or, with refine_prefix, refined) rows for term, or None on a miss"""
+        term = term.lower()
+        versions = self.versions()
+        if versions is None:
+            if self._entries:
+                self.clear()
+            return None
+        with self._lock:
+            entry = self._live((term, compact), versions)
+            if entry is not None:
+                self.stats['hits'] += 1
+                return entry.rows
+
+            # Longest cached prefix of term that matched as a substring
+            base = None
+            for length in range(len(term) - 1 if refine_prefix else 0, 2, -1):
+                base = self._live((term[:length], compact), versions)
+                if base is not None:
+                    break
+            if base is None:
+                self.stats['misses'] += 1
+                return None
+            self.stats['refined'] += 1
+
+        rows = refine(base.rows, term)
+        self.put(term, compact, rows, versions)
+        return rows
+
+    def put(self, term, compact, rows, versions):
+        """Store rows unless the search tables changed since versions was taken"""
+        if versions is None or versions != self.versions():
+            return
+        key = (term.lower(), compact)
+        entry = SearchEntry(rows, result_size(rows), versions)
+        if entry.size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = entry
+            self._bytes += entry.size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._drop(next(iter(self._entries)))
+                self.stats['evicted'] += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def get_stats(self):
+        """Counters, the share of lookups answered from memory and bytes held"""
+        with self._lock:
+            stats = dict(self.stats)
+            stats['entries'] = len(self._entries)
+            stats['bytes'] = self._bytes
+        lookups = stats['hits'] + stats['refined'] + stats['misses']
+        served = stats['hits'] + stats['refined']
+        stats['hit_ratio'] = round(served / lookups, 4) if lookups else 0.0
+        return stats
@@ -1,11 +1,30 @@
 from models.database import Database
-from typing import List, Dict
+from models.query_cache import cached
+from typing import List, Dict, Iterator
+
+
+# Price rows of one stockist, newest first
+STOCKIST_MEDICINES_QUERY = """
+    SELECT 
+        m.medicine_name,
+        m.company_name,
+        mp.net_rate,
+        mp.mrp,
+        mp.discount_percent,
+        mp.final_price,
+        mp.purchase_date
+    FROM medicine_prices mp
+    JOIN medicines m ON mp.medicine_id = m.id
+    WHERE mp.stockist_id = ?
+    ORDER BY mp.purchase_date DESC
+"""
 
 
 class StockistModel:
     def __init__(self):
         self.db = Database()
     
+    @cached('stockists')
     def get_all_stockists(self) -> List[Dict]:
         """Get all stockists"""
         return self.db.fetch_all("""
@@ -16,7 +35,7 @@ class StockistModel:
     
     def add_stockist(self, stockist_data: Dict) -> int:
         """Add new stockist"""
-        return self.db.insert("""
+        stockist_id = self.db.insert("""
             INSERT INTO stockists (name, contact, address, gst_no)
             VALUES (?, ?, ?, ?)
         """, (
@@ -25,20 +44,17 @@ class StockistModel:
             stockist_data.get('address', ''),
             stockist_data.get('gst_no', '')
         ))
+        self.db.invalidate('stockists')
+        return stockist_id
     
     def get_stockist_medicines(self, stockist_id: int) -> List[Dict]:
-        """Get all medicines from a specific stockist"""
-        return self.db.fetch_all("""
-            SELECT 
-                m.medicine_name,
-                m.company_name,
-                mp.net_rate,
-                mp.mrp,
-                mp.discount_percent,
-                mp.final_price,
-                mp.purchase_date
-            FROM medicine_prices mp
-            JOIN medicines m ON mp.medicine_id = m.id
-            WHERE mp.stockist_id = ?
-            ORDER BY mp.purchase_date DESC
-        """, (stockist_id,))
\ No newline at end of file
+        """Get all medicines from a specific stockist
+        
+        Not cached: a listing can be any size and callers may change the
+        dicts; use iter_stockist_medicines for large stockists.
+        """
+        return self.db.fetch_all(STOCKIST_MEDICINES_QUERY, (stockist_id,))
+    
+    def iter_stockist_medicines(self, stockist_id: int, chunk_size: int = 1000) -> Iterator[List[Dict]]:
+        """Stream the medicines of a stockist in chunks"""
+        return self.db.iter_chunks(STOCKIST_MEDICINES_QUERY, (stockist_id,), chunk_size)
@@ -0,0 +1,69 @@
+import os
+import sqlite3
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database.init_db import init_database
+from database.migrations import BEST_PRICE_RECOMPUTE, COUNTER_RECOMPUTE, _rollup_recompute
+from models.database import Database
+
+# Tables the triggers keep in step with the base tables
+DERIVED_TABLES = (
+    'stats_counters',
+    'medicine_name_counts',
+    'medicine_best_price',
+    'price_history_daily',
+    'price_history_weekly'
+)
+
+
+def snapshot(conn, tables=DERIVED_TABLES):
+    """Sorted rows of tables, floats rounded so running sums compare equal"""
+    result = {}
+    for table in tables:
+        rows = conn.execute(f"SELECT * FROM {table}").fetchall()
+        result[table] = sorted(
+            tuple(round(value, 6) if isinstance(value, float) else value for value in row)
+            for row in rows
+        )
+    return result
+
+
+def recomputed(conn):
+    """Snapshot of the derived tables rebuilt from scratch; the database is left unchanged"""
+    conn.execute("SAVEPOINT recompute")
+    try:
+        for statement in COUNTER_RECOMPUTE + BEST_PRICE_RECOMPUTE + _rollup_recompute():
+            conn.execute(statement)
+        return snapshot(conn)
+    finally:
+        conn.execute("ROLLBACK TO recompute")
+        conn.execute("RELEASE recompute")
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    """A migrated database with the sample data"""
+    path = str(tmp_path / 'medicines.db')
+    init_database(path, verbose=False, seed=True)
+    return path
+
+
+@pytest.fixture
+def conn(db_path):
+    """A plain connection to db_path"""
+    connection = sqlite3.connect(db_path)
+    yield connection
+    connection.close()
+
+
+@pytest.fixture
+def db(db_path):
+    """The Database manager pointed at db_path with the read cache on"""
+    database = Database()
+    database.configure(db_path=db_path, cache_size=256)
+    yield database
+    database.close()
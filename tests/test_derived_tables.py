@@ -0,0 +1,84 @@
+from conftest import recomputed, snapshot
+from models.medicine_model import MedicineModel
+from models.stockist_model import StockistModel
+
+
+def add_price(conn, medicine_id, stockist_id, final_price, purchase_date='2026-03-02 10:00:00'):
+    return conn.execute("""
+        INSERT INTO medicine_prices
+        (medicine_id, stockist_id, net_rate, mrp, discount_percent, final_price, purchase_date)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+    """, (medicine_id, stockist_id, final_price, final_price * 1.25, 10.0,
+          final_price, purchase_date)).lastrowid
+
+
+def test_seeded_tables_match_a_rebuild(conn):
+    assert snapshot(conn) == recomputed(conn)
+
+
+def test_price_writes_keep_best_price_and_rollups_in_step(conn):
+    with conn:
+        cheapest = add_price(conn, 1, 1, 0.25)
+        add_price(conn, 1, 2, 0.25)                        # tie keeps the older quote
+        add_price(conn, 1, 3, 7.5, '2026-03-04 09:00:00')  # same week, next day
+        add_price(conn, 2, 1, 3.5, 'unknown')              # no rollup bucket
+        moved = add_price(conn, 2, 4, 1.75)
+    assert snapshot(conn) == recomputed(conn)
+    best = conn.execute(
+        "SELECT price_id, stockist_id FROM medicine_best_price WHERE medicine_id = 1"
+    ).fetchone()
+    assert best == (cheapest, 1)
+
+    with conn:
+        conn.execute("UPDATE medicine_prices SET final_price = 9.5 WHERE id = ?", (cheapest,))
+        conn.execute("UPDATE medicine_prices SET medicine_id = 3 WHERE id = ?", (moved,))
+        conn.execute("UPDATE medicine_prices SET purchase_date = '2026-02-20 08:00:00' "
+                     "WHERE medicine_id = 4")
+    assert snapshot(conn) == recomputed(conn)
+
+    with conn:
+        conn.execute("DELETE FROM medicine_prices WHERE medicine_id = 5")
+        conn.execute("DELETE FROM medicines WHERE id = 5")
+        conn.execute("DELETE FROM medicine_prices WHERE id IN (SELECT id FROM medicine_prices "
+                     "WHERE medicine_id = 6 ORDER BY final_price LIMIT 1)")
+    assert snapshot(conn) == recomputed(conn)
+    assert conn.execute(
+        "SELECT COUNT(*) FROM medicine_best_price WHERE medicine_id = 5"
+    ).fetchone()[0] == 0
+
+
+def test_counter_writes_keep_counters_in_step(conn):
+    with conn:
+        name = conn.execute("SELECT medicine_name FROM medicines WHERE id = 1").fetchone()[0]
+        conn.execute("INSERT INTO medicines (medicine_name, company_name) VALUES (?, 'Other Co')",
+                     (name,))
+        conn.execute("INSERT INTO medicines (medicine_name, company_name) VALUES ('New One', 'X')")
+        conn.execute("UPDATE medicines SET medicine_name = 'Renamed' WHERE id = 2")
+        conn.execute("UPDATE medicines SET medicine_name = ? WHERE id = 3", (name,))
+        conn.execute("INSERT INTO stockists (name) VALUES ('Corner Pharmacy')")
+        conn.execute("""
+            INSERT INTO purchases
+            (medicine_name, selected_stockist, selected_price, lowest_price, savings)
+            VALUES ('New One', 'Corner Pharmacy', 10.5, 9.25, -1.25)
+        """)
+        conn.execute("UPDATE purchases SET savings = savings + 2.5 WHERE id = 1")
+        conn.execute("DELETE FROM purchases WHERE id = 2")
+    assert snapshot(conn) == recomputed(conn)
+
+
+def test_counters_and_aggregates_give_the_same_dashboard(db):
+    medicines = MedicineModel()
+    stockist_id = StockistModel().add_stockist({'name': 'Corner Pharmacy'})
+    medicine_id = medicines.add_medicine({
+        'medicine_name': 'Paracetamol 650mg',
+        'company_name': 'Micro Labs',
+        'generic_name': 'Paracetamol'
+    })
+    medicines.add_medicine_price(medicine_id, {
+        'stockist_id': stockist_id, 'net_rate': 20.0, 'mrp': 30.0, 'discount_percent': 10
+    })
+    medicines.record_purchase('Paracetamol 650mg', 'Corner Pharmacy', 27.0, 25.0)
+
+    counters = medicines.get_dashboard_stats(use_counters=True)
+    aggregates = medicines.get_dashboard_stats(use_counters=False)
+    assert counters == aggregates
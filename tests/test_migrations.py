@@ -0,0 +1,63 @@
+import sqlite3
+from contextlib import closing
+
+import pytest
+
+from conftest import DERIVED_TABLES, recomputed, snapshot
+from database.init_db import init_database, insert_sample_data
+from database.migrations import (
+    MIGRATIONS, SCHEMA_VERSION, _run_migration, apply_migrations, schema_version,
+    triggers_suspended
+)
+
+BASE_TABLES = ('stockists', 'medicines', 'medicine_prices', 'purchases')
+
+
+def schema(conn):
+    return sorted(conn.execute(
+        "SELECT type, name, sql FROM sqlite_master WHERE name NOT LIKE 'sqlite_%'"
+    ).fetchall())
+
+
+def test_init_database_twice_changes_nothing(db_path):
+    conn = sqlite3.connect(db_path)
+    try:
+        before = (schema(conn), snapshot(conn, BASE_TABLES + DERIVED_TABLES))
+        init_database(db_path, verbose=False, seed=True)
+        assert schema_version(conn) == SCHEMA_VERSION
+        assert (schema(conn), snapshot(conn, BASE_TABLES + DERIVED_TABLES)) == before
+    finally:
+        conn.close()
+
+
+def test_up_to_date_database_applies_nothing(conn):
+    assert apply_migrations(conn) == (SCHEMA_VERSION, SCHEMA_VERSION)
+
+
+def test_rerunning_every_migration_keeps_schema_and_rows(conn):
+    before = (schema(conn), snapshot(conn, BASE_TABLES + DERIVED_TABLES))
+    with triggers_suspended(conn):
+        pass
+    assert (schema(conn), snapshot(conn, BASE_TABLES + DERIVED_TABLES)) == before
+
+
+@pytest.mark.parametrize('version', range(1, SCHEMA_VERSION))
+def test_upgrade_backfills_rows_written_by_an_older_schema(tmp_path, version):
+    fresh = str(tmp_path / 'fresh.db')
+    init_database(fresh, verbose=False)
+    conn = sqlite3.connect(str(tmp_path / 'old.db'))
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        for name, statements in MIGRATIONS[:version]:
+            _run_migration(conn, name, statements)
+        conn.execute(f"PRAGMA user_version = {version}")
+        conn.commit()
+        insert_sample_data(conn.cursor())
+        conn.commit()
+
+        assert apply_migrations(conn) == (version, SCHEMA_VERSION)
+        with closing(sqlite3.connect(fresh)) as expected:
+            assert schema(conn) == schema(expected)
+        assert snapshot(conn) == recomputed(conn)
+    finally:
+        conn.close()
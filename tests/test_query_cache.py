@@ -0,0 +1,90 @@
+from models.query_cache import QueryCache
+from models.stockist_model import StockistModel
+
+
+def put(cache, key, value, tables):
+    cache.put(key, value, tables, cache.versions(tables))
+
+
+def test_put_then_get():
+    cache = QueryCache()
+    put(cache, 'stockists', ['a'], ('stockists',))
+    assert cache.get('stockists') == (True, ['a'])
+    assert cache.get('medicines') == (False, None)
+
+
+def test_invalidate_drops_only_entries_read_from_those_tables():
+    cache = QueryCache()
+    put(cache, 'stockists', 1, ('stockists',))
+    put(cache, 'prices', 2, ('medicine_prices', 'stockists'))
+    put(cache, 'medicines', 3, ('medicines',))
+    cache.invalidate(['stockists'])
+    assert cache.get('stockists') == (False, None)
+    assert cache.get('prices') == (False, None)
+    assert cache.get('medicines') == (True, 3)
+    assert cache.get_stats()['invalidated'] == 2
+
+
+def test_result_read_before_a_write_is_not_stored():
+    cache = QueryCache()
+    versions = cache.versions(('stockists',))
+    cache.invalidate(['stockists'])
+    cache.put('stockists', 'old rows', ('stockists',), versions)
+    assert cache.get('stockists') == (False, None)
+
+
+def test_clear_also_rejects_reads_started_before_it():
+    cache = QueryCache()
+    put(cache, 'stockists', 1, ('stockists',))
+    versions = cache.versions(('stockists',))
+    cache.clear()
+    assert cache.get('stockists') == (False, None)
+    cache.put('stockists', 'old rows', ('stockists',), versions)
+    assert cache.get('stockists') == (False, None)
+
+
+def test_expired_entry_is_a_miss():
+    cache = QueryCache(ttl=-1)
+    put(cache, 'stockists', 1, ('stockists',))
+    assert cache.get('stockists') == (False, None)
+    assert cache.get_stats()['expired'] == 1
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = QueryCache(max_entries=2)
+    put(cache, 'a', 1, ('medicines',))
+    put(cache, 'b', 2, ('medicines',))
+    cache.get('a')
+    put(cache, 'c', 3, ('medicines',))
+    assert cache.get('b') == (False, None)
+    assert cache.get('a') == (True, 1)
+    assert cache.get_stats()['evicted'] == 1
+
+
+def test_model_write_invalidates_cached_read(db):
+    stockists = StockistModel()
+    before = stockists.get_all_stockists()
+    assert stockists.get_all_stockists() is before
+
+    stockists.add_stockist({'name': 'Corner Pharmacy'})
+    after = stockists.get_all_stockists()
+    assert len(after) == len(before) + 1
+    assert 'Corner Pharmacy' in [row['name'] for row in after]
+
+
+def test_invalidation_inside_a_transaction_waits_for_the_commit(db):
+    stockists = StockistModel()
+    before = stockists.get_all_stockists()
+    with db.transaction() as conn:
+        conn.execute("INSERT INTO stockists (name) VALUES ('Corner Pharmacy')")
+        db.invalidate('stockists')
+        # Other threads would still see the old rows until the commit
+        assert stockists.get_all_stockists() is before
+    assert len(stockists.get_all_stockists()) == len(before) + 1
+
+
+def test_schema_changed_drops_cached_reads(db):
+    stockists = StockistModel()
+    before = stockists.get_all_stockists()
+    db.schema_changed()
+    assert stockists.get_all_stockists() is not before
@@ -0,0 +1,101 @@
+import pytest
+
+from models.medicine_model import MedicineModel
+from models.search_cache import like_matcher, refine
+
+ROWS = [
+    {'medicine_name': 'Crocin 500', 'generic_name': 'Paracetamol', 'company_name': 'GSK'},
+    {'medicine_name': 'Dolo 650', 'generic_name': 'Paracetamol', 'company_name': 'Micro Labs'},
+    {'medicine_name': 'Pantop 40', 'generic_name': None, 'company_name': 'Aristo'},
+    {'medicine_name': 'Para_Kid', 'generic_name': '', 'company_name': 'Cipla (India)'}
+]
+
+
+def names(rows):
+    return [row['medicine_name'] for row in rows]
+
+
+@pytest.mark.parametrize('term, expected', [
+    ('parac', ['Crocin 500', 'Dolo 650']),
+    ('micro', ['Dolo 650']),
+    ('pan', ['Pantop 40']),
+    ('(india)', ['Para_Kid']),
+    ('zzz', [])
+])
+def test_refine_filters_by_substring_keeping_order(term, expected):
+    assert names(refine(ROWS, term)) == expected
+
+
+@pytest.mark.parametrize('term, expected', [
+    ('pa_a', ['Crocin 500', 'Dolo 650', 'Para_Kid']),
+    ('p%40', ['Pantop 40']),
+    ('a_k', ['Para_Kid']),
+    ('.', [])
+])
+def test_refine_treats_percent_and_underscore_as_like_wildcards(term, expected):
+    assert names(refine(ROWS, term)) == expected
+
+
+def test_like_matcher_anchors_nothing():
+    matches = like_matcher('o%0')
+    assert matches('dolo 650')
+    assert not matches('pantop')
+
+
+@pytest.fixture
+def like_search(db):
+    """Database without the FTS tables, so searches take the LIKE path"""
+    with db.transaction() as conn:
+        triggers = conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'trigger' AND instr(sql, '_fts') > 0"
+        ).fetchall()
+        for row in triggers:
+            conn.execute(f"DROP TRIGGER {row['name']}")
+        conn.execute("DROP TABLE medicines_fts")
+        conn.execute("DROP TABLE medicines_prefix_fts")
+    db.schema_changed()
+    return MedicineModel()
+
+
+@pytest.mark.parametrize('prefix, term', [
+    ('par', 'para'),
+    ('par', 'paracetamol'),
+    ('amo', 'amox'),
+    ('pa_', 'pa_a'),
+    ('a%o', 'a%ol'),
+    ('cip', 'cipla')
+])
+def test_refined_search_equals_a_fresh_like_query(like_search, prefix, term):
+    like_search.search_lowest_price(prefix)
+    refined = like_search.search_lowest_price(term)
+    assert like_search.search_cache.get_stats()['refined'] == 1
+    assert refined == like_search._search(term)
+
+
+def test_fts_results_are_not_refined(db):
+    medicines = MedicineModel()
+    medicines.search_lowest_price('par')
+    assert medicines.search_lowest_price('para') == medicines._search('para')
+    stats = medicines.search_cache.get_stats()
+    assert (stats['refined'], stats['misses']) == (0, 2)
+
+
+def test_write_to_a_search_table_drops_cached_results(like_search):
+    before = like_search.search_lowest_price('para')
+    stockist_id = like_search.db.fetch_one("SELECT MIN(id) as id FROM stockists")['id']
+    medicine_id = like_search.add_medicine({
+        'medicine_name': 'Paracip 500', 'company_name': 'Cipla', 'generic_name': 'Paracetamol'
+    })
+    like_search.add_medicine_price(medicine_id, {
+        'stockist_id': stockist_id, 'net_rate': 10.0, 'mrp': 12.0
+    })
+    after = like_search.search_lowest_price('parac')
+    assert 'Paracip 500' in names(after)
+    assert len(after) == len(refine(before, 'parac')) + 1
+
+
+def test_full_reload_drops_cached_results(like_search):
+    like_search.search_lowest_price('para')
+    like_search.db.cache.clear()
+    like_search.search_lowest_price('para')
+    assert like_search.search_cache.get_stats()['hits'] == 0
@@ -0,0 +1,91 @@
+from array import array
+from typing import Dict, Iterable, List, Optional
+
+
+class SearchIndex:
+    """In-memory trigram and word-prefix index over a list of row dicts
+    
+    Row ids are positions in the list passed to build()/add(). Terms of
+    three or more characters match as substrings: the two rarest trigram
+    posting lists are intersected and the survivors are verified against
+    the row text. Shorter terms match the start of any word.
+    """
+    
+    def __init__(self, fields=('medicine_name', 'company_name', 'generic_name')):
+        self.fields = fields
+        self._texts: List[str] = []
+        self._trigrams: Dict[str, array] = {}
+        self._prefixes: Dict[str, array] = {}
+        self._last_term: Optional[str] = None
+        self._last_result: List[int] = []
+    
+    def __len__(self):
+        return len(self._texts)
+    
+    def build(self, rows: Iterable[Dict]):
+        """Rebuild the index from scratch"""
+        self._texts = []
+        self._trigrams = {}
+        self._prefixes = {}
+        self._last_term = None
+        for row in rows:
+            self.add(row)
+    
+    def add(self, row: Dict) -> int:
+        """Index one more row and return its row id"""
+        row_id = len(self._texts)
+        values = [(row.get(field) or '').lower() for field in self.fields]
+        self._texts.append('\x00'.join(values))
+        
+        grams = set()
+        prefixes = set()
+        for value in values:
+            grams.update(value[i:i + 3] for i in range(len(value) - 2))
+            for word in value.split():
+                prefixes.add(word[:1])
+                prefixes.add(word[:2])
+        
+        for postings, keys in ((self._trigrams, grams), (self._prefixes, prefixes)):
+            for key in keys:
+                posting = postings.get(key)
+                if posting is None:
+                    posting = postings[key] = array('i')
+                posting.append(row_id)
+        
+        self._last_term = None
+        return row_id
+    
+    def search(self, term: str) -> Optional[List[int]]:
+        """Row ids matching term in ascending order, or None for an empty term"""
+        term = term.lower().strip()
+        if not term:
+            return None
+        
+        if len(term) < 3:
+            return list(self._prefixes.get(term, ()))
+        
+        # Typing one more character only narrows the previous result
+        if self._last_term and term.startswith(self._last_term):
+            candidates = self._last_result
+        else:
+            candidates = self._candidates(term)
+        
+        texts = self._texts
+        result = [row_id for row_id in candidates if term in texts[row_id]]
+        self._last_term = term
+        self._last_result = result
+        return result
+    
+    def _candidates(self, term: str) -> List[int]:
+        """Rows containing the two rarest trigrams of term"""
+        postings = []
+        for i in range(len(term) - 2):
+            posting = self._trigrams.get(term[i:i + 3])
+            if posting is None:
+                return []
+            postings.append(posting)
+        
+        postings.sort(key=len)
+        if len(postings) == 1:
+            return list(postings[0])
+        return sorted(set(postings[0]).intersection(postings[1]))
\ No newline at end of file
@@ -5,14 +5,17 @@ from PyQt5.QtWidgets import (
 from PyQt5.QtCore import pyqtSignal, Qt
 from PyQt5.QtGui import QFont
 
+from views.components.future_watcher import FutureWatcher
+
 
 class AddMedicineView(QWidget):
-    medicine_added = pyqtSignal()
+    medicine_added = pyqtSignal(int)
     back_to_dashboard = pyqtSignal()
     
     def __init__(self, controller):
         super().__init__()
         self.controller = controller
+        self.watcher = FutureWatcher(controller, self)
         self.stockists = []
         self.setup_ui()
     
@@ -110,18 +113,23 @@ class AddMedicineView(QWidget):
         self.setLayout(main_layout)
     
     def load_stockists(self):
-        """Load stockists into combo box"""
-        try:
-            self.stockists = self.controller.get_all_stockists()
-            self.stockist_combo.clear()
-            
-            if self.stockists:
-                for stockist in self.stockists:
-                    self.stockist_combo.addItem(stockist['name'], stockist['id'])
-            else:
-                self.stockist_combo.addItem("No stockists available")
-        except Exception as e:
-            QMessageBox.warning(self, "Error", f"Failed to load stockists: {str(e)}")
+        """Load stockists into combo box in the background"""
+        self.watcher.watch(
+            self.controller.get_all_stockists_async(),
+            self.display_stockists,
+            lambda e: QMessageBox.warning(self, "Error", f"Failed to load stockists: {str(e)}")
+        )
+    
+    def display_stockists(self, stockists):
+        """Fill the stockist combo box"""
+        self.stockists = stockists
+        self.stockist_combo.clear()
+        
+        if self.stockists:
+            for stockist in self.stockists:
+                self.stockist_combo.addItem(stockist['name'], stockist['id'])
+        else:
+            self.stockist_combo.addItem("No stockists available")
     
     def on_add_medicine(self):
         """Add new medicine"""
@@ -151,10 +159,10 @@ class AddMedicineView(QWidget):
                 'quantity': self.quantity_input.value()
             }
             
-            self.controller.add_new_medicine(medicine_data, price_data)
+            medicine_id = self.controller.add_new_medicine(medicine_data, price_data)
             QMessageBox.information(self, "Success", "Medicine added successfully!")
             self.clear_form()
-            self.medicine_added.emit()
+            self.medicine_added.emit(medicine_id)
         except Exception as e:
             QMessageBox.critical(self, "Error", f"Failed to add medicine: {str(e)}")
     
@@ -0,0 +1,44 @@
+from PyQt5.QtWidgets import QWidget, QHBoxLayout, QLabel
+
+
+class DealItem(QWidget):
+    """One row of the best deals list, relabelled in place on refresh"""
+    
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        layout = QHBoxLayout(self)
+        layout.setContentsMargins(10, 5, 10, 5)
+        
+        self.name_label = QLabel()
+        self.name_label.setObjectName("dealName")
+        
+        self.price_label = QLabel()
+        self.price_label.setObjectName("dealPrice")
+        
+        self.savings_label = QLabel()
+        self.savings_label.setObjectName("dealSavings")
+        
+        self.stockist_label = QLabel()
+        self.stockist_label.setObjectName("dealStockist")
+        
+        layout.addWidget(self.name_label)
+        layout.addStretch()
+        layout.addWidget(self.price_label)
+        layout.addWidget(self.savings_label)
+        layout.addWidget(self.stockist_label)
+        
+        self.deal = None
+    
+    def set_deal(self, deal):
+        """Show deal, touching only the labels whose text changed"""
+        if deal == self.deal:
+            return
+        self.deal = deal
+        for label, text in (
+            (self.name_label, f"💊 {deal['medicine_name']}"),
+            (self.price_label, f"₹{deal['price']:.2f}"),
+            (self.savings_label, f"Save ₹{deal['savings']:.2f}"),
+            (self.stockist_label, f"at {deal['stockist_name']}")
+        ):
+            if label.text() != text:
+                label.setText(text)
@@ -0,0 +1,42 @@
+from PyQt5.QtCore import QObject, pyqtSignal
+
+
+class FutureWatcher(QObject):
+    """Deliver controller futures back to the GUI thread
+    
+    Results of cancelled or superseded tasks are dropped, so a slow query
+    can never overwrite what a newer one already displayed.
+    """
+    
+    _finished = pyqtSignal(object, object, object)
+    _relayed = pyqtSignal(object, object)
+    
+    def __init__(self, controller, parent=None):
+        super().__init__(parent)
+        self.controller = controller
+        self._finished.connect(self._deliver)
+        self._relayed.connect(self._call)
+    
+    def relay(self, callback):
+        """Wrap callback so worker threads can call it; it runs on the GUI thread"""
+        return lambda *args: self._relayed.emit(callback, args)
+    
+    def watch(self, future, on_result, on_error=None):
+        """Call on_result (or on_error) on the GUI thread when future finishes"""
+        future.add_done_callback(lambda f: self._finished.emit(f, on_result, on_error))
+        return future
+    
+    def _call(self, callback, args):
+        callback(*args)
+    
+    def _deliver(self, future, on_result, on_error):
+        if future.cancelled() or self.controller.is_stale(future):
+            return
+        
+        error = future.exception()
+        if error is not None:
+            if on_error is not None:
+                on_error(error)
+            return
+        
+        on_result(future.result())
\ No newline at end of file
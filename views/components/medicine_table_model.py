@@ -0,0 +1,172 @@
+from array import array
+import sys
+
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex
+
+
+class MedicineTableModel(QAbstractTableModel):
+    """Column-oriented medicine store that formats cells only when Qt asks
+    
+    Filtering swaps in a list of row ids instead of rebuilding rows, so a
+    search keystroke costs one model reset regardless of catalogue size.
+    Medicine ids map to store rows, and store rows to visible rows, so a
+    changed medicine is found without scanning the table.
+    """
+    
+    HEADERS = [
+        "Medicine Name",
+        "Company",
+        "Generic Name",
+        "Lowest Price",
+        "MRP",
+        "Available At (Stockists)"
+    ]
+    
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._clear_columns()
+        self._visible = None
+        # Store row id -> visible row under the filter, built on first use
+        self._visible_rows = None
+    
+    def _clear_columns(self):
+        self._ids = array('q')
+        self._store_rows = {}
+        self._names = []
+        self._companies = []
+        self._generics = []
+        self._lowest_prices = array('d')
+        self._mrps = array('d')
+        self._stockist_counts = array('i')
+    
+    def _append(self, medicine):
+        """Store one medicine dict as column values"""
+        medicine_id = medicine.get('id') or 0
+        self._store_rows[medicine_id] = len(self._ids)
+        self._ids.append(medicine_id)
+        self._names.append(sys.intern(medicine.get('medicine_name') or 'N/A'))
+        self._companies.append(sys.intern(medicine.get('company_name') or 'N/A'))
+        self._generics.append(sys.intern(medicine.get('generic_name') or 'N/A'))
+        self._lowest_prices.append(medicine.get('lowest_price') or 0.0)
+        self._mrps.append(medicine.get('mrp') or 0.0)
+        self._stockist_counts.append(medicine.get('stockist_count') or 0)
+    
+    def set_medicines(self, medicines):
+        """Replace all rows"""
+        self.beginResetModel()
+        self._clear_columns()
+        for medicine in medicines:
+            self._append(medicine)
+        self._visible = None
+        self._visible_rows = None
+        self.endResetModel()
+    
+    def append_medicine(self, medicine):
+        """Add one row at the end of the unfiltered store"""
+        row = self.rowCount()
+        if self._visible is None:
+            self.beginInsertRows(QModelIndex(), row, row)
+            self._append(medicine)
+            self.endInsertRows()
+        else:
+            self._append(medicine)
+    
+    def append_medicines(self, medicines):
+        """Add a batch of rows at the end of the unfiltered store"""
+        if not medicines:
+            return
+        row = self.rowCount()
+        if self._visible is None:
+            self.beginInsertRows(QModelIndex(), row, row + len(medicines) - 1)
+            for medicine in medicines:
+                self._append(medicine)
+            self.endInsertRows()
+        else:
+            for medicine in medicines:
+                self._append(medicine)
+    
+    def update_medicine(self, medicine):
+        """Overwrite the stored row of a medicine in place; False if it is not stored"""
+        row_id = self._store_rows.get(medicine.get('id') or 0)
+        if row_id is None:
+            return False
+        
+        self._lowest_prices[row_id] = medicine.get('lowest_price') or 0.0
+        self._mrps[row_id] = medicine.get('mrp') or 0.0
+        self._stockist_counts[row_id] = medicine.get('stockist_count') or 0
+        
+        row = self.visible_row(row_id)
+        if row >= 0:
+            self.dataChanged.emit(self.index(row, 3), self.index(row, len(self.HEADERS) - 1))
+        return True
+    
+    def set_filter(self, row_ids):
+        """Show only the given store row ids; None shows everything"""
+        self.beginResetModel()
+        self._visible = array('i', row_ids) if row_ids is not None else None
+        self._visible_rows = None
+        self.endResetModel()
+    
+    def total_count(self):
+        """Number of stored medicines, ignoring the filter"""
+        return len(self._names)
+    
+    def row_id(self, row):
+        """Map a visible row to its store row id"""
+        return self._visible[row] if self._visible is not None else row
+    
+    def visible_row(self, row_id):
+        """Map a store row id to its visible row, or -1 if the filter hides it"""
+        if self._visible is None:
+            return row_id if row_id < len(self._names) else -1
+        if self._visible_rows is None:
+            self._visible_rows = {stored: row for row, stored in enumerate(self._visible)}
+        return self._visible_rows.get(row_id, -1)
+    
+    def find_row(self, medicine_id=None, medicine_name=None):
+        """Visible row of a medicine by id (or name when no id), or -1"""
+        if medicine_id is not None:
+            row_id = self._store_rows.get(medicine_id)
+            return self.visible_row(row_id) if row_id is not None else -1
+        for row in range(self.rowCount()):
+            if self._names[self.row_id(row)] == medicine_name:
+                return row
+        return -1
+    
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self._visible) if self._visible is not None else len(self._names)
+    
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.HEADERS)
+    
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        
+        column = index.column()
+        if role == Qt.TextAlignmentRole:
+            return Qt.AlignCenter if column >= 3 else None
+        if role != Qt.DisplayRole:
+            return None
+        
+        row_id = self.row_id(index.row())
+        if column == 0:
+            return self._names[row_id]
+        if column == 1:
+            return self._companies[row_id]
+        if column == 2:
+            return self._generics[row_id]
+        if column == 3:
+            price = self._lowest_prices[row_id]
+            return f"₹ {price:.2f}" if price else "N/A"
+        if column == 4:
+            mrp = self._mrps[row_id]
+            return f"₹ {mrp:.2f}" if mrp else "N/A"
+        return f"{self._stockist_counts[row_id]} stockists"
+    
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.HEADERS[section]
+        return super().headerData(section, orientation, role)
\ No newline at end of file
@@ -4,9 +4,12 @@ from PyQt5.QtWidgets import (
     QTableWidgetItem, QHeaderView, QGroupBox, QSpacerItem,
     QSizePolicy, QMessageBox, QListWidget, QListWidgetItem
 )
-from PyQt5.QtCore import Qt, pyqtSignal, QTimer
+from PyQt5.QtCore import Qt, pyqtSignal, QTimer, QSize
 from PyQt5.QtGui import QFont, QColor, QPalette, QIcon
 
+from views.components.future_watcher import FutureWatcher
+from views.components.deal_item import DealItem
+
 
 class DashboardView(QWidget):
     # Signals
@@ -14,14 +17,22 @@ class DashboardView(QWidget):
     switch_to_all_medicines = pyqtSignal()
     medicine_selected = pyqtSignal(dict)
     
+    # Placeholder rows per list while the first statistics load
+    SKELETON_ROWS = 5
+    
     def __init__(self, controller):
         super().__init__()
         self.controller = controller
+        self.watcher = FutureWatcher(controller, self)
+        self.shown_stats = None
+        self.deal_rows = []
+        self.loading = False
         self.setup_ui()
+        self.show_skeleton()
         
-        # Auto refresh every 30 seconds
+        # Auto refresh every 30 seconds while the dashboard is on screen
         self.refresh_timer = QTimer()
-        self.refresh_timer.timeout.connect(self.refresh_data)
+        self.refresh_timer.timeout.connect(self.auto_refresh)
         self.refresh_timer.start(30000)
     
     def setup_ui(self):
@@ -171,6 +182,7 @@ class DashboardView(QWidget):
         self.search_input.setPlaceholderText("Enter medicine name (e.g., Paracetamol, Amoxicillin...)")
         self.search_input.setMinimumHeight(50)
         self.search_input.returnPressed.connect(self.perform_search)
+        self.search_input.textChanged.connect(self.on_search_text_changed)
         
         search_button = QPushButton("🔍 Find Best Price")
         search_button.setMinimumHeight(50)
@@ -287,60 +299,114 @@ class DashboardView(QWidget):
         
         return actions_layout
     
+    def auto_refresh(self):
+        """Timer refresh; skipped while another view is showing"""
+        if self.isVisible():
+            self.refresh_data()
+    
     def refresh_data(self):
-        """Refresh dashboard data"""
-        stats = self.controller.get_dashboard_stats()
+        """Refresh dashboard data in the background"""
+        self.watcher.watch(
+            self.controller.get_dashboard_stats_async(),
+            self.display_stats,
+            lambda e: QMessageBox.warning(self, "Error", f"Failed to load dashboard: {str(e)}")
+        )
+    
+    def skeleton_labels(self):
+        return (
+            self.total_medicines_value, self.total_stockists_value,
+            self.total_savings_value, self.avg_savings_value,
+            self.total_purchases_label, self.total_saved_label
+        )
+    
+    def set_skeleton(self, label, on):
+        """Toggle the grey placeholder look of a label (QLabel[skeleton] in apply_styles)"""
+        label.setProperty("skeleton", on)
+        label.style().unpolish(label)
+        label.style().polish(label)
+    
+    def show_skeleton(self):
+        """Grey placeholders so the first frame paints before any query returns"""
+        self.loading = True
+        for label in self.skeleton_labels():
+            label.setText(" ")
+            self.set_skeleton(label, True)
+        
+        for list_widget in (self.best_deals_list, self.recent_medicines_list):
+            for _ in range(self.SKELETON_ROWS):
+                item = QListWidgetItem()
+                item.setFlags(Qt.NoItemFlags)
+                item.setBackground(QColor("#f0f2f5"))
+                item.setSizeHint(QSize(0, 36))
+                list_widget.addItem(item)
+    
+    def clear_skeleton(self):
+        """Drop the placeholders before the first real statistics are shown"""
+        self.loading = False
+        for label in self.skeleton_labels():
+            self.set_skeleton(label, False)
+        self.best_deals_list.clear()
+        self.recent_medicines_list.clear()
+    
+    def display_stats(self, stats):
+        """Show dashboard statistics, updating only what changed"""
+        if stats == self.shown_stats:
+            return
+        if self.loading:
+            self.clear_skeleton()
         
         # Update stat cards
-        self.total_medicines_value.setText(str(stats['total_medicines']))
-        self.total_stockists_value.setText(str(stats['total_stockists']))
-        self.total_savings_value.setText(f"₹{stats['total_savings']:,.2f}")
-        self.avg_savings_value.setText(f"₹{stats['avg_savings']:,.2f}")
+        self.set_label(self.total_medicines_value, str(stats['total_medicines']))
+        self.set_label(self.total_stockists_value, str(stats['total_stockists']))
+        self.set_label(self.total_savings_value, f"₹{stats['total_savings']:,.2f}")
+        self.set_label(self.avg_savings_value, f"₹{stats['avg_savings']:,.2f}")
         
         # Update total purchases
-        self.total_purchases_label.setText(f"Total Purchases: {stats['total_purchases']}")
-        self.total_saved_label.setText(f"Total Money Saved: ₹{stats['total_savings']:,.2f}")
+        self.set_label(self.total_purchases_label, f"Total Purchases: {stats['total_purchases']}")
+        self.set_label(self.total_saved_label, f"Total Money Saved: ₹{stats['total_savings']:,.2f}")
         
-        # Update best deals list
-        self.best_deals_list.clear()
-        for deal in stats['best_deals']:
+        shown = self.shown_stats or {}
+        if stats['best_deals'] != shown.get('best_deals'):
+            self.show_best_deals(stats['best_deals'])
+        if stats['recent_medicines'] != shown.get('recent_medicines'):
+            self.show_recent_medicines(stats['recent_medicines'])
+        
+        self.shown_stats = stats
+    
+    def set_label(self, label, text):
+        """setText only when the text differs, so unchanged labels are not repainted"""
+        if label.text() != text:
+            label.setText(text)
+    
+    def show_best_deals(self, deals):
+        """Relabel pooled deal rows; rows beyond the deal count are hidden, not deleted"""
+        while len(self.deal_rows) < len(deals):
             item = QListWidgetItem()
-            widget = self.create_deal_item(deal)
-            item.setSizeHint(widget.sizeHint())
+            widget = DealItem()
             self.best_deals_list.addItem(item)
             self.best_deals_list.setItemWidget(item, widget)
-        
-        # Update recent medicines
-        self.recent_medicines_list.clear()
-        for med in stats['recent_medicines']:
-            item = QListWidgetItem(f"💊 {med['medicine_name']} - {med['company_name']}")
-            self.recent_medicines_list.addItem(item)
+            self.deal_rows.append((item, widget))
+        
+        for row, (item, widget) in enumerate(self.deal_rows):
+            if row < len(deals):
+                widget.set_deal(deals[row])
+                item.setSizeHint(widget.sizeHint())
+                item.setHidden(False)
+            else:
+                item.setHidden(True)
     
-    def create_deal_item(self, deal):
-        """Create a custom widget for best deals list"""
-        widget = QWidget()
-        layout = QHBoxLayout(widget)
-        layout.setContentsMargins(10, 5, 10, 5)
-        
-        name_label = QLabel(f"💊 {deal['medicine_name']}")
-        name_label.setObjectName("dealName")
-        
-        price_label = QLabel(f"₹{deal['price']:.2f}")
-        price_label.setObjectName("dealPrice")
-        
-        savings_label = QLabel(f"Save ₹{deal['savings']:.2f}")
-        savings_label.setObjectName("dealSavings")
-        
-        stockist_label = QLabel(f"at {deal['stockist_name']}")
-        stockist_label.setObjectName("dealStockist")
-        
-        layout.addWidget(name_label)
-        layout.addStretch()
-        layout.addWidget(price_label)
-        layout.addWidget(savings_label)
-        layout.addWidget(stockist_label)
-        
-        return widget
+    def show_recent_medicines(self, medicines):
+        """Retext the recent medicine rows in place"""
+        for row, med in enumerate(medicines):
+            text = f"💊 {med['medicine_name']} - {med['company_name']}"
+            item = self.recent_medicines_list.item(row)
+            if item is None:
+                self.recent_medicines_list.addItem(QListWidgetItem(text))
+            elif item.text() != text:
+                item.setText(text)
+        
+        while self.recent_medicines_list.count() > len(medicines):
+            self.recent_medicines_list.takeItem(self.recent_medicines_list.count() - 1)
     
     def perform_search(self):
         """Perform medicine search"""
@@ -350,8 +416,41 @@ class DashboardView(QWidget):
             QMessageBox.warning(self, "Search", "Please enter at least 2 characters")
             return
         
-        results = self.controller.search_medicines(search_term)
+        self.watcher.watch(
+            self.controller.search_medicines_async(search_term),
+            lambda results: self.display_search_results(results, search_term),
+            lambda e: QMessageBox.warning(self, "Search", f"Search failed: {str(e)}")
+        )
+    
+    def on_search_text_changed(self, text):
+        """Live results while typing; the controller debounces and cancels"""
+        if len(text.strip()) < 2:
+            # A search for the longer text may still be running
+            self.controller.cancel_search_as_you_type()
+            self.results_table.hide()
+            return
         
+        self.watcher.watch(
+            self.controller.search_as_you_type(text),
+            lambda results: self.display_live_results(results, text)
+        )
+    
+    def display_live_results(self, results, term):
+        """Show type-ahead results without interrupting the user"""
+        if results is None or term.strip() != self.search_input.text().strip():
+            return
+        if not results:
+            self.results_table.hide()
+            return
+        self.display_search_results(results, term)
+    
+    def display_search_results(self, results, term=None):
+        """Show search results for term, unless the search box has moved on"""
+        if results is None:
+            # Superseded by a newer search
+            return
+        if term is not None and term.strip() != self.search_input.text().strip():
+            return
         if not results:
             QMessageBox.information(self, "Search", "No medicines found")
             self.results_table.hide()
@@ -431,6 +530,12 @@ class DashboardView(QWidget):
                 color: #1a2634;
             }
             
+            QLabel[skeleton="true"] {
+                background-color: #e9ecef;
+                border-radius: 8px;
+                min-width: 120px;
+            }
+            
             #searchGroup {
                 background-color: white;
                 border-radius: 15px;
@@ -1,9 +1,13 @@
 from PyQt5.QtWidgets import (
-    QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QTableWidget,
-    QTableWidgetItem, QHeaderView, QMessageBox, QLineEdit
+    QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QTableView,
+    QHeaderView, QMessageBox, QLineEdit
 )
 from PyQt5.QtCore import pyqtSignal, Qt
-from PyQt5.QtGui import QFont, QColor
+from PyQt5.QtGui import QFont
+
+from utils.search_index import SearchIndex
+from views.components.medicine_table_model import MedicineTableModel
+from views.components.future_watcher import FutureWatcher
 
 
 class MedicineListView(QWidget):
@@ -12,7 +16,17 @@ class MedicineListView(QWidget):
     def __init__(self, controller):
         super().__init__()
         self.controller = controller
-        self.medicines = []
+        self.watcher = FutureWatcher(controller, self)
+        self.search_index = SearchIndex()
+        self.table_model = MedicineTableModel()
+        self.load_generation = 0
+        # True once a load has finished, even if it found no medicines
+        self.loaded = False
+        # Rows added or changed while a load streams in, applied once it finishes
+        self.loading = False
+        self.pending_medicines = {}
+        self.changed_medicine_ids = set()
+        self.pending_highlight = None
         self.setup_ui()
     
     def setup_ui(self):
@@ -54,31 +68,24 @@ class MedicineListView(QWidget):
         search_layout.addStretch()
         main_layout.addLayout(search_layout)
         
-        # Table widget
-        self.table = QTableWidget()
-        self.table.setColumnCount(6)
-        self.table.setHorizontalHeaderLabels([
-            "Medicine Name",
-            "Company",
-            "Generic Name",
-            "Lowest Price",
-            "MRP",
-            "Available At (Stockists)"
-        ])
+        # Table view, cells are produced lazily by the model
+        self.table = QTableView()
+        self.table.setModel(self.table_model)
+        self.table.verticalHeader().setDefaultSectionSize(30)
         
         # Configure table
         self.table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
         self.table.horizontalHeader().setSectionResizeMode(1, QHeaderView.Stretch)
         self.table.horizontalHeader().setSectionResizeMode(2, QHeaderView.Stretch)
-        self.table.setSelectionBehavior(QTableWidget.SelectRows)
-        self.table.setSelectionMode(QTableWidget.SingleSelection)
+        self.table.setSelectionBehavior(QTableView.SelectRows)
+        self.table.setSelectionMode(QTableView.SingleSelection)
         self.table.setAlternatingRowColors(True)
         self.table.setStyleSheet("""
-            QTableWidget {
+            QTableView {
                 border: 1px solid #ddd;
                 gridline-color: #ddd;
             }
-            QTableWidget::item {
+            QTableView::item {
                 padding: 5px;
             }
             QHeaderView::section {
@@ -108,92 +115,129 @@ class MedicineListView(QWidget):
         self.setLayout(main_layout)
     
     def load_medicines(self):
-        """Load medicines into table"""
-        try:
-            # Get all medicines from database
-            self.medicines = self.controller.medicine_model.get_all_medicines_with_prices()
-            self.display_medicines(self.medicines)
-        except Exception as e:
-            QMessageBox.warning(self, "Error", f"Failed to load medicines: {str(e)}")
+        """Load medicines into table in the background, chunk by chunk"""
+        self.summary_label.setText("Loading medicines...")
+        self.load_generation += 1
+        generation = self.load_generation
+        self.loading = True
+        
+        # Rows stream in before the index is ready; searching waits for it
+        self.search_index = SearchIndex()
+        self.table_model.set_medicines([])
+        self.watcher.watch(
+            self.controller.load_medicine_index_async(
+                self.watcher.relay(lambda chunk: self.display_chunk(generation, chunk))
+            ),
+            self.display_medicines,
+            self.on_load_error
+        )
     
-    def display_medicines(self, medicines):
-        """Display medicines in table"""
-        self.table.setRowCount(0)
-        
-        if not medicines:
-            self.summary_label.setText("No medicines found")
+    def display_chunk(self, generation, chunk):
+        """Append the next rows of the load started as generation"""
+        if generation != self.load_generation:
             return
-        
-        for row, medicine in enumerate(medicines):
-            self.table.insertRow(row)
-            
-            # Medicine Name
-            item = QTableWidgetItem(medicine.get('medicine_name', 'N/A'))
-            self.table.setItem(row, 0, item)
-            
-            # Company
-            item = QTableWidgetItem(medicine.get('company_name', 'N/A'))
-            self.table.setItem(row, 1, item)
-            
-            # Generic Name
-            item = QTableWidgetItem(medicine.get('generic_name', 'N/A'))
-            self.table.setItem(row, 2, item)
-            
-            # Lowest Price
-            lowest_price = medicine.get('lowest_price', 0)
-            if lowest_price:
-                item = QTableWidgetItem(f"₹ {lowest_price:.2f}")
-            else:
-                item = QTableWidgetItem("N/A")
-            item.setTextAlignment(Qt.AlignCenter)
-            self.table.setItem(row, 3, item)
-            
-            # MRP
-            mrp = medicine.get('mrp', 0)
-            if mrp:
-                item = QTableWidgetItem(f"₹ {mrp:.2f}")
-            else:
-                item = QTableWidgetItem("N/A")
-            item.setTextAlignment(Qt.AlignCenter)
-            self.table.setItem(row, 4, item)
-            
-            # Stockist Count
-            stockist_count = medicine.get('stockist_count', 0)
-            item = QTableWidgetItem(f"{stockist_count} stockists")
-            item.setTextAlignment(Qt.AlignCenter)
-            self.table.setItem(row, 5, item)
-        
-        self.summary_label.setText(f"Total medicines: {len(medicines)}")
+        self.table_model.append_medicines(chunk)
+        self.summary_label.setText(f"Loading medicines... {self.table_model.total_count()}")
+    
+    def display_medicines(self, result):
+        """Attach the search index once every chunk is shown
+        
+        Medicines added or changed during the load are applied only now,
+        so the worker-built index and the table store hold the same rows
+        in the same order.
+        """
+        _, self.search_index = result
+        self.loading = False
+        self.loaded = True
+        pending, self.pending_medicines = self.pending_medicines, {}
+        for medicine in pending.values():
+            self.add_medicine(medicine)
+        self.on_search()
+        self.apply_highlight()
+        self.pending_highlight = None
+    
+    def on_load_error(self, error):
+        """Report a failed load; pending rows wait for the next one"""
+        self.loading = False
+        QMessageBox.warning(self, "Error", f"Failed to load medicines: {str(error)}")
+    
+    def update_summary(self):
+        """Show how many medicines are visible"""
+        count = self.table_model.rowCount()
+        if count:
+            self.summary_label.setText(f"Total medicines: {count}")
+        else:
+            self.summary_label.setText("No medicines found")
     
     def on_search(self):
         """Filter medicines based on search"""
-        search_text = self.search_input.text().lower().strip()
-        
-        if not search_text:
-            self.display_medicines(self.medicines)
+        self.table_model.set_filter(self.search_index.search(self.search_input.text()))
+        self.update_summary()
+    
+    def add_medicine(self, medicine):
+        """Show a new or changed medicine without reloading the list"""
+        if not medicine:
+            return
+        if self.loading:
+            # The load's index has not been attached yet; a later row replaces an earlier one
+            self.pending_medicines[medicine.get('id')] = medicine
+            return
+        if not self.loaded or self.table_model.update_medicine(medicine):
+            # Never loaded: the first load reads it from the database
             return
         
-        filtered = [
-            m for m in self.medicines
-            if search_text in m.get('medicine_name', '').lower() or
-               search_text in m.get('company_name', '').lower() or
-               search_text in m.get('generic_name', '').lower()
-        ]
+        self.search_index.add(medicine)
+        self.table_model.append_medicine(medicine)
+        if self.search_input.text().strip():
+            self.on_search()
+        else:
+            self.update_summary()
+    
+    def apply_changes(self, changes):
+        """Bring a loaded list up to date with writes from other seats
+        
+        Price changes update only the affected rows; renamed or deleted
+        medicines make the search index stale, so those reload the list.
+        """
+        if not self.loaded and not self.loading:
+            return
+        if changes.full_reload or changes.medicines_rewritten:
+            self.load_medicines()
+            return
+        if not changes.medicine_ids:
+            return
         
-        self.display_medicines(filtered)
+        # A newer request supersedes the older one, so ask for every id still pending
+        self.changed_medicine_ids |= changes.medicine_ids
+        requested = set(self.changed_medicine_ids)
+        self.watcher.watch(
+            self.controller.get_medicines_async(requested),
+            lambda medicines: self.update_medicines(requested, medicines)
+        )
+    
+    def update_medicines(self, requested, medicines):
+        """Show fresh rows for changed medicines, appending new ones"""
+        self.changed_medicine_ids -= requested
+        for medicine in medicines:
+            self.add_medicine(medicine)
     
     def highlight_medicine(self, medicine_data):
-        """Highlight a specific medicine"""
+        """Highlight a specific medicine, again once a pending load finishes"""
+        self.pending_highlight = medicine_data
+        self.apply_highlight()
+    
+    def apply_highlight(self):
+        """Select and scroll to the medicine passed to highlight_medicine"""
+        medicine_data = self.pending_highlight
         if not medicine_data:
             return
         
-        medicine_name = medicine_data.get('medicine_name', '')
-        
-        for row in range(self.table.rowCount()):
-            if self.table.item(row, 0).text() == medicine_name:
-                self.table.selectRow(row)
-                self.table.scrollToItem(self.table.item(row, 0))
-                break
+        row = self.table_model.find_row(
+            medicine_data.get('id'), medicine_data.get('medicine_name', '')
+        )
+        if row >= 0:
+            self.table.selectRow(row)
+            self.table.scrollTo(self.table_model.index(row, 0))
     
     def on_back_clicked(self):
         """Emit back_to_dashboard signal"""